@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the REST API serializer (gear_guard/utils/serialization.py).
+
+Compares the former stdlib encoder, json.dumps(default=str), with the
+serializer layer on payloads shaped like real API pages, then measures
+gzip/brotli compression of the encoded bodies. Runs without Odoo:
+
+    python benchmarks/bench_serialization.py [--repeat N]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import timeit
+from datetime import date, datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERIALIZATION_PATH = os.path.join(HERE, '..', 'gear_guard', 'utils', 'serialization.py')
+
+
+def load_serialization():
+    # Loaded by path: importing the gear_guard package would require Odoo
+    spec = importlib.util.spec_from_file_location('gear_guard_serialization', SERIALIZATION_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def equipment_page(rng, rows=100):
+    """Page of GET /api/equipment: nested team and technician objects, dates."""
+    return {
+        'status': 'success',
+        'total_count': 12840,
+        'limit': rows,
+        'offset': 0,
+        'data': [{
+            'id': 1000 + i,
+            'name': 'Hydraulic Press %03d' % i,
+            'serial_number': 'HP-%08d' % rng.randrange(10 ** 8),
+            'location': 'Plant %d / Bay %d' % (rng.randrange(1, 5), rng.randrange(1, 40)),
+            'is_scrapped': False,
+            'department': {'id': rng.randrange(1, 20), 'name': 'Production'},
+            'maintenance_team': {'id': rng.randrange(1, 8), 'name': 'Mechanical Maintenance'},
+            'default_technician': {'id': rng.randrange(2, 60), 'name': 'Technician %d' % rng.randrange(60)},
+            'purchase_date': date(2015, 1, 1) + timedelta(days=rng.randrange(3000)),
+            'warranty_expiry_date': date(2024, 1, 1) + timedelta(days=rng.randrange(1500)),
+            'risk_score': round(rng.random() * 100, 2),
+            'open_maintenance_requests': rng.randrange(5),
+        } for i in range(rows)],
+    }
+
+
+def request_page(rng, rows=100):
+    """Page of GET /api/maintenance-requests: datetime-heavy rows."""
+    start = datetime(2025, 1, 1, 8, 0, 0)
+    return {
+        'status': 'success',
+        'total_count': 98213,
+        'limit': rows,
+        'offset': 0,
+        'data': [{
+            'id': 50000 + i,
+            'name': 'Pump pressure drop on line %d' % rng.randrange(20),
+            'description': 'Operator reports pressure dropping below threshold during the night shift.',
+            'equipment': {'id': rng.randrange(1000, 2000), 'name': 'Pump %d' % rng.randrange(300)},
+            'team': {'id': rng.randrange(1, 8), 'name': 'Mechanical Maintenance'},
+            'assigned_user': {'id': rng.randrange(2, 60), 'name': 'Technician %d' % rng.randrange(60)},
+            'request_type': rng.choice(['corrective', 'preventive']),
+            'state': rng.choice(['new', 'in_progress', 'repaired']),
+            'priority': rng.choice('0123'),
+            'scheduled_date': start + timedelta(hours=rng.randrange(5000)),
+            'completion_date': start + timedelta(hours=rng.randrange(5000)) if rng.random() < 0.5 else None,
+            'create_date': start - timedelta(minutes=rng.randrange(100000)),
+            'is_overdue': rng.random() < 0.1,
+            'tags': ['pump', 'pressure', 'hydraulic'],
+        } for i in range(rows)],
+    }
+
+
+def change_feed_page(rng, rows=1000):
+    """Page of GET /api/changes/requests: large flat rows with datetimes."""
+    start = datetime(2025, 3, 1)
+    return {
+        'status': 'success',
+        'changes': [{
+            'op': 'upsert',
+            'id': 70000 + i,
+            'changed_at': start + timedelta(seconds=i * 7),
+            'record': {
+                'id': 70000 + i,
+                'name': 'Request %d' % i,
+                'equipment_id': rng.randrange(1000, 2000),
+                'team_id': rng.randrange(1, 8),
+                'assigned_user_id': rng.randrange(2, 60),
+                'state': 'in_progress',
+                'request_type': 'corrective',
+                'priority': '1',
+                'scheduled_date': start + timedelta(hours=i),
+                'completion_date': None,
+                'duration_hours': 2.5,
+                'is_overdue': False,
+                'schedule_id': None,
+                'active': True,
+            },
+        } for i in range(rows)],
+        'next_cursor': 'eyJhIjogMX0=',
+        'has_more': True,
+    }
+
+
+def best_of(func, repeat, number):
+    """Best time per call in microseconds."""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5, help="timing rounds, the best one is kept")
+    args = parser.parse_args()
+
+    serialization = load_serialization()
+    rng = random.Random(42)
+    payloads = [
+        ('equipment page (100 rows)', equipment_page(rng), 200),
+        ('request page (100 rows)', request_page(rng), 200),
+        ('change feed page (1000 rows)', change_feed_page(rng), 20),
+    ]
+    print("orjson: %s, brotli: %s" % (serialization.ORJSON_AVAILABLE, serialization.BROTLI_AVAILABLE))
+    print()
+    print("%-30s %12s %12s %8s %10s %10s" % ('payload', 'stdlib us', 'layer us', 'speedup', 'bytes', 'stdlib B'))
+    for label, payload, number in payloads:
+        baseline = best_of(lambda: json.dumps(payload, default=str), args.repeat, number)
+        layer = best_of(lambda: serialization.dumps(payload), args.repeat, number)
+        body = serialization.dumps(payload)
+        print("%-30s %12.1f %12.1f %7.1fx %10d %10d" % (
+            label, baseline, layer, baseline / layer, len(body), len(json.dumps(payload, default=str).encode()),
+        ))
+
+    print()
+    encodings = ['gzip'] + (['br'] if serialization.BROTLI_AVAILABLE else [])
+    print("%-30s %6s %12s %10s %8s" % ('payload', 'coding', 'compress us', 'bytes', 'ratio'))
+    for label, payload, number in payloads:
+        body = serialization.dumps(payload)
+        for encoding in encodings:
+            elapsed = best_of(lambda: serialization.compress(body, encoding), args.repeat, max(number // 4, 5))
+            compressed = serialization.compress(body, encoding)
+            print("%-30s %6s %12.1f %10d %7.1f%%" % (
+                label, encoding, elapsed, len(compressed), 100.0 * len(compressed) / len(body),
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -29,13 +29,19 @@
         'security/ir.model.access.csv',
         'security/security_rules.xml',
         'data/cron.xml',
+        'data/mail_activity_data.xml',
         'views/menus.xml',
         'views/equipment_category_views.xml',
         'views/equipment_views.xml',
         'views/maintenance_team_views.xml',
         'views/maintenance_request_views.xml',
+        'views/maintenance_request_archive_views.xml',
+        'views/maintenance_tag_views.xml',
+        'views/maintenance_schedule_views.xml',
+        'views/webhook_views.xml',
         'views/dashboard_views.xml',
         'views/report_views.xml',
+        'views/sla_views.xml',
         'wizards/wizard_views.xml',
     ],
     'demo': [
@@ -1,18 +1,42 @@
 # -*- coding: utf-8 -*-
 
 import json
-from odoo import http
+from datetime import datetime
+from urllib.parse import parse_qsl, urlsplit
+
+import pytz
+
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.routing import Map, Rule
+
+from odoo import fields, http, tools
 from odoo.http import request, Response
 
+from ..models.maintenance_request import DuplicateRequestError
+from ..utils import ml_utils, serialization
+from . import replica
+
 
 class GearGuardAPI(http.Controller):
     """REST API Controller for GearGuard module."""
 
+    _BATCH_MAX_REQUESTS = 20
+    # GET endpoints whose answer is not JSON and cannot be spliced into a batch
+    _BATCH_EXCLUDED_ENDPOINTS = {'get_offline_bundle'}
+    # WSGI environ flag: sub-responses of a batch are left uncompressed
+    _BATCH_ENVIRON_KEY = 'gear_guard.batch'
+    _batch_routes = None
+
     def _json_response(self, data, status=200):
-        """Helper method to return JSON response."""
+        """Helper method to return JSON response, compressed when the client accepts it."""
+        accept_encoding = None
+        if not request.httprequest.environ.get(self._BATCH_ENVIRON_KEY):
+            accept_encoding = request.httprequest.headers.get('Accept-Encoding')
+        body, headers = serialization.encode_response(data, accept_encoding)
         return Response(
-            json.dumps(data, default=str),
+            body,
             status=status,
+            headers=headers,
             content_type='application/json'
         )
 
@@ -23,6 +47,7 @@ class GearGuardAPI(http.Controller):
     # ==================== Equipment Endpoints ====================
 
     @http.route('/api/equipment', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
     def get_equipment_list(self, **kwargs):
         """
         GET /api/equipment
@@ -31,6 +56,8 @@ class GearGuardAPI(http.Controller):
             - include_scrapped: boolean (default: false)
             - team_id: integer (filter by team)
             - department_id: integer (filter by department)
+            - min_risk: float (only equipment with at least this risk score)
+            - order: name (default) or risk (riskiest first)
             - limit: integer (default: 100)
             - offset: integer (default: 0)
         """
@@ -48,9 +75,15 @@ class GearGuardAPI(http.Controller):
                 domain.append(('maintenance_team_id', '=', int(team_id)))
             if department_id:
                 domain.append(('department_id', '=', int(department_id)))
+            if kwargs.get('min_risk'):
+                domain.append(('risk_score', '>=', float(kwargs['min_risk'])))
+            order = kwargs.get('order', 'name')
+            if order not in ('name', 'risk'):
+                return self._error_response("order must be 'name' or 'risk'", status=400)
 
             equipment = request.env['gear.equipment'].sudo().search(
-                domain, limit=limit, offset=offset, order='name'
+                domain, limit=limit, offset=offset,
+                order='risk_score desc nulls last, id' if order == 'risk' else 'name',
             )
             total_count = request.env['gear.equipment'].sudo().search_count(domain)
 
@@ -79,6 +112,9 @@ class GearGuardAPI(http.Controller):
                     } if eq.default_technician_id else None,
                     'purchase_date': eq.purchase_date,
                     'warranty_expiry_date': eq.warranty_expiry_date,
+                    'risk_score': eq.risk_score,
+                    'down_since': eq.down_since,
+                    'downtime_hours': eq.downtime_hours,
                     'open_maintenance_requests': eq.open_maintenance_request_count,
                 } for eq in equipment]
             }
@@ -88,6 +124,7 @@ class GearGuardAPI(http.Controller):
             return self._error_response(str(e), status=500)
 
     @http.route('/api/equipment/<int:equipment_id>', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
     def get_equipment_detail(self, equipment_id, **kwargs):
         """
         GET /api/equipment/<id>
@@ -132,6 +169,9 @@ class GearGuardAPI(http.Controller):
                     } if equipment.default_technician_id else None,
                     'purchase_date': equipment.purchase_date,
                     'warranty_expiry_date': equipment.warranty_expiry_date,
+                    'risk_score': equipment.risk_score,
+                    'down_since': equipment.down_since,
+                    'downtime_hours': equipment.downtime_hours,
                     'maintenance_request_count': equipment.maintenance_request_count,
                     'open_maintenance_request_count': equipment.open_maintenance_request_count,
                     'recent_maintenance_requests': [{
@@ -149,6 +189,54 @@ class GearGuardAPI(http.Controller):
         except Exception as e:
             return self._error_response(str(e), status=500)
 
+    @http.route('/api/equipment/import', type='http', auth='user', methods=['POST'], csrf=False)
+    def import_equipment(self, **kwargs):
+        """
+        POST /api/equipment/import
+        Streams a CSV upload (multipart field "file") into equipment, upserting on serial_number.
+        Query params:
+            - chunk_size: integer (default: 2000)
+        Requires the Settings (system) group.
+        """
+        try:
+            if not request.env.user.has_group('base.group_system'):
+                return self._error_response('Access denied', status=403)
+            upload = request.httprequest.files.get('file')
+            if not upload:
+                return self._error_response('file is required', status=400)
+
+            Importer = request.env['gear.equipment.import']
+            try:
+                # Committed chunk by chunk: a failure keeps the chunks already imported
+                result = Importer.import_csv(
+                    upload.stream,
+                    chunk_size=int(kwargs.get('chunk_size', 0)) or None,
+                    auto_commit=True,
+                )
+            except ValueError as e:
+                return self._error_response(str(e), status=400)
+            report = Importer._save_rejected_report(result)
+
+            data = {
+                'status': 'success',
+                'rows': result['rows'],
+                'created': result['created'],
+                'updated': result['updated'],
+                'unchanged': result['unchanged'],
+                'rejected_count': result['rejected_count'],
+                'seconds': result['seconds'],
+                'rejected': [{
+                    'line': line,
+                    'serial_number': serial,
+                    'reason': reason,
+                } for line, serial, reason in result['rejected'][:Importer._MAX_REPORTED_ERRORS]],
+                'rejected_report_url': '/web/content/%s?download=true' % report.id if report else None,
+            }
+            return self._json_response(data)
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
     # ==================== Maintenance Request Endpoints ====================
 
     @http.route('/api/maintenance-request', type='json', auth='user', methods=['POST'], csrf=False)
@@ -166,11 +254,16 @@ class GearGuardAPI(http.Controller):
             "scheduled_date": "2025-01-15 10:00:00",
             "priority": "0", "1", "2", or "3",
             "team_id": 1 (optional, auto-filled from equipment),
-            "assigned_user_id": 1 (optional, auto-filled from equipment)
+            "assigned_user_id": 1 (optional, auto-filled from equipment),
+            "skip_duplicate_check": false (optional)
         }
+        With duplicate detection on (gear_guard.duplicate_mode), the response
+        flags "duplicate_of_id", or "merged" when folded into an open request;
+        in reject mode an error with "duplicate_of_id" is returned.
         """
         try:
-            data = request.jsonrequest
+            # type='json' routes receive the JSON-RPC params as keyword arguments
+            data = kwargs
 
             # Validate required fields
             if not data.get('name'):
@@ -209,13 +302,32 @@ class GearGuardAPI(http.Controller):
                 vals['scheduled_date'] = data['scheduled_date']
 
             # Create the maintenance request
-            maintenance_request = request.env['gear.maintenance.request'].sudo().create(vals)
+            Request = request.env['gear.maintenance.request'].sudo()
+            if data.get('skip_duplicate_check'):
+                Request = Request.with_context(skip_duplicate_check=True)
+            try:
+                to_create, merged, _batch_duplicates = Request._apply_duplicate_policy([vals])
+            except DuplicateRequestError as e:
+                return {
+                    'status': 'error',
+                    'message': str(e),
+                    'duplicate_of_id': e.duplicate.id,
+                }
+            if merged:
+                maintenance_request = merged[0]
+            else:
+                maintenance_request = Request.with_context(skip_duplicate_check=True).create(to_create)
 
             return {
                 'status': 'success',
-                'message': 'Maintenance request created successfully',
+                'message': (
+                    'Merged into existing maintenance request' if merged
+                    else 'Maintenance request created successfully'
+                ),
                 'data': {
                     'id': maintenance_request.id,
+                    'merged': bool(merged),
+                    'duplicate_of_id': maintenance_request.duplicate_of_id.id or None,
                     'name': maintenance_request.name,
                     'equipment_id': maintenance_request.equipment_id.id,
                     'equipment_name': maintenance_request.equipment_id.name,
@@ -232,7 +344,49 @@ class GearGuardAPI(http.Controller):
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
 
+    @http.route('/api/maintenance-requests/transition', type='json', auth='user', methods=['POST'], csrf=False)
+    def transition_maintenance_requests(self, **kwargs):
+        """
+        POST /api/maintenance-requests/transition
+        Moves many requests to a new state at once.
+
+        JSON Body:
+        {
+            "ids": [1, 2, 3] (required),
+            "state": "new", "in_progress", "repaired" or "scrap" (required)
+        }
+        """
+        try:
+            # type='json' routes receive the JSON-RPC params as keyword arguments
+            data = kwargs
+            MaintRequest = request.env['gear.maintenance.request'].sudo()
+
+            ids = data.get('ids')
+            if not ids or not isinstance(ids, list):
+                return {'status': 'error', 'message': 'ids must be a non-empty list'}
+            if data.get('state') not in MaintRequest._STATE_TRANSITIONS:
+                return {
+                    'status': 'error',
+                    'message': 'state must be one of: %s' % ', '.join(MaintRequest._STATE_TRANSITIONS),
+                }
+
+            requests = MaintRequest.browse([int(rid) for rid in ids]).exists()
+            moved, ineligible = requests._transition(data['state'])
+
+            return {
+                'status': 'success',
+                'data': {
+                    'moved': moved.ids,
+                    'ineligible': [{'id': req.id, 'state': req.state} for req in ineligible],
+                    'not_found': sorted(set(int(rid) for rid in ids) - set(requests.ids)),
+                }
+            }
+
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
     @http.route('/api/maintenance-requests', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
     def get_maintenance_requests(self, **kwargs):
         """
         GET /api/maintenance-requests
@@ -243,8 +397,12 @@ class GearGuardAPI(http.Controller):
             - state: string (new, in_progress, repaired, scrap)
             - request_type: string (corrective, preventive)
             - overdue_only: boolean
+            - date_from: datetime (scheduled on or after)
+            - date_to: datetime (scheduled on or before)
             - limit: integer (default: 100)
             - offset: integer (default: 0)
+        Archived requests are included only when date_from reaches back
+        past the archival watermark.
         """
         try:
             equipment_id = kwargs.get('equipment_id')
@@ -267,10 +425,44 @@ class GearGuardAPI(http.Controller):
             if overdue_only:
                 domain.append(('is_overdue', '=', True))
 
-            requests = request.env['gear.maintenance.request'].sudo().search(
-                domain, limit=limit, offset=offset, order='scheduled_date desc'
-            )
-            total_count = request.env['gear.maintenance.request'].sudo().search_count(domain)
+            date_from = kwargs.get('date_from')
+            date_to = kwargs.get('date_to')
+            try:
+                date_from = fields.Datetime.to_datetime(date_from) if date_from else None
+                date_to = fields.Datetime.to_datetime(date_to) if date_to else None
+            except ValueError:
+                return self._error_response('Invalid date format', status=400)
+            if date_from:
+                domain.append(('scheduled_date', '>=', date_from))
+            if date_to:
+                domain.append(('scheduled_date', '<=', date_to))
+
+            Request = request.env['gear.maintenance.request'].sudo()
+            total_count = Request.search_count(domain)
+
+            # Cold storage only when the scheduled_date window can hold archived
+            # requests: unscheduled ones match only an open-ended window
+            Archive = request.env['gear.maintenance.request.archive'].sudo()
+            archive_domain = None
+            if Archive._get_watermark() and not overdue_only and (not state or state in ('repaired', 'scrap')):
+                scheduled_until = Archive._get_scheduled_until()
+                if not date_from or (scheduled_until and date_from <= scheduled_until):
+                    archive_domain = [cond for cond in domain if cond[0] != 'is_overdue']
+
+            if archive_domain is None:
+                rows = Request.search(domain, limit=limit, offset=offset, order='scheduled_date desc')
+            else:
+                # Both sources hold part of the page: merge their first
+                # offset + limit rows (unscheduled first, as in PostgreSQL),
+                # then apply the offset once
+                requests = Request.search(domain, limit=limit + offset, order='scheduled_date desc')
+                archived = Archive.search(archive_domain, limit=limit + offset, order='scheduled_date desc')
+                total_count += Archive.search_count(archive_domain)
+                rows = sorted(
+                    list(requests) + list(archived),
+                    key=lambda r: (not r.scheduled_date, r.scheduled_date or datetime.min),
+                    reverse=True,
+                )[offset:offset + limit]
 
             data = {
                 'status': 'success',
@@ -278,7 +470,8 @@ class GearGuardAPI(http.Controller):
                 'limit': limit,
                 'offset': offset,
                 'data': [{
-                    'id': req.id,
+                    'id': req.original_id if req._name == Archive._name else req.id,
+                    'archived': req._name == Archive._name,
                     'name': req.name,
                     'description': req.description,
                     'equipment': {
@@ -299,8 +492,137 @@ class GearGuardAPI(http.Controller):
                     'scheduled_date': req.scheduled_date,
                     'completion_date': req.completion_date,
                     'duration_hours': req.duration_hours,
+                    'is_overdue': req._name != Archive._name and req.is_overdue,
+                    'sla': {
+                        'policy_id': req.sla_policy_id.id,
+                        'response_deadline': req.sla_response_deadline,
+                        'resolution_deadline': req.sla_resolution_deadline,
+                        'responded_date': req.sla_responded_date,
+                        'response_breached': req.sla_response_breached,
+                        'resolution_breached': req.sla_resolution_breached,
+                    } if req._name != Archive._name and req.sla_policy_id else None,
+                    'state_date': (req.state_date or req.create_date) if req._name != Archive._name else None,
+                    'dwell_new_hours': req.dwell_new_hours if req._name != Archive._name else None,
+                    'dwell_in_progress_hours': req.dwell_in_progress_hours if req._name != Archive._name else None,
+                } for req in rows]
+            }
+            return self._json_response(data)
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
+    @http.route('/api/maintenance/my-queue', type='http', auth='user', methods=['GET'], csrf=False)
+    def get_my_queue(self, **kwargs):
+        """
+        GET /api/maintenance/my-queue
+        Returns the next open requests of a technician, most urgent first
+        (overdue, priority, in progress before new, scheduled date).
+        Query params:
+            - user_id: integer (default: the calling user)
+            - limit: integer (default: 20, max: 200)
+        """
+        try:
+            user_id = int(kwargs.get('user_id') or request.env.uid)
+            limit = min(max(int(kwargs.get('limit', 20)), 1), 200)
+
+            # Served by the (assigned_user_id, queue_rank, id) partial index
+            queue = request.env['gear.maintenance.request'].sudo().search(
+                [('assigned_user_id', '=', user_id), ('queue_rank', '>', 0)],
+                limit=limit, order='queue_rank, id',
+            )
+
+            data = {
+                'status': 'success',
+                'user_id': user_id,
+                'count': len(queue),
+                'data': [{
+                    'id': req.id,
+                    'name': req.name,
+                    'equipment': {
+                        'id': req.equipment_id.id,
+                        'name': req.equipment_id.name,
+                        'location': req.equipment_id.location,
+                    },
+                    'state': req.state,
+                    'request_type': req.request_type,
+                    'priority': req.priority,
+                    'scheduled_date': req.scheduled_date,
                     'is_overdue': req.is_overdue,
-                } for req in requests]
+                    'queue_rank': req.queue_rank,
+                } for req in queue]
+            }
+            return self._json_response(data)
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
+    # ==================== SLA Breaches Endpoint ====================
+
+    @http.route('/api/maintenance/sla-breaches', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
+    def get_sla_breaches(self, **kwargs):
+        """
+        GET /api/maintenance/sla-breaches
+        Returns missed SLA deadlines, most recent first.
+        Query params:
+            - team_id: integer
+            - equipment_id: integer
+            - breach_type: string (response, resolution)
+            - date_from: datetime (detected on or after)
+            - limit: integer (default: 100)
+            - offset: integer (default: 0)
+        """
+        try:
+            limit = int(kwargs.get('limit', 100))
+            offset = int(kwargs.get('offset', 0))
+            breach_type = kwargs.get('breach_type')
+            if breach_type and breach_type not in ('response', 'resolution'):
+                return self._error_response('Invalid breach_type', status=400)
+
+            domain = []
+            if kwargs.get('team_id'):
+                domain.append(('team_id', '=', int(kwargs['team_id'])))
+            if kwargs.get('equipment_id'):
+                domain.append(('equipment_id', '=', int(kwargs['equipment_id'])))
+            if breach_type:
+                domain.append(('breach_type', '=', breach_type))
+            if kwargs.get('date_from'):
+                try:
+                    domain.append(('breach_date', '>=', fields.Datetime.to_datetime(kwargs['date_from'])))
+                except ValueError:
+                    return self._error_response('Invalid date format', status=400)
+
+            Breach = request.env['gear.sla.breach'].sudo()
+            breaches = Breach.search(domain, limit=limit, offset=offset)
+
+            data = {
+                'status': 'success',
+                'total_count': Breach.search_count(domain),
+                'limit': limit,
+                'offset': offset,
+                'data': [{
+                    'id': breach.id,
+                    'request': {
+                        'id': breach.request_id.id,
+                        'name': breach.request_name,
+                    },
+                    'equipment': {
+                        'id': breach.equipment_id.id,
+                        'name': breach.equipment_id.name,
+                    } if breach.equipment_id else None,
+                    'team': {
+                        'id': breach.team_id.id,
+                        'name': breach.team_id.name,
+                    } if breach.team_id else None,
+                    'policy': {
+                        'id': breach.policy_id.id,
+                        'name': breach.policy_id.name,
+                    } if breach.policy_id else None,
+                    'breach_type': breach.breach_type,
+                    'priority': breach.priority,
+                    'deadline': breach.deadline,
+                    'breach_date': breach.breach_date,
+                } for breach in breaches]
             }
             return self._json_response(data)
 
@@ -310,6 +632,7 @@ class GearGuardAPI(http.Controller):
     # ==================== Similar Issues Endpoint (ML) ====================
 
     @http.route('/api/maintenance/similar-issues', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
     def get_similar_issues(self, **kwargs):
         """
         GET /api/maintenance/similar-issues?q=<query>
@@ -327,8 +650,8 @@ class GearGuardAPI(http.Controller):
             if not query:
                 return self._error_response('Query parameter "q" is required', status=400)
 
-            # Use the model's find_similar_issues method
-            similar_issues = request.env['gear.maintenance.request'].sudo().find_similar_issues(
+            # TF-IDF on the bounded pool, keyword search when it is busy or too slow
+            similar_issues, method = request.env['gear.maintenance.request'].sudo()._search_similar_issues(
                 query=query,
                 limit=limit
             )
@@ -336,6 +659,7 @@ class GearGuardAPI(http.Controller):
             data = {
                 'status': 'success',
                 'query': query,
+                'method': method,
                 'count': len(similar_issues),
                 'data': similar_issues
             }
@@ -344,9 +668,39 @@ class GearGuardAPI(http.Controller):
         except Exception as e:
             return self._error_response(str(e), status=500)
 
+    @http.route('/api/maintenance/similarity-metrics', type='http', auth='user', methods=['GET'], csrf=False)
+    def get_similarity_metrics(self, **kwargs):
+        """
+        GET /api/maintenance/similarity-metrics
+        Returns the similarity pool and result cache counters (hit ratio included)
+        of the worker process serving the call.
+        """
+        try:
+            MaintRequest = request.env['gear.maintenance.request']
+            ICP = request.env['ir.config_parameter'].sudo()
+            pool = ml_utils.get_similarity_pool(
+                max_workers=int(ICP.get_param(MaintRequest._SIMILARITY_POOL_PARAM, 2)),
+                queue_depth=int(ICP.get_param(MaintRequest._SIMILARITY_QUEUE_PARAM, 8)),
+            )
+            metrics = pool.metrics()
+            metrics['timeout_ms'] = int(ICP.get_param(MaintRequest._SIMILARITY_TIMEOUT_PARAM, 2000))
+            metrics['ml_available'] = ml_utils.ML_AVAILABLE
+            metrics['cache'] = MaintRequest._get_similarity_cache().metrics()
+            metrics['cache']['corpus_version'] = MaintRequest._get_similarity_version()
+
+            data = {
+                'status': 'success',
+                'data': metrics,
+            }
+            return self._json_response(data)
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
     # ==================== Maintenance Teams Endpoint ====================
 
     @http.route('/api/maintenance-teams', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
     def get_maintenance_teams(self, **kwargs):
         """
         GET /api/maintenance-teams
@@ -379,6 +733,7 @@ class GearGuardAPI(http.Controller):
     # ==================== Statistics Endpoint ====================
 
     @http.route('/api/maintenance/stats', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
     def get_maintenance_stats(self, **kwargs):
         """
         GET /api/maintenance/stats
@@ -412,3 +767,374 @@ class GearGuardAPI(http.Controller):
 
         except Exception as e:
             return self._error_response(str(e), status=500)
+
+    # ==================== Trends Endpoint ====================
+
+    @http.route('/api/maintenance/trends', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
+    def get_maintenance_trends(self, **kwargs):
+        """
+        GET /api/maintenance/trends
+        Returns maintenance KPIs per period, read from the daily snapshot table.
+        Query params:
+            - date_from: date (YYYY-MM-DD)
+            - date_to: date (YYYY-MM-DD)
+            - interval: day, week, month, quarter or year (default: month)
+            - team_id: integer
+            - category_id: integer (includes subcategories)
+        """
+        try:
+            interval = kwargs.get('interval', 'month')
+            if interval not in request.env['gear.maintenance.snapshot']._TREND_INTERVALS:
+                return self._error_response('Invalid interval', status=400)
+
+            trend = request.env['gear.maintenance.snapshot'].sudo().get_trend(
+                date_from=kwargs.get('date_from'),
+                date_to=kwargs.get('date_to'),
+                interval=interval,
+                team_id=kwargs.get('team_id'),
+                category_id=kwargs.get('category_id'),
+            )
+
+            data = {
+                'status': 'success',
+                'interval': interval,
+                'count': len(trend),
+                'data': trend,
+            }
+            return self._json_response(data)
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
+    # ==================== Reliability Endpoint ====================
+
+    @http.route('/api/maintenance/reliability', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
+    def get_reliability(self, **kwargs):
+        """
+        GET /api/maintenance/reliability
+        Returns MTTR / MTBF metrics per equipment, team or category.
+        Query params:
+            - group_by: equipment, team or category (default: equipment)
+            - order: mtbf_hours, mttr_hours, failure_count or last_failure_date (default: mtbf_hours)
+            - descending: boolean (default: false)
+            - team_id: integer
+            - category_id: integer (includes subcategories)
+            - min_failures: integer (default: 0)
+            - limit: integer (default: 50)
+            - offset: integer (default: 0)
+        """
+        try:
+            Reliability = request.env['gear.equipment.reliability'].sudo()
+            group_by = kwargs.get('group_by', 'equipment')
+            order = kwargs.get('order', 'mtbf_hours')
+            if group_by not in Reliability._GROUP_FIELDS:
+                return self._error_response('Invalid group_by', status=400)
+            if order not in Reliability._SORT_FIELDS:
+                return self._error_response('Invalid order', status=400)
+
+            limit = int(kwargs.get('limit', 50))
+            offset = int(kwargs.get('offset', 0))
+            stats = Reliability.get_reliability_stats(
+                group_by=group_by,
+                order=order,
+                descending=kwargs.get('descending', 'false').lower() == 'true',
+                limit=limit,
+                offset=offset,
+                team_id=kwargs.get('team_id'),
+                category_id=kwargs.get('category_id'),
+                min_failures=int(kwargs.get('min_failures', 0)),
+            )
+
+            data = {
+                'status': 'success',
+                'group_by': group_by,
+                'limit': limit,
+                'offset': offset,
+                'count': len(stats),
+                'data': stats,
+            }
+            return self._json_response(data)
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
+    # ==================== Dwell Times Endpoint ====================
+
+    @http.route('/api/maintenance/dwell-times', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
+    def get_dwell_times(self, **kwargs):
+        """
+        GET /api/maintenance/dwell-times
+        Returns how long requests stayed in each state, from the state
+        transition log.
+        Query params:
+            - group_by: team or equipment (default: states only)
+            - date_from: datetime (stays ended on or after)
+            - date_to: datetime (stays ended on or before)
+            - team_id: integer
+            - equipment_id: integer
+        """
+        try:
+            Transition = request.env['gear.maintenance.request.transition'].sudo()
+            group_by = kwargs.get('group_by') or None
+            if group_by and group_by not in Transition._GROUP_FIELDS:
+                return self._error_response('Invalid group_by', status=400)
+            try:
+                date_from = fields.Datetime.to_datetime(kwargs['date_from']) if kwargs.get('date_from') else None
+                date_to = fields.Datetime.to_datetime(kwargs['date_to']) if kwargs.get('date_to') else None
+            except ValueError:
+                return self._error_response('Invalid date format', status=400)
+
+            stats = Transition.get_dwell_stats(
+                group_by=group_by,
+                date_from=date_from,
+                date_to=date_to,
+                team_id=kwargs.get('team_id'),
+                equipment_id=kwargs.get('equipment_id'),
+            )
+
+            data = {
+                'status': 'success',
+                'group_by': group_by,
+                'count': len(stats),
+                'data': stats,
+            }
+            return self._json_response(data)
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
+    # ==================== Capacity Endpoint ====================
+
+    @http.route('/api/maintenance/capacity', type='http', auth='user', methods=['GET'], csrf=False)
+    @replica.read_replica
+    def get_maintenance_capacity(self, **kwargs):
+        """
+        GET /api/maintenance/capacity?start=<date>&end=<date>
+        Returns scheduled load (request count and summed duration_hours)
+        per day or per hour within the window.
+        Query params:
+            - start: date or datetime, inclusive (required)
+            - end: date or datetime, exclusive (required)
+            - interval: day or hour (default: day)
+            - team_id: integer
+            - assigned_user_id: integer
+            - tz: timezone name for the window and buckets (default: UTC)
+            - by_technician: boolean, split buckets per technician (default: false)
+        """
+        try:
+            start = kwargs.get('start')
+            end = kwargs.get('end')
+            if not start or not end:
+                return self._error_response('Query parameters "start" and "end" are required', status=400)
+
+            MaintRequest = request.env['gear.maintenance.request'].sudo()
+            interval = kwargs.get('interval', 'day')
+            if interval not in MaintRequest._CAPACITY_INTERVALS:
+                return self._error_response('Invalid interval', status=400)
+
+            try:
+                buckets = MaintRequest.get_capacity(
+                    start=start,
+                    end=end,
+                    interval=interval,
+                    team_id=kwargs.get('team_id'),
+                    user_id=kwargs.get('assigned_user_id'),
+                    tz=kwargs.get('tz'),
+                    by_technician=kwargs.get('by_technician', 'false').lower() == 'true',
+                )
+            except (ValueError, pytz.UnknownTimeZoneError) as e:
+                return self._error_response(str(e), status=400)
+
+            data = {
+                'status': 'success',
+                'interval': interval,
+                'count': len(buckets),
+                'total_requests': sum(bucket['count'] for bucket in buckets),
+                'total_hours': sum(bucket['duration_hours'] for bucket in buckets),
+                'data': buckets,
+            }
+            return self._json_response(data)
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
+    # ==================== Change Feed Endpoint ====================
+
+    @http.route('/api/changes/<string:feed>', type='http', auth='user', methods=['GET'], csrf=False)
+    def get_changes(self, feed, **kwargs):
+        """
+        GET /api/changes/<feed>
+        Returns records created, updated, archived or deleted after a cursor.
+        Feeds: equipment, requests, teams
+        Query params:
+            - cursor: string (next_cursor of the previous page; omit for a full sync)
+            - limit: integer (default: 500, max: 5000)
+        """
+        try:
+            try:
+                page = request.env['gear.change.tombstone'].sudo().get_changes(
+                    feed,
+                    cursor=kwargs.get('cursor'),
+                    limit=int(kwargs.get('limit', 500)),
+                )
+            except ValueError as e:
+                return self._error_response(str(e), status=400)
+
+            data = {
+                'status': 'success',
+                'feed': feed,
+                'count': len(page['changes']),
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more'],
+                'data': page['changes'],
+            }
+            return self._json_response(data)
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
+    # ==================== Offline Bundle Endpoint ====================
+
+    @http.route('/api/offline-bundle/<int:team_id>', type='http', auth='user', methods=['GET'], csrf=False)
+    def get_offline_bundle(self, team_id, **kwargs):
+        """
+        GET /api/offline-bundle/<team_id>
+        Returns the prebuilt offline snapshot of a maintenance team
+        (application/octet-stream, layout in gear.offline.bundle).
+        Send the previous ETag as If-None-Match to get 304 when unchanged.
+        """
+        try:
+            team = request.env['gear.maintenance.team'].sudo().browse(team_id)
+            if not team.exists():
+                return self._error_response('Team not found', status=404)
+
+            version, raw = request.env['gear.offline.bundle'].get_bundle(team)
+            headers = [('ETag', '"%s"' % version), ('Cache-Control', 'private, no-cache')]
+            if version in request.httprequest.if_none_match:
+                return Response(status=304, headers=headers)
+            headers.append((
+                'Content-Disposition', 'attachment; filename="gearguard_team_%s_%s.bin"' % (team.id, version),
+            ))
+            return Response(raw, status=200, headers=headers, content_type='application/octet-stream')
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
+    # ==================== Read Replica Endpoint ====================
+
+    @http.route('/api/maintenance/replica-status', type='http', auth='user', methods=['GET'], csrf=False)
+    def get_replica_status(self, **kwargs):
+        """
+        GET /api/maintenance/replica-status
+        Returns read-replica routing counters of the worker process serving the call.
+        """
+        try:
+            data = {
+                'status': 'success',
+                'enabled': tools.str2bool(
+                    request.env['ir.config_parameter'].sudo().get_param(replica.ROUTING_PARAM, 'False')
+                ),
+                'data': replica.metrics(),
+            }
+            return self._json_response(data)
+
+        except Exception as e:
+            return self._error_response(str(e), status=500)
+
+    # ==================== Batch Endpoint ====================
+
+    @classmethod
+    def _get_batch_routes(cls):
+        """URL map of the JSON GET endpoints of this controller, built once."""
+        if cls._batch_routes is None:
+            rules = []
+            for name in dir(cls):
+                if name in cls._BATCH_EXCLUDED_ENDPOINTS:
+                    continue
+                routing = getattr(getattr(cls, name), 'original_routing', None)
+                if routing and routing.get('type') == 'http' and routing.get('methods') == ['GET']:
+                    rules.extend(Rule(path, endpoint=name, methods=['GET']) for path in routing['routes'])
+            cls._batch_routes = Map(rules, strict_slashes=False)
+        return cls._batch_routes
+
+    def _run_batch_item(self, item):
+        """
+        Run one sub-request in a savepoint of the batch transaction.
+        Returns (status code, JSON body bytes).
+        """
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            return 400, serialization.dumps({'error': 'Each request needs a path'})
+        url = urlsplit(item['path'])
+        params = dict(parse_qsl(url.query))
+        if not isinstance(item.get('params', {}), dict):
+            return 400, serialization.dumps({'error': 'params must be an object'})
+        params.update({key: str(value) for key, value in item.get('params', {}).items()})
+        try:
+            endpoint, path_args = self._get_batch_routes().bind('').match(url.path, method='GET')
+        except (NotFound, MethodNotAllowed):
+            return 404, serialization.dumps({'error': 'No GET endpoint at %s' % url.path})
+        params.update(path_args)
+
+        # A failing sub-request must not abort the transaction of the others
+        savepoint = request.env.cr.savepoint()
+        try:
+            response = getattr(self, endpoint)(**params)
+        except Exception as e:
+            savepoint.close(rollback=True)
+            return 500, serialization.dumps({'error': str(e)})
+        savepoint.close(rollback=response.status_code >= 500)
+        # The body is spliced into the batch as is: anything else would corrupt it
+        if response.mimetype != 'application/json':
+            return 500, serialization.dumps({'error': 'No JSON answer from %s' % url.path})
+        return response.status_code, response.get_data()
+
+    @http.route('/api/batch', type='http', auth='user', methods=['POST'], csrf=False)
+    def batch(self, **kwargs):
+        """
+        POST /api/batch
+        Runs several GET endpoints in one HTTP call, one transaction and one
+        environment (shared record cache), e.g. for an app home screen.
+
+        JSON Body:
+        {
+            "requests": [
+                {"id": "teams", "path": "/api/maintenance-teams"},
+                {"id": "mine", "path": "/api/maintenance-requests?state=new", "params": {"limit": 20}},
+                {"id": "eq", "path": "/api/equipment/7"}
+            ]
+        }
+        Returns {"status": "success", "responses": [{"id", "status", "body"}]}
+        in request order; each sub-request has its own HTTP status code.
+        """
+        try:
+            data = json.loads(request.httprequest.get_data() or b'{}')
+        except ValueError:
+            return self._error_response('Body must be JSON', status=400)
+        items = data.get('requests') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return self._error_response('requests must be a non-empty list', status=400)
+        if len(items) > self._BATCH_MAX_REQUESTS:
+            return self._error_response(
+                'At most %d requests per batch' % self._BATCH_MAX_REQUESTS, status=400,
+            )
+
+        environ = request.httprequest.environ
+        environ[self._BATCH_ENVIRON_KEY] = True
+        try:
+            parts = []
+            for index, item in enumerate(items):
+                status, body = self._run_batch_item(item)
+                item_id = item.get('id', index) if isinstance(item, dict) else index
+                # Sub-bodies are already JSON: splice them in instead of re-encoding
+                parts.append(b'{"id":%s,"status":%d,"body":%s}' % (serialization.dumps(item_id), status, body))
+        finally:
+            environ.pop(self._BATCH_ENVIRON_KEY, None)
+
+        body, headers = serialization.compress_response(
+            b'{"status":"success","responses":[%s]}' % b','.join(parts),
+            request.httprequest.headers.get('Accept-Encoding'),
+        )
+        return Response(body, status=200, headers=headers, content_type='application/json')
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Read-replica routing for the read-only GearGuard API endpoints.
+
+The replica is configured in odoo.conf, with the option names Odoo uses
+from version 18 on:
+
+    db_replica_host = 10.0.0.12
+    db_replica_port = 5433
+
+Routing is switched on with the gear_guard.replica_routing system
+parameter; gear_guard.replica_max_lag_seconds (default 5) bounds the
+accepted replication lag. Whenever the replica is not configured, not
+reachable, too far behind or fails the handler, the request is served
+by the primary as usual. The freshness check reads pg_stat_wal_receiver,
+which needs the pg_read_all_stats role for the database user.
+"""
+
+import functools
+import logging
+import threading
+import time
+
+from odoo import api, sql_db, tools
+from odoo.http import request
+
+_logger = logging.getLogger(__name__)
+
+ROUTING_PARAM = 'gear_guard.replica_routing'
+MAX_LAG_PARAM = 'gear_guard.replica_max_lag_seconds'
+# WSGI environ flag: the request is already running on the replica
+_ENVIRON_KEY = 'gear_guard.replica'
+# Batches keep all their sub-requests in the one primary transaction
+_BATCH_ENVIRON_KEY = 'gear_guard.batch'
+# After a connection failure the replica is left alone for this long
+_RETRY_AFTER_SECONDS = 30
+# A WAL receiver silent for longer is considered stalled (the primary's
+# wal_sender_timeout keepalives arrive well within it)
+_RECEIVER_TIMEOUT_SECONDS = 60
+
+_pool = None
+_pool_lock = threading.Lock()
+_down_until = 0.0
+_stats = {'replica': 0, 'fallback_unavailable': 0, 'fallback_lag': 0, 'fallback_error': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def metrics():
+    """Routing counters of this worker process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['configured'] = bool(tools.config.get('db_replica_host'))
+    stats['down'] = _down_until > time.monotonic()
+    return stats
+
+
+def _connect(dbname):
+    """Connection to the replica of dbname, or None when no replica is configured."""
+    global _pool
+    host = tools.config.get('db_replica_host')
+    if not host:
+        return None
+    _db_name, info = sql_db.connection_info_for(dbname)
+    info = dict(info, host=host)
+    if tools.config.get('db_replica_port'):
+        info['port'] = int(tools.config['db_replica_port'])
+    with _pool_lock:
+        if _pool is None:
+            _pool = sql_db.ConnectionPool(int(tools.config['db_maxconn']))
+    return sql_db.Connection(_pool, dbname, info)
+
+
+def _replication_lag(cr):
+    """
+    Seconds the replica is behind, 0 when caught up, None when unknown.
+    Having replayed everything received only counts as caught up while the
+    WAL receiver is streaming and heard from the primary recently; a
+    stalled or disconnected receiver makes the lag unknown.
+    """
+    cr.execute("""
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN NOT EXISTS (
+                SELECT 1 FROM pg_stat_wal_receiver
+                WHERE status = 'streaming'
+                  AND last_msg_receipt_time > now() - make_interval(secs => %s)
+            ) THEN NULL
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        END
+    """, [_RECEIVER_TIMEOUT_SECONDS])
+    lag = cr.fetchone()[0]
+    return None if lag is None else float(lag)
+
+
+def _open_replica_cursor(env):
+    """
+    Read-only cursor on a replica that is within the staleness bound,
+    or None when the request must stay on the primary.
+    """
+    global _down_until
+    if _down_until > time.monotonic():
+        _count('fallback_unavailable')
+        return None
+    max_lag = float(env['ir.config_parameter'].sudo().get_param(MAX_LAG_PARAM, 5))
+    try:
+        connection = _connect(env.cr.dbname)
+        if connection is None:
+            return None
+        cr = connection.cursor()
+    except Exception as e:
+        _logger.warning("Read replica unavailable, using the primary for %ss: %s", _RETRY_AFTER_SECONDS, e)
+        _down_until = time.monotonic() + _RETRY_AFTER_SECONDS
+        _count('fallback_unavailable')
+        return None
+    try:
+        # Nothing routed here may write, even if the replica is a writable server
+        cr.execute("SET TRANSACTION READ ONLY")
+        lag = _replication_lag(cr)
+    except Exception as e:
+        _logger.warning("Read replica check failed: %s", e)
+        cr.close()
+        _count('fallback_unavailable')
+        return None
+    if lag is None or lag > max_lag:
+        cr.close()
+        _count('fallback_lag')
+        return None
+    return cr
+
+
+def read_replica(method):
+    """
+    Serve a read-only controller method from the read replica when routing
+    is enabled and the replica is fresh enough. Responses with a server
+    error status are retried on the primary.
+    Place it below @http.route.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        environ = request.httprequest.environ
+        primary_env = request.env
+        if environ.get(_ENVIRON_KEY) or environ.get(_BATCH_ENVIRON_KEY) or not tools.str2bool(
+            primary_env['ir.config_parameter'].sudo().get_param(ROUTING_PARAM, 'False')
+        ):
+            return method(self, *args, **kwargs)
+
+        cr = _open_replica_cursor(primary_env)
+        if cr is None:
+            return method(self, *args, **kwargs)
+        environ[_ENVIRON_KEY] = True
+        request.env = api.Environment(cr, primary_env.uid, primary_env.context, su=primary_env.su)
+        try:
+            response = method(self, *args, **kwargs)
+        except Exception as e:
+            _logger.warning("Read replica request failed, retrying on the primary: %s", e)
+            response = None
+        finally:
+            request.env = primary_env
+            environ.pop(_ENVIRON_KEY, None)
+            cr.rollback()
+            cr.close()
+        if response is None or response.status_code >= 500:
+            _count('fallback_error')
+            return method(self, *args, **kwargs)
+        _count('replica')
+        return response
+    return wrapper
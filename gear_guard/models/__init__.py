@@ -2,5 +2,20 @@
 
 from . import equipment_category
 from . import maintenance_team
+from . import maintenance_tag
 from . import equipment
 from . import maintenance_request
+from . import maintenance_request_archive
+from . import maintenance_request_transition
+from . import maintenance_schedule
+from . import maintenance_snapshot
+from . import equipment_reliability
+from . import webhook_endpoint
+from . import webhook_event
+from . import change_tombstone
+from . import tracking_compaction
+from . import equipment_import
+from . import equipment_lifecycle
+from . import offline_bundle
+from . import sla_policy
+from . import sla_breach
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+from odoo import models, fields, api, tools
+
+
+class GearChangeTombstone(models.Model):
+    """
+    Deleted records of the change feed. Updates and archivals are read
+    from the source tables themselves; only deletions need a trace.
+    """
+    _name = 'gear.change.tombstone'
+    _description = 'Change Feed Tombstone'
+    _order = 'change_date, id'
+
+    res_model = fields.Char(
+        string='Model',
+        required=True,
+        readonly=True,
+    )
+    res_id = fields.Integer(
+        string='Record ID',
+        required=True,
+        readonly=True,
+    )
+    change_date = fields.Datetime(
+        string='Deleted On',
+        required=True,
+        readonly=True,
+        default=fields.Datetime.now,
+    )
+
+    _LAG_PARAM = 'gear_guard.change_feed_lag_seconds'
+    _RETENTION_PARAM = 'gear_guard.tombstone_retention_days'
+    _MAX_LIMIT = 5000
+    _FEEDS = {
+        'equipment': ('gear.equipment', [
+            'name', 'serial_number', 'category_id', 'department_id', 'maintenance_team_id',
+            'default_technician_id', 'location', 'is_scrapped', 'purchase_date',
+            'warranty_expiry_date', 'end_of_life_date', 'usage_reading', 'active',
+        ]),
+        'requests': ('gear.maintenance.request', [
+            'name', 'equipment_id', 'team_id', 'assigned_user_id', 'state', 'request_type',
+            'priority', 'scheduled_date', 'completion_date', 'duration_hours', 'is_overdue',
+            'schedule_id', 'active',
+        ]),
+        'teams': ('gear.maintenance.team', ['name', 'description', 'member_ids', 'active']),
+    }
+    # Rows sharing a timestamp sort updates before deletions
+    _KIND_RECORD = 0
+    _KIND_TOMBSTONE = 1
+    _START_CURSOR = (datetime(1970, 1, 1), -1, 0)
+
+    def init(self):
+        tools.create_index(
+            self.env.cr, 'gear_change_tombstone_feed_index', self._table, ['res_model', 'change_date', 'id'],
+        )
+        # Keyset pagination indexes of the feed sources (requests already have one)
+        for model_name in ('gear.equipment', 'gear.maintenance.team'):
+            table = self.env[model_name]._table
+            tools.create_index(self.env.cr, f'{table}_write_date_id_index', table, ['write_date', 'id'])
+
+    @api.model
+    def _record_deletion(self, records):
+        """Called from unlink() of the feed models, in the deleting transaction."""
+        # Requests moved to cold storage are history, not deletions
+        if records and not self.env.context.get('gear_cold_archive'):
+            self.sudo().create([{'res_model': records._name, 'res_id': rid} for rid in records.ids])
+
+    @api.model
+    def _encode_cursor(self, position):
+        change_date, kind, res_id = position
+        raw = json.dumps([fields.Datetime.to_string(change_date), kind, res_id])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @api.model
+    def _decode_cursor(self, cursor):
+        if not cursor:
+            return self._START_CURSOR
+        try:
+            change_date, kind, res_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return fields.Datetime.to_datetime(change_date), int(kind), int(res_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    @api.model
+    def get_changes(self, feed, cursor=None, limit=500):
+        """
+        Return the changes of a feed after the cursor, oldest first.
+
+        Positions are (write_date, kind, id) keys, so a page boundary never
+        splits or repeats records. Rows younger than the settle lag are held
+        back: write_date is the transaction start, and a transaction still
+        running could otherwise commit rows behind an already served cursor.
+
+        Returns:
+            Dict with 'changes' (op is upsert, archived or deleted),
+            'next_cursor' and 'has_more'
+        """
+        if feed not in self._FEEDS:
+            raise ValueError("feed must be one of: %s" % ', '.join(self._FEEDS))
+        limit = min(max(int(limit), 1), self._MAX_LIMIT)
+        model_name, field_names = self._FEEDS[feed]
+        Model = self.env[model_name].sudo().with_context(active_test=False)
+        start_date, start_kind, start_id = self._decode_cursor(cursor)
+        lag = int(self.env['ir.config_parameter'].sudo().get_param(self._LAG_PARAM, 30))
+        horizon = fields.Datetime.now() - timedelta(seconds=lag)
+
+        if start_kind < self._KIND_RECORD:
+            record_cond, record_params = "write_date >= %s", [start_date]
+        elif start_kind == self._KIND_RECORD:
+            record_cond, record_params = "(write_date, id) > (%s, %s)", [start_date, start_id]
+        else:
+            record_cond, record_params = "write_date > %s", [start_date]
+        if start_kind < self._KIND_TOMBSTONE:
+            tomb_cond, tomb_params = "change_date >= %s", [start_date]
+        else:
+            tomb_cond, tomb_params = "(change_date, id) > (%s, %s)", [start_date, start_id]
+
+        Model.flush_model()
+        self.flush_model()
+        self.env.cr.execute(f"""
+            SELECT * FROM (
+                (SELECT write_date, {self._KIND_RECORD}, id, id
+                 FROM {Model._table}
+                 WHERE {record_cond} AND write_date < %s
+                 ORDER BY write_date, id
+                 LIMIT %s)
+                UNION ALL
+                (SELECT change_date, {self._KIND_TOMBSTONE}, id, res_id
+                 FROM gear_change_tombstone
+                 WHERE res_model = %s AND {tomb_cond} AND change_date < %s
+                 ORDER BY change_date, id
+                 LIMIT %s)
+            ) changes
+            ORDER BY 1, 2, 3
+            LIMIT %s
+        """, record_params + [horizon, limit + 1, model_name] + tomb_params + [horizon, limit + 1, limit + 1])
+        rows = self.env.cr.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        record_ids = [row[3] for row in rows if row[1] == self._KIND_RECORD]
+        values = {vals['id']: vals for vals in Model.browse(record_ids).read(field_names)}
+        changes = []
+        for change_date, kind, _key, res_id in rows:
+            if kind == self._KIND_TOMBSTONE:
+                changes.append({'op': 'deleted', 'id': res_id, 'changed_at': change_date, 'record': None})
+                continue
+            vals = values[res_id]
+            for name, value in vals.items():
+                # Many2one as a bare id, the warehouse resolves names itself
+                if isinstance(value, tuple):
+                    vals[name] = value[0]
+            changes.append({
+                'op': 'upsert' if vals['active'] else 'archived',
+                'id': res_id,
+                'changed_at': change_date,
+                'record': vals,
+            })
+
+        next_position = (rows[-1][0], rows[-1][1], rows[-1][2]) if rows else (start_date, start_kind, start_id)
+        return {
+            'changes': changes,
+            'next_cursor': self._encode_cursor(next_position),
+            'has_more': has_more,
+        }
+
+    @api.model
+    def cron_purge_tombstones(self):
+        """Cron job to drop tombstones older than the retention window."""
+        days = int(self.env['ir.config_parameter'].sudo().get_param(self._RETENTION_PARAM, 90))
+        self.env.cr.execute(
+            "DELETE FROM gear_change_tombstone WHERE change_date < %s",
+            [fields.Datetime.now() - timedelta(days=days)],
+        )
+        return True
@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
 
+import logging
+import time
+from datetime import timedelta
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from ..utils import ml_utils
+
+_logger = logging.getLogger(__name__)
+
 
 class GearEquipment(models.Model):
     _name = 'gear.equipment'
@@ -17,6 +25,7 @@ class GearEquipment(models.Model):
     )
     serial_number = fields.Char(
         string='Serial Number',
+        index=True,
         tracking=True,
     )
     category_id = fields.Many2one(
@@ -58,6 +67,27 @@ class GearEquipment(models.Model):
     )
     warranty_expiry_date = fields.Date(
         string='Warranty Expiry Date',
+        index=True,
+    )
+    end_of_life_date = fields.Date(
+        string='End of Life Date',
+        index=True,
+        help="Date the manufacturer stops supporting the asset.",
+    )
+    # Smallest alert window (days) already sent for the current dates, 0 when none
+    warranty_alert_days = fields.Integer(
+        string='Warranty Alert Sent (Days)',
+        readonly=True,
+        copy=False,
+    )
+    end_of_life_alert_days = fields.Integer(
+        string='End of Life Alert Sent (Days)',
+        readonly=True,
+        copy=False,
+    )
+    usage_reading = fields.Float(
+        string='Usage Meter',
+        help="Current usage reading (hours, cycles, km...) used by usage-based schedules.",
     )
     notes = fields.Text(
         string='Notes',
@@ -77,6 +107,50 @@ class GearEquipment(models.Model):
         compute='_compute_maintenance_request_count',
     )
 
+    # Reliability metrics (see gear.equipment.reliability)
+    failure_count = fields.Integer(
+        string='Failures',
+        compute='_compute_reliability',
+    )
+    mttr_hours = fields.Float(
+        string='MTTR (Hours)',
+        compute='_compute_reliability',
+    )
+    mtbf_hours = fields.Float(
+        string='MTBF (Hours)',
+        compute='_compute_reliability',
+    )
+    risk_score = fields.Float(
+        string='Risk Score',
+        readonly=True,
+        index=True,
+        group_operator='avg',
+        help="Nightly 0-100 score from recent corrective requests, overdue preventive work, "
+             "asset age and warranty status. Higher means more likely to need attention.",
+    )
+    down_since = fields.Datetime(
+        string='Down Since',
+        readonly=True,
+        copy=False,
+        index='btree_not_null',
+        help="Start of the current downtime: set while a corrective request is open "
+             "or any request is in progress.",
+    )
+    downtime_hours = fields.Float(
+        string='Downtime (Hours)',
+        readonly=True,
+        copy=False,
+        group_operator='sum',
+        help="Total of the finished downtimes; the current one is added when it ends.",
+    )
+
+    _RISK_FAILURE_WINDOW_DAYS = 365
+    _RISK_LATE_WINDOW_DAYS = 90
+    # Requests that keep their equipment out of service (SQL, alias r)
+    _DOWN_REQUEST_CONDITION = (
+        "r.active AND (r.state = 'in_progress' OR (r.state = 'new' AND r.request_type = 'corrective'))"
+    )
+
     @api.depends('maintenance_team_id', 'maintenance_team_id.member_ids')
     def _compute_technician_domain_ids(self):
         for record in self:
@@ -95,6 +169,149 @@ class GearEquipment(models.Model):
                 lambda r: r.state in ['new', 'in_progress']
             ))
 
+    def _compute_reliability(self):
+        reliability = {
+            rel.equipment_id.id: rel
+            for rel in self.env['gear.equipment.reliability'].sudo().search([
+                ('equipment_id', 'in', self.ids),
+            ])
+        }
+        for record in self:
+            rel = reliability.get(record.id)
+            record.failure_count = rel.failure_count if rel else 0
+            record.mttr_hours = rel.mttr_hours if rel else 0.0
+            record.mtbf_hours = rel.mtbf_hours if rel else 0.0
+
+    @api.model
+    def compute_risk_scores(self):
+        """
+        Score the whole active fleet: one aggregate query aligned on
+        equipment ids, one vectorized scoring pass, one bulk UPDATE.
+        Scrapped and archived equipment drop to 0.
+
+        Returns:
+            Number of equipment whose stored score changed
+        """
+        started = time.monotonic()
+        today = fields.Date.context_today(self)
+        now = fields.Datetime.now()
+        self.env['gear.maintenance.request'].flush_model()
+        self.env['gear.maintenance.request.archive'].flush_model()
+        self.flush_model()
+        history = self.env['gear.maintenance.request.archive']._request_history_query()
+        cr = self.env.cr
+        cr.execute(f"""
+            SELECT e.id,
+                   COALESCE(f.failures, 0),
+                   COALESCE(o.overdue, 0),
+                   %(today)s - e.purchase_date,
+                   e.warranty_expiry_date - %(today)s
+            FROM gear_equipment e
+            LEFT JOIN (
+                SELECT equipment_id, COUNT(*) AS failures
+                FROM {history} r
+                WHERE request_type = 'corrective'
+                  AND COALESCE(scheduled_date, create_date) >= %(failure_since)s
+                GROUP BY equipment_id
+            ) f ON f.equipment_id = e.id
+            LEFT JOIN (
+                SELECT equipment_id, COUNT(*) AS overdue
+                FROM gear_maintenance_request
+                WHERE request_type = 'preventive' AND active
+                  AND ((state IN ('new', 'in_progress') AND scheduled_date < %(now)s)
+                       OR (state = 'repaired' AND completion_date > scheduled_date
+                           AND completion_date >= %(late_since)s))
+                GROUP BY equipment_id
+            ) o ON o.equipment_id = e.id
+            WHERE e.active AND NOT COALESCE(e.is_scrapped, FALSE)
+            ORDER BY e.id
+        """, {
+            'today': today,
+            'now': now,
+            'failure_since': now - timedelta(days=self._RISK_FAILURE_WINDOW_DAYS),
+            'late_since': now - timedelta(days=self._RISK_LATE_WINDOW_DAYS),
+        })
+        rows = cr.fetchall()
+        nan = float('nan')
+        scores = ml_utils.score_fleet_risk(
+            [row[1] for row in rows],
+            [row[2] for row in rows],
+            [nan if row[3] is None else row[3] for row in rows],
+            [nan if row[4] is None else row[4] for row in rows],
+        )
+
+        # Only rows whose score moved are rewritten; write_date is left alone
+        # so the nightly run does not flood the change feed
+        cr.execute("""
+            UPDATE gear_equipment e SET risk_score = s.score
+            FROM unnest(%s::int[], %s::float8[]) AS s(id, score)
+            WHERE e.id = s.id AND e.risk_score IS DISTINCT FROM s.score
+        """, [[row[0] for row in rows], [float(score) for score in scores]])
+        changed = cr.rowcount
+        cr.execute("""
+            UPDATE gear_equipment SET risk_score = 0
+            WHERE (NOT active OR is_scrapped) AND risk_score <> 0
+        """)
+        changed += cr.rowcount
+        self.invalidate_model(['risk_score'])
+        _logger.info(
+            "Risk scoring: %d equipment scored, %d changed in %.1fs",
+            len(rows), changed, time.monotonic() - started,
+        )
+        return changed
+
+    def _sync_downtime(self, now=None):
+        """
+        Start or end the downtime of these equipment after their requests
+        changed: a downtime starts with the first request keeping the
+        equipment out of service and ends with the last one, adding its
+        length to downtime_hours. Equipment whose status did not change is
+        left untouched.
+        """
+        if not self:
+            return
+        now = now or fields.Datetime.now()
+        self.env['gear.maintenance.request'].flush_model(['equipment_id', 'state', 'request_type', 'active'])
+        self.flush_model(['down_since', 'downtime_hours'])
+        # The open-requests partial index serves the EXISTS lookups
+        self.env.cr.execute(f"""
+            UPDATE gear_equipment e
+            SET down_since = CASE WHEN d.is_down THEN %(now)s END,
+                downtime_hours = COALESCE(e.downtime_hours, 0) + CASE WHEN d.is_down THEN 0
+                    ELSE GREATEST(EXTRACT(EPOCH FROM %(now)s::timestamp - e.down_since), 0) / 3600.0 END
+            FROM (
+                SELECT eq.id, EXISTS (
+                    SELECT 1 FROM gear_maintenance_request r
+                    WHERE r.equipment_id = eq.id AND {self._DOWN_REQUEST_CONDITION}
+                ) AS is_down
+                FROM gear_equipment eq
+                WHERE eq.id = ANY(%(ids)s)
+            ) d
+            WHERE e.id = d.id AND d.is_down <> (e.down_since IS NOT NULL)
+        """, {'now': now, 'ids': self.ids})
+        self.invalidate_model(['down_since', 'downtime_hours'])
+
+    @api.model
+    def cron_compute_risk_scores(self):
+        """Cron job refreshing the fleet risk scores."""
+        self.compute_risk_scores()
+        return True
+
+    def write(self, vals):
+        # A new date re-arms its alerts
+        for date_field, alert_field in self.env['gear.equipment.lifecycle']._ALERTS.items():
+            if date_field in vals and alert_field not in vals:
+                vals = dict(vals, **{alert_field: 0})
+        scrapped = self.filtered(lambda e: not e.is_scrapped) if vals.get('is_scrapped') else self.browse()
+        res = super().write(vals)
+        if scrapped:
+            self.env['gear.webhook.event']._enqueue('equipment.scrapped', scrapped)
+        return res
+
+    def unlink(self):
+        self.env['gear.change.tombstone']._record_deletion(self)
+        return super().unlink()
+
     @api.onchange('maintenance_team_id')
     def _onchange_maintenance_team_id(self):
         if self.maintenance_team_id:
@@ -6,12 +6,21 @@ from odoo import models, fields, api, _
 class GearEquipmentCategory(models.Model):
     _name = 'gear.equipment.category'
     _description = 'Equipment Category'
-    _order = 'name'
+    _parent_name = 'parent_id'
+    _parent_store = True
+    _rec_name = 'complete_name'
+    _order = 'complete_name'
 
     name = fields.Char(
         string='Category Name',
         required=True,
     )
+    complete_name = fields.Char(
+        string='Full Name',
+        compute='_compute_complete_name',
+        recursive=True,
+        store=True,
+    )
     code = fields.Char(
         string='Code',
     )
@@ -24,6 +33,10 @@ class GearEquipmentCategory(models.Model):
         index=True,
         ondelete='cascade',
     )
+    parent_path = fields.Char(
+        index=True,
+        unaccent=False,
+    )
     child_ids = fields.One2many(
         comodel_name='gear.equipment.category',
         inverse_name='parent_id',
@@ -33,6 +46,14 @@ class GearEquipmentCategory(models.Model):
         string='Equipment Count',
         compute='_compute_equipment_count',
     )
+    subtree_equipment_count = fields.Integer(
+        string='Equipment (incl. Subcategories)',
+        compute='_compute_subtree_counts',
+    )
+    subtree_open_request_count = fields.Integer(
+        string='Open Requests (incl. Subcategories)',
+        compute='_compute_subtree_counts',
+    )
     active = fields.Boolean(
         string='Active',
         default=True,
@@ -41,23 +62,58 @@ class GearEquipmentCategory(models.Model):
         string='Color',
     )
 
+    @api.depends('name', 'parent_id.complete_name')
+    def _compute_complete_name(self):
+        for record in self:
+            if record.parent_id:
+                record.complete_name = f"{record.parent_id.complete_name} / {record.name}"
+            else:
+                record.complete_name = record.name
+
     def _compute_equipment_count(self):
+        groups = self.env['gear.equipment'].read_group(
+            [('category_id', 'in', self.ids)], ['category_id'], ['category_id'],
+        )
+        counts = {group['category_id'][0]: group['category_id_count'] for group in groups}
+        for record in self:
+            record.equipment_count = counts.get(record.id, 0)
+
+    def _compute_subtree_counts(self):
+        """Roll up equipment and open requests over each category's subtree in one query."""
+        ids = tuple(self.ids)
+        counts = {}
+        if ids:
+            self.env['gear.equipment'].flush_model(['category_id', 'active'])
+            self.env['gear.maintenance.request'].flush_model(['equipment_category_id', 'state', 'active'])
+            self.flush_model(['parent_path'])
+            self.env.cr.execute("""
+                WITH eq AS (
+                    SELECT category_id, COUNT(*) AS n
+                    FROM gear_equipment
+                    WHERE active AND category_id IS NOT NULL
+                    GROUP BY category_id
+                ), rq AS (
+                    SELECT equipment_category_id AS category_id, COUNT(*) AS n
+                    FROM gear_maintenance_request
+                    WHERE active
+                      AND state IN ('new', 'in_progress')
+                      AND equipment_category_id IS NOT NULL
+                    GROUP BY equipment_category_id
+                )
+                SELECT root.id, COALESCE(SUM(eq.n), 0), COALESCE(SUM(rq.n), 0)
+                FROM gear_equipment_category root
+                JOIN gear_equipment_category sub
+                  ON sub.parent_path LIKE root.parent_path || '%%'
+                LEFT JOIN eq ON eq.category_id = sub.id
+                LEFT JOIN rq ON rq.category_id = sub.id
+                WHERE root.id IN %s
+                GROUP BY root.id
+            """, [ids])
+            counts = {row[0]: (row[1], row[2]) for row in self.env.cr.fetchall()}
         for record in self:
-            record.equipment_count = self.env['gear.equipment'].search_count([
-                ('category_id', '=', record.id)
-            ])
+            record.subtree_equipment_count, record.subtree_open_request_count = counts.get(record.id, (0, 0))
 
     @api.constrains('parent_id')
     def _check_parent_id(self):
         if not self._check_recursion():
             raise models.ValidationError(_('You cannot create recursive categories.'))
-
-    def name_get(self):
-        result = []
-        for record in self:
-            if record.parent_id:
-                name = f"{record.parent_id.name} / {record.name}"
-            else:
-                name = record.name
-            result.append((record.id, name))
-        return result
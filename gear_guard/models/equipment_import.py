@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import logging
+import time
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+
+_logger = logging.getLogger(__name__)
+
+
+class GearEquipmentImport(models.AbstractModel):
+    """
+    Streaming CSV importer for equipment. Rows are read one at a time,
+    references are resolved through maps loaded once per import, and
+    equipment is upserted on serial_number chunk by chunk. A bad row is
+    rejected on its own instead of failing the file.
+    """
+    _name = 'gear.equipment.import'
+    _description = 'Equipment CSV Import'
+
+    _CHUNK_SIZE = 2000
+    _MAX_REPORTED_ERRORS = 1000
+    _CHAR_COLUMNS = ('name', 'location', 'notes')
+    _DATE_COLUMNS = ('purchase_date', 'warranty_expiry_date', 'end_of_life_date')
+    _REFERENCE_COLUMNS = {
+        'category': 'category_id',
+        'maintenance_team': 'maintenance_team_id',
+        'department': 'department_id',
+        'default_technician': 'default_technician_id',
+    }
+
+    @api.model
+    def _load_reference_maps(self):
+        """Lower-cased name -> id maps of every referenced model, read with one query each."""
+        def name_map(records, *name_fields):
+            mapping = {}
+            for record in records:
+                for name_field in name_fields:
+                    if record[name_field]:
+                        mapping.setdefault(record[name_field].strip().lower(), record.id)
+            return mapping
+
+        return {
+            'category_id': name_map(
+                self.env['gear.equipment.category'].search_fetch([], ['complete_name', 'name']),
+                'complete_name', 'name',
+            ),
+            'maintenance_team_id': name_map(self.env['gear.maintenance.team'].search_fetch([], ['name']), 'name'),
+            'department_id': name_map(
+                self.env['hr.department'].search_fetch([], ['complete_name', 'name']),
+                'complete_name', 'name',
+            ),
+            'default_technician_id': name_map(
+                self.env['res.users'].search_fetch([('share', '=', False)], ['login', 'name']),
+                'login', 'name',
+            ),
+        }
+
+    @api.model
+    def _parse_row(self, row, maps):
+        """
+        Convert one CSV row into equipment values.
+        Empty cells are left out so an update never blanks existing data.
+
+        Raises:
+            ValueError: with a readable reason when the row must be rejected
+        """
+        serial = (row.get('serial_number') or '').strip()
+        if not serial:
+            raise ValueError(_('Missing serial_number'))
+        vals = {'serial_number': serial}
+        for column in self._CHAR_COLUMNS:
+            value = (row.get(column) or '').strip()
+            if value:
+                vals[column] = value
+        for column in self._DATE_COLUMNS:
+            value = (row.get(column) or '').strip()
+            if value:
+                try:
+                    vals[column] = fields.Date.to_date(value)
+                except ValueError:
+                    raise ValueError(_('Invalid date in %s: %s', column, value))
+        usage = (row.get('usage_reading') or '').strip()
+        if usage:
+            try:
+                vals['usage_reading'] = float(usage)
+            except ValueError:
+                raise ValueError(_('Invalid number in usage_reading: %s', usage))
+        for column, field_name in self._REFERENCE_COLUMNS.items():
+            value = (row.get(column) or '').strip()
+            if value:
+                ref_id = maps[field_name].get(value.lower())
+                if not ref_id:
+                    raise ValueError(_('Unknown %s: %s', column, value))
+                vals[field_name] = ref_id
+        return vals
+
+    @api.model
+    def _upsert_chunk(self, chunk):
+        """
+        Create or update one chunk of {serial_number: (line, vals)}.
+        Existing equipment (archived included) is matched with one query;
+        rows identical to the stored values are skipped, and equipment
+        needing the same changes is written together.
+
+        Returns:
+            Tuple (created, updated, unchanged, rejected) where rejected
+            lists (line, serial_number, reason) of new rows without a name
+        """
+        Equipment = self.env['gear.equipment'].with_context(
+            active_test=False,
+            tracking_disable=True,
+            mail_create_nolog=True,
+            mail_create_nosubscribe=True,
+        )
+        existing = Equipment.search_fetch(
+            [('serial_number', 'in', list(chunk))],
+            ['serial_number'] + sorted({name for _line, vals in chunk.values() for name in vals}),
+            order='id',
+        )
+        by_serial = {}
+        for equipment in existing:
+            by_serial.setdefault(equipment.serial_number, equipment)
+
+        to_create = []
+        rejected = []
+        to_write = defaultdict(list)
+        unchanged = 0
+        for serial, (line, vals) in chunk.items():
+            equipment = by_serial.get(serial)
+            if not equipment:
+                if vals.get('name'):
+                    to_create.append(vals)
+                else:
+                    rejected.append((line, serial, _('Missing name for new equipment')))
+                continue
+            changed = {
+                name: value for name, value in vals.items()
+                if (equipment[name].id if equipment._fields[name].type == 'many2one' else equipment[name]) != value
+            }
+            if changed:
+                to_write[tuple(sorted(changed.items()))].append(equipment.id)
+            else:
+                unchanged += 1
+        for changed, equipment_ids in to_write.items():
+            Equipment.browse(equipment_ids).write(dict(changed))
+        if to_create:
+            Equipment.create(to_create)
+        updated = sum(len(equipment_ids) for equipment_ids in to_write.values())
+        return len(to_create), updated, unchanged, rejected
+
+    @api.model
+    def _flush_chunk(self, chunk, result, auto_commit):
+        """Upsert a chunk in a savepoint; on failure, retry row by row to isolate the bad rows."""
+        try:
+            with self.env.cr.savepoint():
+                outcomes = [self._upsert_chunk(chunk)]
+        except Exception:
+            self.env.invalidate_all()
+            outcomes = []
+            for serial, (line, vals) in chunk.items():
+                try:
+                    with self.env.cr.savepoint():
+                        outcomes.append(self._upsert_chunk({serial: (line, vals)}))
+                except Exception as e:
+                    self.env.invalidate_all()
+                    self._reject(result, line, serial, str(e))
+        for created, updated, unchanged, rejected in outcomes:
+            result['created'] += created
+            result['updated'] += updated
+            result['unchanged'] += unchanged
+            for line, serial, reason in rejected:
+                self._reject(result, line, serial, reason)
+        if auto_commit:
+            self.env.cr.commit()
+
+    @api.model
+    def _reject(self, result, line, serial, reason):
+        result['rejected_count'] += 1
+        result['rejected'].append((line, serial, reason))
+
+    @api.model
+    def import_csv(self, stream, chunk_size=None, auto_commit=False):
+        """
+        Import equipment from a CSV byte stream, without loading it in memory.
+
+        Columns: serial_number (required), name (required for new equipment),
+        category, maintenance_team, department, default_technician (login or
+        name), location, purchase_date, warranty_expiry_date, end_of_life_date
+        (YYYY-MM-DD),
+        usage_reading, notes. Unknown columns are ignored.
+
+        Args:
+            stream: Binary file-like object
+            chunk_size: Rows upserted (and committed, with auto_commit) together
+            auto_commit: Commit after each chunk, so a failure keeps the chunks done
+
+        Returns:
+            Dict with created/updated/unchanged/rejected_count counters,
+            'rejected' as (line, serial_number, reason) tuples, 'rows' and 'seconds'
+        """
+        chunk_size = chunk_size or self._CHUNK_SIZE
+        started = time.monotonic()
+        maps = self._load_reference_maps()
+        result = {'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'rejected_count': 0, 'rejected': []}
+
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        if not reader.fieldnames or 'serial_number' not in reader.fieldnames:
+            raise ValueError(_('The file must have a header row with a serial_number column.'))
+
+        chunk = {}
+        for row in reader:
+            result['rows'] += 1
+            # Header is line 1
+            line = reader.line_num
+            try:
+                vals = self._parse_row(row, maps)
+            except ValueError as e:
+                self._reject(result, line, row.get('serial_number'), str(e))
+                continue
+            serial = vals['serial_number']
+            if serial in chunk:
+                # Later rows of the same serial number win, as in sequential upserts
+                chunk[serial][1].update(vals)
+            else:
+                chunk[serial] = (line, vals)
+            if len(chunk) >= chunk_size:
+                self._flush_chunk(chunk, result, auto_commit)
+                chunk = {}
+        if chunk:
+            self._flush_chunk(chunk, result, auto_commit)
+
+        result['seconds'] = round(time.monotonic() - started, 3)
+        _logger.info(
+            "Equipment import: %(rows)d rows, %(created)d created, %(updated)d updated, "
+            "%(unchanged)d unchanged, %(rejected_count)d rejected in %(seconds).1fs", result,
+        )
+        return result
+
+    @api.model
+    def _rejected_report(self, result):
+        """Rejected rows as a CSV file (bytes), or False when every row was imported."""
+        if not result['rejected']:
+            return False
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['line', 'serial_number', 'reason'])
+        writer.writerows(result['rejected'])
+        return output.getvalue().encode()
+
+    @api.model
+    def _save_rejected_report(self, result, filename='rejected_rows.csv'):
+        """Store the rejected-rows report as an attachment and return it."""
+        report = self._rejected_report(result)
+        if not report:
+            return self.env['ir.attachment']
+        return self.env['ir.attachment'].create({
+            'name': filename,
+            'raw': report,
+            'mimetype': 'text/csv',
+        })
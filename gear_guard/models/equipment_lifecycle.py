@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from odoo import models, fields, api, _
+
+_logger = logging.getLogger(__name__)
+
+
+class GearEquipmentLifecycle(models.AbstractModel):
+    """
+    Warranty-expiry and end-of-life reminders. Each equipment remembers the
+    smallest window it was already alerted for, so a nightly run only picks
+    up assets that crossed into a new window since the previous one.
+    """
+    _name = 'gear.equipment.lifecycle'
+    _description = 'Equipment Lifecycle Alerts'
+
+    _WINDOWS_PARAM = 'gear_guard.lifecycle_alert_days'
+    _DEFAULT_WINDOWS = '90,30,7'
+    _BATCH_SIZE = 1000
+    # Date field -> field remembering the last window alerted for it
+    _ALERTS = {
+        'warranty_expiry_date': 'warranty_alert_days',
+        'end_of_life_date': 'end_of_life_alert_days',
+    }
+    _ACTIVITY_TYPES = {
+        'warranty_expiry_date': 'gear_guard.mail_activity_type_warranty_expiry',
+        'end_of_life_date': 'gear_guard.mail_activity_type_end_of_life',
+    }
+
+    @api.model
+    def _get_windows(self):
+        """Alert windows in days, largest first."""
+        raw = self.env['ir.config_parameter'].sudo().get_param(self._WINDOWS_PARAM, self._DEFAULT_WINDOWS)
+        windows = set()
+        for part in raw.split(','):
+            try:
+                days = int(part)
+            except ValueError:
+                continue
+            if days > 0:
+                windows.add(days)
+        return sorted(windows, reverse=True)
+
+    @api.model
+    def _summary(self, date_field, days_left, date):
+        if date_field == 'warranty_expiry_date':
+            if days_left == 0:
+                return _('Warranty expires today (%s)', date)
+            return _('Warranty expires in %s days (%s)', days_left, date)
+        if days_left == 0:
+            return _('End of life today (%s)', date)
+        return _('End of life in %s days (%s)', days_left, date)
+
+    @api.model
+    def _select_crossing(self, date_field, windows, today, after_id=0):
+        """
+        Equipment whose date falls within the largest window and that
+        entered a smaller window than the one already alerted.
+        The range on the indexed date column bounds the scan.
+
+        Returns:
+            List of (id, date, window) tuples
+        """
+        alert_field = self._ALERTS[date_field]
+        self.env['gear.equipment'].flush_model([date_field, alert_field, 'active', 'is_scrapped'])
+        self.env.cr.execute(f"""
+            SELECT id, due, bucket FROM (
+                SELECT e.id, e.{date_field} AS due, e.{alert_field} AS alerted,
+                       (SELECT MIN(w) FROM unnest(%(windows)s::int[]) w
+                        WHERE e.{date_field} <= %(today)s::date + w) AS bucket
+                FROM gear_equipment e
+                WHERE e.{date_field} BETWEEN %(today)s AND %(today)s::date + %(horizon)s
+                  AND e.active AND NOT COALESCE(e.is_scrapped, FALSE)
+                  AND e.id > %(after_id)s
+            ) c
+            WHERE COALESCE(alerted, 0) = 0 OR bucket < alerted
+            ORDER BY id
+            LIMIT %(limit)s
+        """, {
+            'windows': windows,
+            'today': today,
+            'horizon': max(windows),
+            'after_id': after_id,
+            'limit': self._BATCH_SIZE,
+        })
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _alert_batch(self, date_field, rows, today):
+        """
+        Create or refresh the reminder activities of one batch, then record
+        the windows as sent. Equipment without a technician or team member
+        to remind is left for a later run.
+
+        Returns:
+            Number of equipment alerted
+        """
+        equipment = self.env['gear.equipment'].browse([row[0] for row in rows])
+        activity_type = self.env.ref(self._ACTIVITY_TYPES[date_field])
+        Activity = self.env['mail.activity'].with_context(mail_activity_quick_update=True)
+        open_activities = {
+            activity.res_id: activity
+            for activity in Activity.search([
+                ('res_model', '=', 'gear.equipment'),
+                ('res_id', 'in', equipment.ids),
+                ('activity_type_id', '=', activity_type.id),
+            ])
+        }
+        res_model_id = self.env['ir.model']._get_id('gear.equipment')
+
+        vals_list = []
+        alerted = {}
+        for (equipment_id, due, window), record in zip(rows, equipment):
+            user = record.default_technician_id or record.maintenance_team_id.member_ids[:1]
+            if not user:
+                continue
+            summary = self._summary(date_field, (due - today).days, due)
+            activity = open_activities.get(equipment_id)
+            if activity:
+                # Still open from a previous window: refresh it instead of stacking
+                activity.write({'summary': summary, 'date_deadline': due})
+            else:
+                vals_list.append({
+                    'res_model_id': res_model_id,
+                    'res_id': equipment_id,
+                    'activity_type_id': activity_type.id,
+                    'summary': summary,
+                    'date_deadline': due,
+                    'user_id': user.id,
+                })
+            alerted[equipment_id] = window
+        if vals_list:
+            Activity.create(vals_list)
+
+        if alerted:
+            alert_field = self._ALERTS[date_field]
+            self.env.cr.execute(f"""
+                UPDATE gear_equipment e SET {alert_field} = a.days
+                FROM unnest(%s::int[], %s::int[]) AS a(id, days)
+                WHERE e.id = a.id
+            """, [list(alerted), list(alerted.values())])
+            self.env['gear.equipment'].invalidate_model([alert_field])
+        return len(alerted)
+
+    @api.model
+    def send_lifecycle_alerts(self):
+        """
+        Alert on every warranty expiry and end of life entering a window.
+
+        Returns:
+            Dict of alerted equipment counts per date field
+        """
+        windows = self._get_windows()
+        totals = dict.fromkeys(self._ALERTS, 0)
+        if not windows:
+            return totals
+        today = fields.Date.context_today(self)
+        for date_field in self._ALERTS:
+            # Keyset on id: skipped rows (nobody to remind) stay selectable
+            after_id = 0
+            while True:
+                rows = self._select_crossing(date_field, windows, today, after_id)
+                if not rows:
+                    break
+                totals[date_field] += self._alert_batch(date_field, rows, today)
+                if len(rows) < self._BATCH_SIZE:
+                    break
+                after_id = rows[-1][0]
+        return totals
+
+    @api.model
+    def cron_send_lifecycle_alerts(self):
+        """Cron job sending warranty and end-of-life reminders."""
+        totals = self.send_lifecycle_alerts()
+        _logger.info(
+            "Lifecycle alerts: %d warranty, %d end of life",
+            totals['warranty_expiry_date'], totals['end_of_life_date'],
+        )
+        return True
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+
+
+class GearEquipmentReliability(models.Model):
+    _name = 'gear.equipment.reliability'
+    _description = 'Equipment Reliability Metrics'
+    _rec_name = 'equipment_id'
+    _order = 'mtbf_hours, failure_count desc, id'
+
+    equipment_id = fields.Many2one(
+        comodel_name='gear.equipment',
+        string='Equipment',
+        required=True,
+        readonly=True,
+        ondelete='cascade',
+    )
+    team_id = fields.Many2one(
+        comodel_name='gear.maintenance.team',
+        string='Maintenance Team',
+        index=True,
+        readonly=True,
+        ondelete='set null',
+    )
+    category_id = fields.Many2one(
+        comodel_name='gear.equipment.category',
+        string='Equipment Category',
+        index=True,
+        readonly=True,
+        ondelete='set null',
+    )
+    failure_count = fields.Integer(
+        string='Failures',
+        index=True,
+        readonly=True,
+        group_operator='sum',
+    )
+    repair_count = fields.Integer(
+        string='Repairs',
+        readonly=True,
+        group_operator='sum',
+    )
+    total_repair_hours = fields.Float(
+        string='Total Repair Time (Hours)',
+        readonly=True,
+        group_operator='sum',
+    )
+    gap_count = fields.Integer(
+        string='Failure Intervals',
+        readonly=True,
+        group_operator='sum',
+    )
+    total_uptime_hours = fields.Float(
+        string='Total Time Between Failures (Hours)',
+        readonly=True,
+        group_operator='sum',
+    )
+    mttr_hours = fields.Float(
+        string='MTTR (Hours)',
+        index=True,
+        readonly=True,
+        group_operator='avg',
+        help="Mean time to repair: average time from failure to repair.",
+    )
+    mtbf_hours = fields.Float(
+        string='MTBF (Hours)',
+        index=True,
+        readonly=True,
+        group_operator='avg',
+        help="Mean time between failures: average interval between consecutive corrective requests.",
+    )
+    last_failure_date = fields.Datetime(
+        string='Last Failure',
+        readonly=True,
+    )
+
+    _sql_constraints = [
+        ('equipment_uniq', 'unique (equipment_id)', 'Reliability metrics must be unique per equipment.'),
+    ]
+
+    _LAST_RUN_PARAM = 'gear_guard.reliability_last_run'
+    _GROUP_FIELDS = {
+        'equipment': 'equipment_id',
+        'team': 'team_id',
+        'category': 'category_id',
+    }
+    _SORT_FIELDS = ('mtbf_hours', 'mttr_hours', 'failure_count', 'last_failure_date')
+
+    def init(self):
+        # Equipment a request was moved away from or deleted on: the
+        # write_date scan of the refresh only sees its current equipment
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS gear_equipment_reliability_dirty (
+                equipment_id integer PRIMARY KEY
+            )
+        """)
+
+    @api.model
+    def _mark_equipment_dirty(self, equipment_ids):
+        """Queue equipment for the next refresh."""
+        if not equipment_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO gear_equipment_reliability_dirty (equipment_id)
+            SELECT unnest(%s::int[])
+            ON CONFLICT DO NOTHING
+        """, [list(equipment_ids)])
+
+    @api.model
+    def _pop_dirty_equipment(self):
+        self.env.cr.execute("DELETE FROM gear_equipment_reliability_dirty RETURNING equipment_id")
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _refresh_equipment(self, equipment_ids=None):
+        """
+        Recompute metrics with one set-based upsert. Failure intervals come
+        from a LAG() window over each equipment's corrective requests,
+        archived ones included.
+        Refreshes the whole fleet when equipment_ids is None.
+        """
+        if equipment_ids is not None and not equipment_ids:
+            return 0
+
+        self.env['gear.maintenance.request'].flush_model()
+        self.env['gear.equipment'].flush_model(['maintenance_team_id', 'category_id'])
+        history = self.env['gear.maintenance.request.archive']._request_history_query()
+        cr = self.env.cr
+        scope, cleanup_scope = "TRUE", "TRUE"
+        params = []
+        if equipment_ids is not None:
+            scope, cleanup_scope = "r.equipment_id IN %s", "rel.equipment_id IN %s"
+            params.append(tuple(equipment_ids))
+
+        cr.execute(f"""
+            WITH failures AS (
+                SELECT r.equipment_id,
+                       COALESCE(r.scheduled_date, r.create_date) AS failed_at,
+                       CASE WHEN r.state = 'repaired' THEN COALESCE(
+                           NULLIF(r.duration_hours, 0),
+                           GREATEST(EXTRACT(EPOCH FROM r.completion_date
+                                    - COALESCE(r.scheduled_date, r.create_date)), 0) / 3600.0
+                       ) END AS repair_hours,
+                       LAG(COALESCE(r.scheduled_date, r.create_date)) OVER (
+                           PARTITION BY r.equipment_id
+                           ORDER BY COALESCE(r.scheduled_date, r.create_date), r.id
+                       ) AS previous_failed_at
+                FROM {history} r
+                WHERE r.request_type = 'corrective' AND {scope}
+            ), agg AS (
+                SELECT equipment_id,
+                       COUNT(*) AS failure_count,
+                       COUNT(repair_hours) AS repair_count,
+                       COALESCE(SUM(repair_hours), 0) AS total_repair_hours,
+                       COUNT(previous_failed_at) AS gap_count,
+                       COALESCE(SUM(EXTRACT(EPOCH FROM failed_at - previous_failed_at)) / 3600.0, 0)
+                           AS total_uptime_hours,
+                       MAX(failed_at) AS last_failure_date
+                FROM failures
+                GROUP BY equipment_id
+            )
+            INSERT INTO gear_equipment_reliability (
+                equipment_id, team_id, category_id, failure_count, repair_count,
+                total_repair_hours, gap_count, total_uptime_hours,
+                mttr_hours, mtbf_hours, last_failure_date,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT agg.equipment_id, e.maintenance_team_id, e.category_id,
+                   agg.failure_count, agg.repair_count, agg.total_repair_hours,
+                   agg.gap_count, agg.total_uptime_hours,
+                   agg.total_repair_hours / NULLIF(agg.repair_count, 0),
+                   agg.total_uptime_hours / NULLIF(agg.gap_count, 0),
+                   agg.last_failure_date,
+                   %s, now() at time zone 'UTC', %s, now() at time zone 'UTC'
+            FROM agg
+            JOIN gear_equipment e ON e.id = agg.equipment_id
+            ON CONFLICT (equipment_id) DO UPDATE SET
+                team_id = EXCLUDED.team_id,
+                category_id = EXCLUDED.category_id,
+                failure_count = EXCLUDED.failure_count,
+                repair_count = EXCLUDED.repair_count,
+                total_repair_hours = EXCLUDED.total_repair_hours,
+                gap_count = EXCLUDED.gap_count,
+                total_uptime_hours = EXCLUDED.total_uptime_hours,
+                mttr_hours = EXCLUDED.mttr_hours,
+                mtbf_hours = EXCLUDED.mtbf_hours,
+                last_failure_date = EXCLUDED.last_failure_date,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+        """, params + [self.env.uid, self.env.uid])
+        refreshed = cr.rowcount
+
+        # Drop rows of equipment that no longer has any corrective request
+        cr.execute(f"""
+            DELETE FROM gear_equipment_reliability rel
+            WHERE {cleanup_scope}
+              AND NOT EXISTS (
+                  SELECT 1 FROM {history} r
+                  WHERE r.equipment_id = rel.equipment_id AND r.request_type = 'corrective'
+              )
+        """, params)
+        self.invalidate_model()
+        return refreshed
+
+    @api.model
+    def cron_refresh_reliability(self):
+        """
+        Cron job to refresh reliability metrics.
+        Only equipment with requests or assignment changes since the last run
+        is recomputed, plus equipment requests were moved away from or deleted on.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        last_run = ICP.get_param(self._LAST_RUN_PARAM)
+        now = fields.Datetime.now()
+        dirty = self._pop_dirty_equipment()
+
+        if not last_run:
+            self._refresh_equipment()
+        else:
+            self.env['gear.maintenance.request'].flush_model()
+            self.env['gear.equipment'].flush_model()
+            self.env.cr.execute("""
+                SELECT equipment_id FROM gear_maintenance_request WHERE write_date >= %s
+                UNION
+                SELECT id FROM gear_equipment WHERE write_date >= %s
+            """, [last_run, last_run])
+            self._refresh_equipment(list({row[0] for row in self.env.cr.fetchall()} | dirty))
+
+        ICP.set_param(self._LAST_RUN_PARAM, fields.Datetime.to_string(now))
+        return True
+
+    @api.model
+    def get_reliability_stats(self, group_by='equipment', order='mtbf_hours', descending=False,
+                              limit=50, offset=0, team_id=None, category_id=None, min_failures=0):
+        """
+        Return reliability metrics per equipment, team or category.
+        Team and category figures are weighted by the underlying repairs
+        and failure intervals, not averages of per-equipment means.
+        """
+        if group_by not in self._GROUP_FIELDS:
+            raise ValueError("group_by must be one of: %s" % ', '.join(self._GROUP_FIELDS))
+        if order not in self._SORT_FIELDS:
+            raise ValueError("order must be one of: %s" % ', '.join(self._SORT_FIELDS))
+
+        domain = []
+        if team_id:
+            domain.append(('team_id', '=', int(team_id)))
+        if category_id:
+            domain.append(('category_id', 'child_of', int(category_id)))
+        if min_failures:
+            domain.append(('failure_count', '>=', int(min_failures)))
+
+        direction = 'desc' if descending else 'asc'
+        if group_by == 'equipment':
+            records = self.search(domain, order=f'{order} {direction} NULLS LAST, id', limit=limit, offset=offset)
+            return [{
+                'equipment': {'id': rel.equipment_id.id, 'name': rel.equipment_id.name},
+                'team_id': rel.team_id.id or None,
+                'category_id': rel.category_id.id or None,
+                'failure_count': rel.failure_count,
+                'repair_count': rel.repair_count,
+                'mttr_hours': rel.mttr_hours if rel.repair_count else None,
+                'mtbf_hours': rel.mtbf_hours if rel.gap_count else None,
+                'last_failure_date': rel.last_failure_date,
+            } for rel in records]
+
+        group_field = self._GROUP_FIELDS[group_by]
+        groups = self.read_group(
+            domain,
+            ['failure_count:sum', 'repair_count:sum', 'total_repair_hours:sum',
+             'gap_count:sum', 'total_uptime_hours:sum', 'last_failure_date:max'],
+            [group_field],
+            lazy=False,
+        )
+        result = []
+        for group in groups:
+            key = group[group_field]
+            result.append({
+                group_by: {'id': key[0], 'name': str(key[1])} if key else None,
+                'equipment_count': group['__count'],
+                'failure_count': group['failure_count'],
+                'repair_count': group['repair_count'],
+                'mttr_hours': group['total_repair_hours'] / group['repair_count'] if group['repair_count'] else None,
+                'mtbf_hours': group['total_uptime_hours'] / group['gap_count'] if group['gap_count'] else None,
+                'last_failure_date': group['last_failure_date'],
+            })
+        # Same ordering as the equipment query: groups without a value go last
+        result = sorted(
+            (row for row in result if row[order] is not None),
+            key=lambda row: row[order],
+            reverse=descending,
+        ) + [row for row in result if row[order] is None]
+        return result[offset:offset + limit] if limit else result[offset:]
@@ -1,15 +1,31 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+import heapq
+import logging
+import threading
+from collections import defaultdict
+
+import pytz
+from markupsafe import Markup
+
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError
 from datetime import datetime, timedelta
 
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    ML_AVAILABLE = True
-except ImportError:
-    ML_AVAILABLE = False
+from ..utils import ml_utils
+
+_logger = logging.getLogger(__name__)
+
+
+class DuplicateRequestError(UserError):
+    """
+    Raised by create() in 'reject' duplicate mode; carries the matching open
+    request (empty when the match is another report of the same batch).
+    """
+
+    def __init__(self, message, duplicate):
+        super().__init__(message)
+        self.duplicate = duplicate
 
 
 class GearMaintenanceRequest(models.Model):
@@ -61,6 +77,7 @@ class GearMaintenanceRequest(models.Model):
     )
     scheduled_date = fields.Datetime(
         string='Scheduled Date',
+        index=True,
         tracking=True,
     )
     completion_date = fields.Datetime(
@@ -108,7 +125,115 @@ class GearMaintenanceRequest(models.Model):
         string='Active',
         default=True,
     )
-    
+    tag_ids = fields.Many2many(
+        comodel_name='gear.maintenance.tag',
+        relation='gear_maintenance_request_tag_rel',
+        column1='request_id',
+        column2='tag_id',
+        string='Tags',
+    )
+    schedule_id = fields.Many2one(
+        comodel_name='gear.maintenance.schedule',
+        string='Preventive Schedule',
+        index=True,
+        readonly=True,
+        copy=False,
+        ondelete='set null',
+    )
+    schedule_usage_reading = fields.Float(
+        string='Usage Reading at Generation',
+        readonly=True,
+        copy=False,
+    )
+    keywords_stale = fields.Boolean(
+        string='Keywords Need Refresh',
+        default=True,
+        index=True,
+        copy=False,
+        help="Set when the description changes; the keyword cron re-tags these requests.",
+    )
+    queue_rank = fields.Float(
+        string='Queue Rank',
+        compute='_compute_queue_rank',
+        store=True,
+        help="Work-queue sort key, lowest first: overdue, then priority, then in progress "
+             "before new, then scheduled date. 0 for closed requests.",
+    )
+    duplicate_of_id = fields.Many2one(
+        comodel_name='gear.maintenance.request',
+        string='Possible Duplicate Of',
+        index='btree_not_null',
+        readonly=True,
+        copy=False,
+        ondelete='set null',
+        help="Open request on the same equipment with a near-identical title and description at creation.",
+    )
+    sla_policy_id = fields.Many2one(
+        comodel_name='gear.sla.policy',
+        string='SLA Policy',
+        compute='_compute_sla_deadlines',
+        store=True,
+        readonly=True,
+        ondelete='set null',
+    )
+    sla_response_deadline = fields.Datetime(
+        string='Response Deadline',
+        compute='_compute_sla_deadlines',
+        store=True,
+        readonly=True,
+    )
+    sla_resolution_deadline = fields.Datetime(
+        string='Resolution Deadline',
+        compute='_compute_sla_deadlines',
+        store=True,
+        readonly=True,
+    )
+    sla_responded_date = fields.Datetime(
+        string='Responded On',
+        readonly=True,
+        copy=False,
+        help="First time the request left the New stage.",
+    )
+    sla_response_breached = fields.Boolean(
+        string='Response SLA Breached',
+        readonly=True,
+        copy=False,
+    )
+    sla_resolution_breached = fields.Boolean(
+        string='Resolution SLA Breached',
+        readonly=True,
+        copy=False,
+    )
+    sla_next_deadline = fields.Datetime(
+        string='Next SLA Deadline',
+        compute='_compute_sla_next_deadline',
+        store=True,
+        index='btree_not_null',
+        help="Earliest deadline still to be met; empty once every deadline is met or breached. "
+             "The breach check only looks at requests whose next deadline has passed.",
+    )
+    state_date = fields.Datetime(
+        string='In State Since',
+        readonly=True,
+        copy=False,
+        help="Set on creation and on every state change. Empty on requests created before state "
+             "tracking existed; their current stay counts from the creation date.",
+    )
+    dwell_new_hours = fields.Float(
+        string='Hours in New',
+        readonly=True,
+        copy=False,
+        group_operator='avg',
+        help="Time spent in New over all past stays; the current stay is counted when it ends.",
+    )
+    dwell_in_progress_hours = fields.Float(
+        string='Hours in Progress',
+        readonly=True,
+        copy=False,
+        group_operator='avg',
+        help="Time spent In Progress over all past stays; the current stay is counted when it ends.",
+    )
+
     # Related fields for display
     equipment_location = fields.Char(
         related='equipment_id.location',
@@ -127,6 +252,85 @@ class GearMaintenanceRequest(models.Model):
         store=True,
     )
 
+    _AUTO_ASSIGN_PARAM = 'gear_guard.auto_assign_on_create'
+    _CAPACITY_INTERVALS = ('day', 'hour')
+    _CAPACITY_MAX_DAYS = 366
+    _SIMILARITY_POOL_PARAM = 'gear_guard.similarity_pool_size'
+    _SIMILARITY_QUEUE_PARAM = 'gear_guard.similarity_queue_depth'
+    _SIMILARITY_TIMEOUT_PARAM = 'gear_guard.similarity_timeout_ms'
+    _SIMILARITY_CACHE_SIZE_PARAM = 'gear_guard.similarity_cache_size'
+    _SIMILARITY_CACHE_KB_PARAM = 'gear_guard.similarity_cache_max_kb'
+    _SIMILARITY_VERSION_TABLE = 'gear_similarity_version'
+    _DUPLICATE_MODE_PARAM = 'gear_guard.duplicate_mode'
+    _DUPLICATE_THRESHOLD_PARAM = 'gear_guard.duplicate_threshold'
+    _DUPLICATE_MODES = ('off', 'flag', 'merge', 'reject')
+    _SLA_BATCH_SIZE = 1000
+    # Fields that can start or end a downtime of the equipment
+    _DOWNTIME_FIELDS = {'state', 'active', 'request_type', 'equipment_id'}
+    _QUEUE_EPOCH = datetime(2000, 1, 1)
+    # Scheduled date in minutes since _QUEUE_EPOCH stays below this until the 22nd century
+    _QUEUE_DATE_SPAN = 10 ** 8
+    # Fields that make up the similar-issue corpus
+    _SIMILARITY_FIELDS = {'state', 'name', 'description', 'equipment_id', 'active'}
+    # Target state -> states a request may leave to reach it
+    _STATE_TRANSITIONS = {
+        'in_progress': ('new',),
+        'repaired': ('new', 'in_progress'),
+        'scrap': ('new', 'in_progress'),
+        'new': ('in_progress', 'repaired', 'scrap'),
+    }
+    _STATE_EVENTS = {
+        'new': 'request.reset',
+        'in_progress': 'request.started',
+        'repaired': 'request.repaired',
+        'scrap': 'request.scrapped',
+    }
+
+    def init(self):
+        # Incremental jobs look up requests written since their last run
+        tools.create_index(
+            self.env.cr,
+            'gear_maintenance_request_write_date_id_index',
+            self._table,
+            ['write_date', 'id'],
+        )
+        # Technician work queue: one index range scan per handheld poll
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS gear_maintenance_request_queue_index
+            ON gear_maintenance_request (assigned_user_id, queue_rank, id)
+            WHERE queue_rank > 0 AND active
+        """)
+        # Candidate lookup of the duplicate check
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS gear_maintenance_request_open_equipment_index
+            ON gear_maintenance_request (equipment_id)
+            WHERE state IN ('new', 'in_progress') AND active
+        """)
+        # Single-row corpus version of the similar-issue cache
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self._SIMILARITY_VERSION_TABLE} (
+                id integer PRIMARY KEY CHECK (id = 1),
+                version bigint NOT NULL
+            )
+        """)
+        self.env.cr.execute(f"""
+            INSERT INTO {self._SIMILARITY_VERSION_TABLE} (id, version) VALUES (1, 0)
+            ON CONFLICT (id) DO NOTHING
+        """)
+        self.env.cr.execute("DROP SEQUENCE IF EXISTS gear_similarity_version_seq")
+        # Equipment already down when downtime accounting started: the
+        # downtime runs from the oldest request keeping it out of service
+        self.env.cr.execute(f"""
+            UPDATE gear_equipment e SET down_since = d.since
+            FROM (
+                SELECT r.equipment_id, MIN(COALESCE(r.state_date, r.create_date)) AS since
+                FROM gear_maintenance_request r
+                WHERE {self.env['gear.equipment']._DOWN_REQUEST_CONDITION}
+                GROUP BY r.equipment_id
+            ) d
+            WHERE e.id = d.equipment_id AND e.down_since IS NULL
+        """)
+
     @api.model
     def _expand_states(self, states, domain, order):
         """Expand all states for Kanban grouping."""
@@ -152,6 +356,65 @@ class GearMaintenanceRequest(models.Model):
             else:
                 record.is_overdue = False
 
+    @api.depends('is_overdue', 'priority', 'state', 'scheduled_date')
+    def _compute_queue_rank(self):
+        # Digits of the key, most significant first: overdue, priority, state, date
+        span = self._QUEUE_DATE_SPAN
+        for record in self:
+            if record.state not in ('new', 'in_progress'):
+                record.queue_rank = 0.0
+                continue
+            if record.scheduled_date:
+                minutes = int((record.scheduled_date - self._QUEUE_EPOCH).total_seconds() // 60)
+                date_key = min(max(minutes, 0), span - 2)
+            else:
+                # Unscheduled work comes after everything scheduled
+                date_key = span - 1
+            record.queue_rank = float(
+                (0 if record.is_overdue else 1) * 8 * span
+                + (3 - int(record.priority or 0)) * 2 * span
+                + (0 if record.state == 'in_progress' else 1) * span
+                + date_key
+                + 1
+            )
+
+    @api.depends('request_type', 'priority', 'team_id', 'equipment_category_id', 'create_date')
+    def _compute_sla_deadlines(self):
+        corrective = self.filtered(lambda r: r.request_type == 'corrective')
+        (self - corrective).update({
+            'sla_policy_id': False,
+            'sla_response_deadline': False,
+            'sla_resolution_deadline': False,
+        })
+        if not corrective:
+            return
+        SlaPolicy = self.env['gear.sla.policy']
+        policies = SlaPolicy._get_policies()
+        for record in corrective:
+            policy = SlaPolicy._find_policy(policies, record.team_id, record.equipment_category_id, record.priority)
+            # Deadlines run from creation; create_date is not set yet while the record is new
+            start = record.create_date or fields.Datetime.now()
+            record.sla_policy_id = policy.id
+            record.sla_response_deadline = (
+                start + timedelta(hours=policy.response_hours) if policy.response_hours else False
+            )
+            record.sla_resolution_deadline = (
+                start + timedelta(hours=policy.resolution_hours) if policy.resolution_hours else False
+            )
+
+    @api.depends('state', 'active', 'sla_response_deadline', 'sla_resolution_deadline',
+                 'sla_responded_date', 'sla_response_breached', 'sla_resolution_breached')
+    def _compute_sla_next_deadline(self):
+        for record in self:
+            pending = []
+            if record.active and record.state in ('new', 'in_progress'):
+                if (record.sla_response_deadline and not record.sla_responded_date
+                        and not record.sla_response_breached):
+                    pending.append(record.sla_response_deadline)
+                if record.sla_resolution_deadline and not record.sla_resolution_breached:
+                    pending.append(record.sla_resolution_deadline)
+            record.sla_next_deadline = min(pending) if pending else False
+
     @api.depends('state', 'is_overdue', 'priority')
     def _compute_color(self):
         for record in self:
@@ -179,55 +442,485 @@ class GearMaintenanceRequest(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
-        for vals in vals_list:
+        # create() returns one new record per vals: merging is left to callers
+        vals_list, _merged, batch_duplicates = self._apply_duplicate_policy(vals_list, merge=False)
+
+        auto_assign = tools.str2bool(
+            self.env['ir.config_parameter'].sudo().get_param(self._AUTO_ASSIGN_PARAM, 'False')
+        )
+        to_balance = []
+        now = fields.Datetime.now()
+        # Prefetch all equipment at once instead of one read per request
+        equipment_ids = {vals['equipment_id'] for vals in vals_list if vals.get('equipment_id')}
+        for index, vals in enumerate(vals_list):
+            # Not a field default: existing rows must stay empty when the column is added
+            vals.setdefault('state_date', now)
             if 'equipment_id' in vals and vals.get('equipment_id'):
-                equipment = self.env['gear.equipment'].browse(vals['equipment_id'])
+                equipment = self.env['gear.equipment'].browse(vals['equipment_id']).with_prefetch(equipment_ids)
                 if equipment.is_scrapped:
                     raise UserError(_('Cannot create maintenance request for scrapped equipment.'))
                 if not vals.get('team_id') and equipment.maintenance_team_id:
                     vals['team_id'] = equipment.maintenance_team_id.id
-                if not vals.get('assigned_user_id') and equipment.default_technician_id:
-                    vals['assigned_user_id'] = equipment.default_technician_id.id
-        return super().create(vals_list)
+                if not vals.get('assigned_user_id'):
+                    if auto_assign and vals.get('team_id'):
+                        to_balance.append(index)
+                    elif equipment.default_technician_id:
+                        vals['assigned_user_id'] = equipment.default_technician_id.id
+        records = super().create(vals_list)
+        self.env['gear.maintenance.request.transition']._log(records, {}, now)
+        records.equipment_id._sync_downtime(now)
+        if to_balance:
+            records.browse([records[index].id for index in to_balance])._auto_assign_technicians()
+        self.env['gear.webhook.event']._enqueue('request.created', records, 'equipment_id')
+        if any(record.state == 'repaired' for record in records):
+            self._invalidate_similarity_cache()
+        for index, earlier in batch_duplicates.items():
+            records[index].duplicate_of_id = records[earlier]
+        return records
 
     def write(self, vals):
         if 'state' in vals and vals['state'] == 'scrap':
-            for record in self:
-                record.equipment_id.write({'is_scrapped': True})
-                record.equipment_id.message_post(
-                    body=_('Equipment marked as scrapped from maintenance request: %s') % record.name
-                )
+            self._scrap_equipment()
         if 'state' in vals and vals['state'] == 'repaired':
             vals['completion_date'] = fields.Datetime.now()
-        return super().write(vals)
+        if 'description' in vals:
+            vals['keywords_stale'] = True
+        transitioned = self.filtered(lambda r: r.state != vals['state']) if vals.get('state') else self.browse()
+        if self._SIMILARITY_FIELDS & set(vals) and (
+            vals.get('state') == 'repaired' or any(record.state == 'repaired' for record in self)
+        ):
+            self._invalidate_similarity_cache()
+        now = fields.Datetime.now()
+        responded = self.browse()
+        previous = {}
+        if transitioned:
+            previous = {record.id: (record.state, record.state_date or record.create_date) for record in transitioned}
+            # Deadlines that passed before the cron got to them still count as breached
+            transitioned.filtered(
+                lambda r: r.sla_next_deadline and r.sla_next_deadline <= now
+            )._sla_flag_breaches(now)
+            if vals['state'] != 'new':
+                responded = transitioned.filtered(lambda r: not r.sla_responded_date)
+        downtime_equipment = self.equipment_id if self._DOWNTIME_FIELDS & set(vals) else None
+        if 'scheduled_date' in vals:
+            # The day the requests leave must be rebuilt as well
+            self.env['gear.maintenance.snapshot']._mark_days_dirty(self.ids)
+        if 'equipment_id' in vals:
+            # The equipment the requests leave keeps counting them otherwise
+            self.env['gear.equipment.reliability']._mark_equipment_dirty(self.equipment_id.ids)
+        res = super().write(vals)
+        if responded:
+            responded.write({'sla_responded_date': now})
+        if transitioned:
+            transitioned._record_transitions(previous, now)
+        if downtime_equipment is not None:
+            (downtime_equipment | self.equipment_id)._sync_downtime(now)
+        if transitioned:
+            self.env['gear.webhook.event']._enqueue(
+                self._STATE_EVENTS[vals['state']], transitioned, 'equipment_id'
+            )
+        return res
+
+    def unlink(self):
+        self.env['gear.change.tombstone']._record_deletion(self)
+        if any(record.state == 'repaired' for record in self):
+            self._invalidate_similarity_cache()
+        equipment = self.equipment_id
+        self.env['gear.maintenance.snapshot']._mark_days_dirty(self.ids)
+        self.env['gear.equipment.reliability']._mark_equipment_dirty(equipment.ids)
+        res = super().unlink()
+        equipment.exists()._sync_downtime()
+        return res
+
+    def _record_transitions(self, previous, now):
+        """
+        Log the state change of these requests and add the stay that just
+        ended to their dwell times.
+
+        Args:
+            previous: Dict of request id -> (state left, date it was entered)
+            now: Date of the change
+        """
+        transitions = self.env['gear.maintenance.request.transition']._log(self, previous, now)
+        self.flush_model(['state_date', 'dwell_new_hours', 'dwell_in_progress_hours'])
+        self.env.cr.execute("""
+            UPDATE gear_maintenance_request r
+            SET state_date = %s,
+                dwell_new_hours = COALESCE(r.dwell_new_hours, 0)
+                    + CASE WHEN t.from_state = 'new' THEN t.hours ELSE 0 END,
+                dwell_in_progress_hours = COALESCE(r.dwell_in_progress_hours, 0)
+                    + CASE WHEN t.from_state = 'in_progress' THEN t.hours ELSE 0 END
+            FROM unnest(%s::int[], %s::varchar[], %s::float8[]) AS t(id, from_state, hours)
+            WHERE r.id = t.id
+        """, [
+            now,
+            transitions.mapped('request_id'),
+            [transition.from_state for transition in transitions],
+            transitions.mapped('hours'),
+        ])
+        self.invalidate_model(['state_date', 'dwell_new_hours', 'dwell_in_progress_hours'])
+
+    @api.model
+    def _get_duplicate_mode(self):
+        if self.env.context.get('skip_duplicate_check'):
+            return 'off'
+        mode = self.env['ir.config_parameter'].sudo().get_param(self._DUPLICATE_MODE_PARAM, 'off')
+        return mode if mode in self._DUPLICATE_MODES else 'off'
+
+    @api.model
+    def _apply_duplicate_policy(self, vals_list, merge=True):
+        """
+        Run the configured duplicate check on requests about to be created:
+        'flag' sets duplicate_of_id, 'merge' folds the report into the open
+        request, 'reject' raises DuplicateRequestError. With merge=False
+        (create() itself), 'merge' flags instead.
+
+        A report matching an earlier one of the same batch follows it into
+        the open request it was merged into; otherwise it is flagged once
+        both are created (rejected in 'reject' mode).
+
+        Returns:
+            Tuple (vals still to create, dict of vals_list index -> request
+            merged into, dict of position in the vals to create -> position
+            of the earlier report it duplicates)
+        """
+        mode = self._get_duplicate_mode()
+        if mode == 'off':
+            return vals_list, {}, {}
+        if mode == 'merge' and not merge:
+            mode = 'flag'
+        merged = {}
+        batch_duplicates = {}
+        for index, (duplicate, score) in sorted(self._find_duplicates(vals_list).items()):
+            if isinstance(duplicate, int):
+                if duplicate not in merged:
+                    if mode == 'reject':
+                        raise DuplicateRequestError(_(
+                            'This looks like a duplicate of "%(name)s", reported along with it (%(score)s%% similar).',
+                            name=vals_list[duplicate]['name'], score=round(score * 100),
+                        ), self.browse())
+                    batch_duplicates[index] = duplicate
+                    continue
+                duplicate = merged[duplicate]
+            if mode == 'reject':
+                raise DuplicateRequestError(_(
+                    'This looks like a duplicate of the open request "%(name)s" (%(score)s%% similar).',
+                    name=duplicate.display_name, score=round(score * 100),
+                ), duplicate)
+            if mode == 'merge':
+                duplicate._merge_duplicate_report(vals_list[index])
+                merged[index] = duplicate
+            else:
+                vals_list[index]['duplicate_of_id'] = duplicate.id
+        if merged:
+            positions = {}
+            for index in range(len(vals_list)):
+                if index not in merged:
+                    positions[index] = len(positions)
+            vals_list = [vals for index, vals in enumerate(vals_list) if index not in merged]
+            batch_duplicates = {positions[index]: positions[earlier] for index, earlier in batch_duplicates.items()}
+        return vals_list, merged, batch_duplicates
+
+    @api.model
+    def _get_fingerprints(self, rows):
+        """
+        MinHash signatures of requests given as (id, write_date) rows.
+        Signatures live in a process-wide cache keyed on the request id and
+        checked against write_date, so an edit made by any worker is
+        picked up; only missing or stale ones are computed, with one read.
+        """
+        cache = ml_utils.get_fingerprint_cache()
+        dbname = self.env.cr.dbname
+        signatures = {}
+        missing = {}
+        for request_id, write_date in rows:
+            cached = cache.get((dbname, request_id))
+            if cached and cached[0] == write_date:
+                signatures[request_id] = cached[1]
+            else:
+                missing[request_id] = write_date
+        if missing:
+            self.env.cr.execute(
+                "SELECT id, name, description FROM gear_maintenance_request WHERE id IN %s",
+                [tuple(missing)],
+            )
+            for request_id, name, description in self.env.cr.fetchall():
+                signature = ml_utils.minhash_signature('%s %s' % (name or '', description or ''))
+                cache.put((dbname, request_id), (missing[request_id], signature))
+                signatures[request_id] = signature
+        return signatures
+
+    @api.model
+    def _find_duplicates(self, vals_list):
+        """
+        Compare incoming requests with the open requests of their equipment
+        and with the earlier requests of the same equipment in vals_list.
+        Requests generated by preventive schedules are never checked.
+
+        Returns:
+            Dict of vals_list index -> (best match, estimated similarity);
+            the match is a request, or the index of an earlier vals
+        """
+        candidates = {
+            index: vals for index, vals in enumerate(vals_list)
+            if vals.get('equipment_id') and vals.get('name') and not vals.get('schedule_id')
+        }
+        if not candidates:
+            return {}
+        self.flush_model(['equipment_id', 'state', 'active', 'name', 'description'])
+        self.env.cr.execute("""
+            SELECT equipment_id, id, write_date FROM gear_maintenance_request
+            WHERE equipment_id IN %s AND state IN ('new', 'in_progress') AND active
+        """, [tuple({vals['equipment_id'] for vals in candidates.values()})])
+        open_requests = defaultdict(list)
+        rows = []
+        for equipment_id, request_id, write_date in self.env.cr.fetchall():
+            open_requests[equipment_id].append(request_id)
+            rows.append((request_id, write_date))
+        if not rows and len(candidates) < 2:
+            return {}
+        signatures = self._get_fingerprints(rows) if rows else {}
+        threshold = float(self.env['ir.config_parameter'].sudo().get_param(self._DUPLICATE_THRESHOLD_PARAM, 0.6))
+
+        duplicates = {}
+        batch_signatures = defaultdict(list)
+        for index, vals in candidates.items():
+            signature = ml_utils.minhash_signature('%s %s' % (vals['name'], vals.get('description') or ''))
+            matches = [
+                (ml_utils.minhash_similarity(signature, signatures.get(request_id)), self.browse(request_id))
+                for request_id in open_requests.get(vals['equipment_id'], ())
+            ] + [
+                (ml_utils.minhash_similarity(signature, earlier_signature), earlier)
+                for earlier, earlier_signature in batch_signatures[vals['equipment_id']]
+            ]
+            batch_signatures[vals['equipment_id']].append((index, signature))
+            if not matches:
+                continue
+            score, match = max(matches, key=lambda m: m[0])
+            if score >= threshold:
+                duplicates[index] = (match, score)
+        return duplicates
+
+    def _merge_duplicate_report(self, vals):
+        """Fold a duplicate report into this open request: log it and keep the higher priority."""
+        self.ensure_one()
+        self.message_post(
+            body=Markup('<p>%s</p><p><b>%s</b></p><p>%s</p>') % (
+                _('Duplicate report merged into this request:'),
+                vals.get('name') or '',
+                vals.get('description') or '',
+            ),
+            subtype_xmlid='mail.mt_note',
+        )
+        if vals.get('priority') and vals['priority'] > (self.priority or '0'):
+            self.priority = vals['priority']
+
+    @api.model
+    def _get_similarity_version(self):
+        self.env.cr.execute(f"SELECT version FROM {self._SIMILARITY_VERSION_TABLE} WHERE id = 1")
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def _invalidate_similarity_cache(self):
+        """
+        Bump the corpus version in this transaction, just before it commits.
+        The version is a table row, so a reader sees it in the same snapshot
+        as the corpus it ranks: an answer is never cached under a version
+        whose corpus it was not computed from. Bumping at commit time keeps
+        the row lock short.
+        """
+        data = self.env.cr.precommit.data
+        if data.get('gear_guard.similarity_dirty'):
+            return
+        data['gear_guard.similarity_dirty'] = True
+        cr = self.env.cr
+        table = self._SIMILARITY_VERSION_TABLE
+
+        @cr.precommit.add
+        def bump_version():
+            cr.execute(f"UPDATE {table} SET version = version + 1 WHERE id = 1")
+
+    def _scrap_equipment(self):
+        """Mark the equipment of these requests as scrapped, with one write and one note per equipment."""
+        requests_by_equipment = defaultdict(list)
+        for record in self:
+            requests_by_equipment[record.equipment_id].append(record.name)
+        equipment = self.equipment_id
+        equipment.filtered(lambda e: not e.is_scrapped).write({'is_scrapped': True})
+        for eq in equipment:
+            eq.message_post(
+                body=_('Equipment marked as scrapped from maintenance request: %s')
+                % ', '.join(requests_by_equipment[eq])
+            )
+
+    def _transition(self, target_state):
+        """
+        Move every eligible request to target_state with a single write.
+
+        Returns:
+            Tuple (moved, ineligible) of recordsets
+        """
+        if target_state not in self._STATE_TRANSITIONS:
+            raise ValueError("state must be one of: %s" % ', '.join(self._STATE_TRANSITIONS))
+        eligible = self.filtered(lambda r: r.state in self._STATE_TRANSITIONS[target_state])
+        if eligible:
+            vals = {'state': target_state}
+            if target_state == 'new':
+                vals['completion_date'] = False
+            eligible.write(vals)
+        return eligible, self - eligible
 
     def action_start(self):
         """Move request to in_progress state."""
-        for record in self:
-            if record.state == 'new':
-                record.write({'state': 'in_progress'})
+        self._transition('in_progress')
 
     def action_repair(self):
         """Move request to repaired state."""
-        for record in self:
-            if record.state in ['new', 'in_progress']:
-                record.write({
-                    'state': 'repaired',
-                    'completion_date': fields.Datetime.now(),
-                })
+        self._transition('repaired')
 
     def action_scrap(self):
         """Move request to scrap state and mark equipment as scrapped."""
-        for record in self:
-            record.write({'state': 'scrap'})
+        self._transition('scrap')
 
     def action_reset_to_new(self):
         """Reset request to new state."""
+        self._transition('new')
+
+    def _auto_assign_technicians(self, team=None):
+        """
+        Spread the requests over team members, least loaded first.
+        Load is the open scheduled hours per technician (one hour for
+        requests without a duration), read with a single query and kept in
+        a heap while the batch is assigned. Writes once per technician.
+
+        Args:
+            team: Team to pick technicians from; defaults to each request's team
+
+        Returns:
+            Dict mapping user ids to the requests assigned to them
+        """
+        by_team = defaultdict(lambda: self.browse())
         for record in self:
-            record.write({
-                'state': 'new',
-                'completion_date': False,
-            })
+            record_team = team or record.team_id
+            if record_team.member_ids:
+                by_team[record_team] |= record
+        if not by_team:
+            return {}
+
+        member_ids = set()
+        for record_team in by_team:
+            member_ids.update(record_team.member_ids.ids)
+        loads = dict.fromkeys(member_ids, (0.0, 0))
+        self.flush_model(['assigned_user_id', 'state', 'active', 'duration_hours'])
+        self.env.cr.execute("""
+            SELECT assigned_user_id,
+                   SUM(COALESCE(NULLIF(duration_hours, 0), 1.0)),
+                   COUNT(*)
+            FROM gear_maintenance_request
+            WHERE active
+              AND state IN ('new', 'in_progress')
+              AND assigned_user_id IN %s
+              AND id NOT IN %s
+            GROUP BY assigned_user_id
+        """, [tuple(member_ids), tuple(self.ids)])
+        for user_id, hours, count in self.env.cr.fetchall():
+            loads[user_id] = (hours, count)
+
+        assignments = defaultdict(list)
+        for record_team, requests in by_team.items():
+            heap = [(loads[uid][0], loads[uid][1], uid) for uid in record_team.member_ids.ids]
+            heapq.heapify(heap)
+            # Urgent and earliest work is handed out first
+            for record in requests.sorted(lambda r: (-int(r.priority or 0), r.scheduled_date or datetime.max)):
+                hours, count, user_id = heapq.heappop(heap)
+                # A technician in several teams may have taken work since this entry was pushed
+                while (hours, count) != loads[user_id]:
+                    heapq.heappush(heap, (loads[user_id][0], loads[user_id][1], user_id))
+                    hours, count, user_id = heapq.heappop(heap)
+                loads[user_id] = (hours + (record.duration_hours or 1.0), count + 1)
+                heapq.heappush(heap, (loads[user_id][0], loads[user_id][1], user_id))
+                assignments[user_id].append(record.id)
+
+        result = {}
+        for user_id, record_ids in assignments.items():
+            requests = self.browse(record_ids)
+            requests.write({'assigned_user_id': user_id})
+            result[user_id] = requests
+        return result
+
+    @api.model
+    def get_capacity(self, start, end, interval='day', team_id=None, user_id=None, tz=None, by_technician=False):
+        """
+        Aggregate scheduled load over a time window, bucketed in SQL.
+
+        Args:
+            start: Window start (datetime or string), inclusive
+            end: Window end (datetime or string), exclusive
+            interval: 'day' or 'hour'
+            team_id: Optional team filter
+            user_id: Optional technician filter
+            tz: Timezone the window and buckets are expressed in (default: UTC)
+            by_technician: Split each bucket per assigned technician
+
+        Returns:
+            List of dicts with 'bucket', 'count' and 'duration_hours'
+            (plus 'assigned_user_id' when split by technician)
+        """
+        if interval not in self._CAPACITY_INTERVALS:
+            raise ValueError("interval must be one of: %s" % ', '.join(self._CAPACITY_INTERVALS))
+        tz_name = tz or 'UTC'
+        local_tz = pytz.timezone(tz_name)
+
+        def to_utc(value):
+            value = fields.Datetime.to_datetime(value)
+            return local_tz.localize(value).astimezone(pytz.utc).replace(tzinfo=None)
+
+        start, end = to_utc(start), to_utc(end)
+        if end <= start:
+            raise ValueError("end must be after start")
+        if end - start > timedelta(days=self._CAPACITY_MAX_DAYS):
+            raise ValueError("window cannot exceed %d days" % self._CAPACITY_MAX_DAYS)
+
+        conditions = [
+            'active',
+            "state != 'scrap'",
+            'scheduled_date >= %(start)s',
+            'scheduled_date < %(end)s',
+        ]
+        if team_id:
+            conditions.append('team_id = %(team_id)s')
+        if user_id:
+            conditions.append('assigned_user_id = %(user_id)s')
+        user_column = ', assigned_user_id' if by_technician else ''
+
+        self.flush_model(['scheduled_date', 'duration_hours', 'team_id', 'assigned_user_id', 'state', 'active'])
+        self.env.cr.execute(f"""
+            SELECT date_trunc(%(interval)s, scheduled_date AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s) AS bucket
+                   {user_column},
+                   COUNT(*),
+                   COALESCE(SUM(duration_hours), 0)
+            FROM gear_maintenance_request
+            WHERE {' AND '.join(conditions)}
+            GROUP BY bucket {user_column}
+            ORDER BY bucket {user_column}
+        """, {
+            'interval': interval,
+            'tz': tz_name,
+            'start': start,
+            'end': end,
+            'team_id': team_id and int(team_id),
+            'user_id': user_id and int(user_id),
+        })
+        result = []
+        for row in self.env.cr.fetchall():
+            values = {'bucket': row[0]}
+            if by_technician:
+                values['assigned_user_id'] = row[1]
+            values['count'] = row[-2]
+            values['duration_hours'] = float(row[-1])
+            result.append(values)
+        return result
 
     @api.model
     def cron_update_overdue_status(self):
@@ -252,59 +945,246 @@ class GearMaintenanceRequest(models.Model):
         
         return True
 
+    def _sla_flag_breaches(self, now=None):
+        """
+        Record every deadline of these requests that passed by now and was
+        neither met nor flagged yet: one gear.sla.breach per missed
+        deadline, the breach flags, and a request.sla_breached webhook.
+
+        Returns:
+            gear.sla.breach recordset created
+        """
+        now = now or fields.Datetime.now()
+        vals_list = []
+        response_ids = set()
+        resolution_ids = set()
+        for record in self:
+            if not record.sla_next_deadline or record.sla_next_deadline > now:
+                continue
+            missed = []
+            if (record.sla_response_deadline and record.sla_response_deadline <= now
+                    and not record.sla_responded_date and not record.sla_response_breached):
+                missed.append(('response', record.sla_response_deadline))
+                response_ids.add(record.id)
+            if (record.sla_resolution_deadline and record.sla_resolution_deadline <= now
+                    and not record.sla_resolution_breached):
+                missed.append(('resolution', record.sla_resolution_deadline))
+                resolution_ids.add(record.id)
+            for breach_type, deadline in missed:
+                vals_list.append({
+                    'request_id': record.id,
+                    'request_name': record.name,
+                    'policy_id': record.sla_policy_id.id,
+                    'breach_type': breach_type,
+                    'deadline': deadline,
+                    'breach_date': now,
+                    'team_id': record.team_id.id,
+                    'equipment_id': record.equipment_id.id,
+                    'priority': record.priority,
+                })
+        if not vals_list:
+            return self.env['gear.sla.breach']
+
+        both = response_ids & resolution_ids
+        if both:
+            self.browse(sorted(both)).write({'sla_response_breached': True, 'sla_resolution_breached': True})
+        if response_ids - both:
+            self.browse(sorted(response_ids - both)).write({'sla_response_breached': True})
+        if resolution_ids - both:
+            self.browse(sorted(resolution_ids - both)).write({'sla_resolution_breached': True})
+        breaches = self.env['gear.sla.breach'].sudo().create(vals_list)
+        self.env['gear.webhook.event']._enqueue(
+            'request.sla_breached', self.browse(sorted(response_ids | resolution_ids)), 'equipment_id'
+        )
+        return breaches
+
+    @api.model
+    def cron_check_sla(self):
+        """
+        Cron job flagging missed SLA deadlines. Only requests whose next
+        deadline has passed are read, through the partial index on
+        sla_next_deadline; flagging moves each of them out of that range.
+        """
+        now = fields.Datetime.now()
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        breached = 0
+        while True:
+            due = self.search(
+                [('sla_next_deadline', '<=', now)],
+                order='sla_next_deadline, id',
+                limit=self._SLA_BATCH_SIZE,
+            )
+            if not due:
+                break
+            breached += len(due._sla_flag_breaches(now))
+            if auto_commit:
+                self.env.cr.commit()
+            if len(due) < self._SLA_BATCH_SIZE:
+                break
+        _logger.info("SLA check: %d deadlines breached", breached)
+        return True
+
+    @api.model
+    def cron_refresh_keyword_tags(self, max_keywords=5, batch_size=1000):
+        """
+        Cron job to tag requests with their top keywords.
+        IDF is computed once over the whole description corpus; only requests
+        whose description is new or changed are scored and re-tagged, one
+        committed page at a time. Tags are derived data: they are stored in
+        SQL without touching write_date, so re-tagging does not resend the
+        requests through the change feed or the incremental refreshes.
+        """
+        if not ml_utils.ML_AVAILABLE:
+            return False
+
+        self.flush_model(['description', 'keywords_stale'])
+        cr = self.env.cr
+        cr.execute("SELECT 1 FROM gear_maintenance_request WHERE keywords_stale LIMIT 1")
+        if not cr.fetchone():
+            return True
+
+        cr.execute("""
+            SELECT description FROM gear_maintenance_request
+            WHERE description IS NOT NULL AND description != ''
+        """)
+        extractor = ml_utils.KeywordExtractor()
+        if not extractor.fit(row[0] for row in cr.fetchall()):
+            return False
+
+        Tag = self.env['gear.maintenance.tag']
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        last_id = 0
+        while True:
+            # Requests being edited are skipped: their writer keeps them stale
+            cr.execute("""
+                SELECT id, description FROM gear_maintenance_request
+                WHERE keywords_stale AND id > %s
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, [last_id, batch_size])
+            rows = cr.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            request_ids = [row[0] for row in rows]
+            keywords = extractor.extract([row[1] or '' for row in rows], max_keywords)
+            tag_map = Tag._get_or_create({kw for kws in keywords for kw in kws})
+            pairs = [
+                (request_id, tag_map[kw])
+                for request_id, kws in zip(request_ids, keywords) for kw in set(kws) if kw in tag_map
+            ]
+
+            cr.execute("DELETE FROM gear_maintenance_request_tag_rel WHERE request_id = ANY(%s)", [request_ids])
+            if pairs:
+                cr.execute("""
+                    INSERT INTO gear_maintenance_request_tag_rel (request_id, tag_id)
+                    SELECT * FROM unnest(%s::int[], %s::int[])
+                    ON CONFLICT DO NOTHING
+                """, [[pair[0] for pair in pairs], [pair[1] for pair in pairs]])
+            cr.execute(
+                "UPDATE gear_maintenance_request SET keywords_stale = FALSE WHERE id = ANY(%s)", [request_ids],
+            )
+            self.invalidate_model(['tag_ids', 'keywords_stale'])
+            Tag.invalidate_model()
+            if auto_commit:
+                cr.commit()
+            if len(rows) < batch_size:
+                break
+        return True
+
     @api.model
     def find_similar_issues(self, query, limit=5):
         """
         Find similar maintenance requests using TF-IDF and cosine similarity.
         Falls back to ORM search if ML libraries are not available.
         """
+        return self._search_similar_issues(query, limit=limit)[0]
+
+    def _get_similarity_cache(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return ml_utils.get_similarity_cache(
+            max_entries=int(ICP.get_param(self._SIMILARITY_CACHE_SIZE_PARAM, 256)),
+            max_bytes=int(ICP.get_param(self._SIMILARITY_CACHE_KB_PARAM, 4096)) * 1024,
+        )
+
+    def _search_similar_issues(self, query, limit=5):
+        """
+        Similar past repaired requests, served from the LRU cache when the
+        same normalized query was already answered for the current corpus
+        version.
+
+        Returns:
+            Tuple (results, method) where method is 'tfidf', 'keyword',
+            'keyword_timeout', 'keyword_saturated' or 'keyword_error'
+        """
         if not query:
-            return []
+            return [], 'keyword'
+
+        # Answers are cached per corpus version: any change to a repaired request bumps it
+        cache = self._get_similarity_cache()
+        cache_key = (
+            self.env.cr.dbname, self._get_similarity_version(), ml_utils.preprocess_text(query), int(limit),
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return [dict(row) for row in cached[0]], cached[1]
 
-        all_requests = self.search([
+        results, method = self._rank_similar_issues(query, limit)
+        # Degraded answers are not cached, the next call deserves another try
+        if method in ('tfidf', 'keyword'):
+            cache.put(cache_key, (results, method))
+        return [dict(row) for row in results], method
+
+    def _rank_similar_issues(self, query, limit):
+        """
+        Rank past repaired requests against the query.
+        The corpus is read here, on the request's cursor; only the TF-IDF
+        ranking runs on the bounded similarity pool, under a deadline. When
+        the pool is saturated or the deadline passes, the keyword search
+        answers instead.
+        """
+        corpus = self.search_read([
             ('state', '=', 'repaired'),
             ('description', '!=', False),
-        ], limit=500)
+        ], ['name', 'description', 'equipment_id', 'state'], limit=500)
 
-        if not all_requests:
-            return []
+        if not corpus:
+            return [], 'keyword'
 
-        if ML_AVAILABLE and len(all_requests) >= 2:
+        method = 'keyword'
+        if ml_utils.ML_AVAILABLE and len(corpus) >= 2:
+            ICP = self.env['ir.config_parameter'].sudo()
+            pool = ml_utils.get_similarity_pool(
+                max_workers=int(ICP.get_param(self._SIMILARITY_POOL_PARAM, 2)),
+                queue_depth=int(ICP.get_param(self._SIMILARITY_QUEUE_PARAM, 8)),
+            )
+            timeout = int(ICP.get_param(self._SIMILARITY_TIMEOUT_PARAM, 2000)) / 1000.0
             try:
-                descriptions = [r.description or '' for r in all_requests]
-                descriptions.append(query)
-                
-                vectorizer = TfidfVectorizer(
-                    stop_words='english',
-                    max_features=1000,
-                    ngram_range=(1, 2),
+                ranked = pool.run(
+                    ml_utils.rank_similar,
+                    [row['description'] or '' for row in corpus], query, limit,
+                    timeout=timeout,
                 )
-                tfidf_matrix = vectorizer.fit_transform(descriptions)
-                
-                query_vector = tfidf_matrix[-1]
-                doc_vectors = tfidf_matrix[:-1]
-                
-                similarities = cosine_similarity(query_vector, doc_vectors).flatten()
-                
-                top_indices = similarities.argsort()[-limit:][::-1]
-                
-                result = []
-                for idx in top_indices:
-                    if similarities[idx] > 0.1:
-                        request = all_requests[idx]
-                        result.append({
-                            'id': request.id,
-                            'name': request.name,
-                            'description': request.description,
-                            'similarity_score': float(similarities[idx]),
-                            'equipment_name': request.equipment_id.name,
-                            'state': request.state,
-                        })
-                return result
+                return [{
+                    'id': corpus[idx]['id'],
+                    'name': corpus[idx]['name'],
+                    'description': corpus[idx]['description'],
+                    'similarity_score': score,
+                    'equipment_name': corpus[idx]['equipment_id'] and corpus[idx]['equipment_id'][1],
+                    'state': corpus[idx]['state'],
+                } for idx, score in ranked], 'tfidf'
+            except ml_utils.FutureTimeoutError:
+                method = 'keyword_timeout'
+            except ml_utils.PoolSaturated:
+                method = 'keyword_saturated'
             except Exception:
-                pass
+                method = 'keyword_error'
+
+        return self._find_similar_by_keywords(query, limit), method
 
-        # Fallback to ORM search
+    def _find_similar_by_keywords(self, query, limit=5):
+        """Cheap fallback: repaired requests whose name or description contains the first words."""
         words = query.lower().split()
         domain = [('state', '=', 'repaired')]
         for word in words[:3]:
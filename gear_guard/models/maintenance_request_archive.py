@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from datetime import timedelta
+
+from odoo import models, fields, api, tools
+
+_logger = logging.getLogger(__name__)
+
+
+class GearMaintenanceRequestArchive(models.Model):
+    """
+    Cold storage for closed maintenance requests. Old repaired and scrap
+    requests are moved here by the archival cron so the live table only
+    holds recent work; their chatter is re-attached to the archived copy.
+    """
+    _name = 'gear.maintenance.request.archive'
+    _description = 'Archived Maintenance Request'
+    _inherit = ['mail.thread']
+    _order = 'scheduled_date desc, id desc'
+
+    original_id = fields.Integer(
+        string='Original Request ID',
+        required=True,
+        readonly=True,
+        index=True,
+    )
+    name = fields.Char(
+        string='Request Title',
+        required=True,
+        readonly=True,
+    )
+    description = fields.Text(
+        string='Description',
+        readonly=True,
+    )
+    equipment_id = fields.Many2one(
+        comodel_name='gear.equipment',
+        string='Equipment',
+        index=True,
+        readonly=True,
+        ondelete='set null',
+    )
+    team_id = fields.Many2one(
+        comodel_name='gear.maintenance.team',
+        string='Maintenance Team',
+        readonly=True,
+        ondelete='set null',
+    )
+    assigned_user_id = fields.Many2one(
+        comodel_name='res.users',
+        string='Assigned Technician',
+        readonly=True,
+        ondelete='set null',
+    )
+    equipment_category_id = fields.Many2one(
+        comodel_name='gear.equipment.category',
+        string='Equipment Category',
+        readonly=True,
+        ondelete='set null',
+    )
+    schedule_id = fields.Many2one(
+        comodel_name='gear.maintenance.schedule',
+        string='Preventive Schedule',
+        index=True,
+        readonly=True,
+        ondelete='set null',
+    )
+    schedule_usage_reading = fields.Float(
+        string='Usage Reading at Generation',
+        readonly=True,
+    )
+    request_type = fields.Selection(
+        selection=[
+            ('corrective', 'Corrective'),
+            ('preventive', 'Preventive'),
+        ],
+        string='Request Type',
+        readonly=True,
+    )
+    state = fields.Selection(
+        selection=[
+            ('repaired', 'Repaired'),
+            ('scrap', 'Scrap'),
+        ],
+        string='Status',
+        readonly=True,
+    )
+    priority = fields.Selection(
+        selection=[
+            ('0', 'Low'),
+            ('1', 'Normal'),
+            ('2', 'High'),
+            ('3', 'Urgent'),
+        ],
+        string='Priority',
+        readonly=True,
+    )
+    scheduled_date = fields.Datetime(
+        string='Scheduled Date',
+        index=True,
+        readonly=True,
+    )
+    completion_date = fields.Datetime(
+        string='Completion Date',
+        readonly=True,
+    )
+    duration_hours = fields.Float(
+        string='Duration (Hours)',
+        readonly=True,
+    )
+    request_create_date = fields.Datetime(
+        string='Requested On',
+        readonly=True,
+    )
+    tag_names = fields.Char(
+        string='Tags',
+        readonly=True,
+    )
+
+    _sql_constraints = [
+        ('original_id_uniq', 'unique (original_id)', 'A request can only be archived once.'),
+    ]
+
+    _AGE_PARAM = 'gear_guard.archive_after_days'
+    _WATERMARK_PARAM = 'gear_guard.archive_watermark'
+    _SCHEDULED_UNTIL_PARAM = 'gear_guard.archive_scheduled_until'
+    _BATCH_SIZE = 1000
+    _MAX_BATCHES_PER_RUN = 50
+
+    def init(self):
+        # Candidate scan of the archival cron: closed requests by age
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS gear_maintenance_request_archivable_index
+            ON gear_maintenance_request (COALESCE(completion_date, write_date), id)
+            WHERE state IN ('repaired', 'scrap')
+        """)
+        tools.create_index(
+            self.env.cr, 'gear_maintenance_request_archive_day_index', self._table,
+            ['(COALESCE(scheduled_date, request_create_date)::date)'],
+        )
+        # Archives made before the latest scheduled date was tracked
+        ICP = self.env['ir.config_parameter'].sudo()
+        if ICP.get_param(self._WATERMARK_PARAM) and not ICP.get_param(self._SCHEDULED_UNTIL_PARAM):
+            self.env.cr.execute(f"SELECT MAX(scheduled_date) FROM {self._table}")
+            scheduled_until = self.env.cr.fetchone()[0]
+            if scheduled_until:
+                ICP.set_param(self._SCHEDULED_UNTIL_PARAM, fields.Datetime.to_string(scheduled_until))
+
+    @api.model
+    def _request_history_query(self):
+        """
+        SQL of live and archived requests together, for reports that must
+        keep their history (snapshots, reliability, usage schedules).
+        Archived rows expose the original request id and their original
+        create_date, and are never active-filtered nor overdue.
+        """
+        return """(
+            SELECT id, equipment_id, team_id, equipment_category_id, schedule_id,
+                   schedule_usage_reading, request_type, state, scheduled_date,
+                   completion_date, duration_hours, create_date, is_overdue, active
+            FROM gear_maintenance_request
+            UNION ALL
+            SELECT original_id, equipment_id, team_id, equipment_category_id, schedule_id,
+                   schedule_usage_reading, request_type, state, scheduled_date,
+                   completion_date, duration_hours, request_create_date, FALSE, TRUE
+            FROM gear_maintenance_request_archive
+        )"""
+
+    @api.model
+    def _get_watermark(self):
+        """Requests closed before this date may live in cold storage (None if nothing was archived)."""
+        watermark = self.env['ir.config_parameter'].sudo().get_param(self._WATERMARK_PARAM)
+        return fields.Datetime.to_datetime(watermark) if watermark else None
+
+    @api.model
+    def _get_scheduled_until(self):
+        """Latest scheduled date of an archived request (None if none is scheduled)."""
+        scheduled_until = self.env['ir.config_parameter'].sudo().get_param(self._SCHEDULED_UNTIL_PARAM)
+        return fields.Datetime.to_datetime(scheduled_until) if scheduled_until else None
+
+    @api.model
+    def _archive_batch(self, cutoff):
+        """
+        Move one batch of closed requests older than cutoff to cold storage.
+        Rows locked by a running transaction are skipped, not waited for.
+
+        Returns:
+            Number of archived requests
+        """
+        Request = self.env['gear.maintenance.request']
+        Request.flush_model()
+        cr = self.env.cr
+        cr.execute("""
+            SELECT id FROM gear_maintenance_request
+            WHERE state IN ('repaired', 'scrap')
+              AND COALESCE(completion_date, write_date) < %s
+            ORDER BY COALESCE(completion_date, write_date), id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, [cutoff, self._BATCH_SIZE])
+        request_ids = [row[0] for row in cr.fetchall()]
+        if not request_ids:
+            return 0
+
+        # The API filters on scheduled_date, not on the closing date of the
+        # watermark: publish how far the archived schedule reaches, in the
+        # transaction that moves the rows
+        cr.execute("SELECT MAX(scheduled_date) FROM gear_maintenance_request WHERE id IN %s", [tuple(request_ids)])
+        batch_until = cr.fetchone()[0]
+        scheduled_until = self._get_scheduled_until()
+        if batch_until and (not scheduled_until or batch_until > scheduled_until):
+            self.env['ir.config_parameter'].sudo().set_param(
+                self._SCHEDULED_UNTIL_PARAM, fields.Datetime.to_string(batch_until),
+            )
+
+        cr.execute("""
+            INSERT INTO gear_maintenance_request_archive (
+                original_id, name, description, equipment_id, team_id, assigned_user_id,
+                equipment_category_id, schedule_id, schedule_usage_reading, request_type,
+                state, priority, scheduled_date, completion_date, duration_hours,
+                request_create_date, tag_names,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT r.id, r.name, r.description, r.equipment_id, r.team_id, r.assigned_user_id,
+                   r.equipment_category_id, r.schedule_id, r.schedule_usage_reading, r.request_type,
+                   r.state, r.priority, r.scheduled_date, r.completion_date, r.duration_hours,
+                   r.create_date,
+                   (SELECT string_agg(t.name, ', ' ORDER BY t.name)
+                    FROM gear_maintenance_request_tag_rel rel
+                    JOIN gear_maintenance_tag t ON t.id = rel.tag_id
+                    WHERE rel.request_id = r.id),
+                   %s, now() at time zone 'UTC', %s, now() at time zone 'UTC'
+            FROM gear_maintenance_request r
+            WHERE r.id IN %s
+            RETURNING original_id, id
+        """, [self.env.uid, self.env.uid, tuple(request_ids)])
+        mapping = cr.fetchall()
+
+        # Re-attach chatter (and its tracking values) before unlink() would delete it
+        cr.execute("""
+            UPDATE mail_message m
+            SET model = %s, res_id = map.archive_id
+            FROM unnest(%s::int[], %s::int[]) AS map(request_id, archive_id)
+            WHERE m.model = %s AND m.res_id = map.request_id
+        """, [self._name, [row[0] for row in mapping], [row[1] for row in mapping], Request._name])
+        self.env['mail.message'].invalidate_model(['model', 'res_id'])
+
+        Request.browse(request_ids).with_context(gear_cold_archive=True).unlink()
+        self.invalidate_model()
+        return len(request_ids)
+
+    @api.model
+    def cron_archive_requests(self):
+        """
+        Cron job moving closed requests older than gear_guard.archive_after_days
+        to cold storage, in batches committed one by one (0 disables archival).
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        days = int(ICP.get_param(self._AGE_PARAM, 365))
+        if days <= 0:
+            return True
+        cutoff = fields.Datetime.now() - timedelta(days=days)
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+
+        # Publish the watermark first: the API must look into cold storage as
+        # soon as the first batch is committed
+        watermark = self._get_watermark()
+        if not watermark or watermark < cutoff:
+            ICP.set_param(self._WATERMARK_PARAM, fields.Datetime.to_string(cutoff))
+
+        archived = 0
+        for _batch in range(self._MAX_BATCHES_PER_RUN):
+            count = self._archive_batch(cutoff)
+            if auto_commit:
+                self.env.cr.commit()
+            archived += count
+            if count < self._BATCH_SIZE:
+                break
+        _logger.info("Archived %d closed maintenance requests older than %s", archived, cutoff)
+        return True
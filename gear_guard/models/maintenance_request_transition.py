@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools
+
+_STATES = [
+    ('new', 'New'),
+    ('in_progress', 'In Progress'),
+    ('repaired', 'Repaired'),
+    ('scrap', 'Scrap'),
+]
+
+
+class GearMaintenanceRequestTransition(models.Model):
+    """
+    Append-only log of request state changes, one row per change (and one
+    for the creation). Each row carries the time spent in the state being
+    left, so dwell times are a plain SUM/AVG grouped by from_state. Rows
+    only reference the request by id and keep the equipment name: they
+    outlive cold-storage archival and the deletion of the request or of
+    its equipment.
+    """
+    _name = 'gear.maintenance.request.transition'
+    _description = 'Maintenance Request State Transition'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    request_id = fields.Integer(
+        string='Request ID',
+        required=True,
+        readonly=True,
+        index=True,
+    )
+    equipment_id = fields.Many2one(
+        comodel_name='gear.equipment',
+        string='Equipment',
+        index=True,
+        readonly=True,
+        ondelete='set null',
+    )
+    equipment_name = fields.Char(
+        string='Equipment Name',
+        readonly=True,
+    )
+    team_id = fields.Many2one(
+        comodel_name='gear.maintenance.team',
+        string='Maintenance Team',
+        readonly=True,
+        ondelete='set null',
+    )
+    user_id = fields.Many2one(
+        comodel_name='res.users',
+        string='Changed By',
+        readonly=True,
+        ondelete='set null',
+    )
+    date = fields.Datetime(
+        string='Date',
+        required=True,
+        readonly=True,
+    )
+    from_state = fields.Selection(
+        selection=_STATES,
+        string='From State',
+        readonly=True,
+        help="Empty for the creation of the request.",
+    )
+    to_state = fields.Selection(
+        selection=_STATES,
+        string='To State',
+        required=True,
+        readonly=True,
+    )
+    hours = fields.Float(
+        string='Hours in From State',
+        readonly=True,
+        group_operator='avg',
+    )
+
+    _GROUP_FIELDS = {
+        'team': 'team_id',
+        'equipment': 'equipment_id',
+    }
+
+    def init(self):
+        # Dwell-time reports filter on a period and group by the state left
+        tools.create_index(
+            self.env.cr,
+            'gear_maintenance_request_transition_date_state_index',
+            self._table,
+            ['date', 'from_state'],
+        )
+        # Rows logged before the equipment name was kept
+        self.env.cr.execute(f"""
+            UPDATE {self._table} t SET equipment_name = e.name
+            FROM gear_equipment e
+            WHERE e.id = t.equipment_id AND t.equipment_name IS NULL
+        """)
+
+    @api.model
+    def _log(self, requests, previous, now):
+        """
+        Append one row per request that just changed state.
+
+        Args:
+            requests: Requests, already in their new state
+            previous: Dict of request id -> (state left, date it was entered);
+                requests missing from it were just created
+            now: Date of the change
+        """
+        vals_list = []
+        for record in requests:
+            from_state, since = previous.get(record.id, (False, now))
+            vals_list.append({
+                'request_id': record.id,
+                'equipment_id': record.equipment_id.id,
+                'equipment_name': record.equipment_id.name,
+                'team_id': record.team_id.id,
+                'user_id': self.env.uid,
+                'date': now,
+                'from_state': from_state,
+                'to_state': record.state,
+                'hours': max((now - since).total_seconds(), 0.0) / 3600.0 if since else 0.0,
+            })
+        return self.sudo().create(vals_list)
+
+    @api.model
+    def get_dwell_stats(self, group_by=None, date_from=None, date_to=None, team_id=None, equipment_id=None):
+        """
+        Time requests spent in each state, from the stays that ended within
+        the period.
+
+        Args:
+            group_by: None, 'team' or 'equipment'
+            date_from / date_to: Period the stays ended in
+
+        Returns:
+            List of dicts with from_state, the group (when grouped),
+            stay_count, total_hours and avg_hours
+        """
+        if group_by and group_by not in self._GROUP_FIELDS:
+            raise ValueError("group_by must be one of: %s" % ', '.join(self._GROUP_FIELDS))
+        domain = [('from_state', '!=', False)]
+        if date_from:
+            domain.append(('date', '>=', date_from))
+        if date_to:
+            domain.append(('date', '<=', date_to))
+        if team_id:
+            domain.append(('team_id', '=', int(team_id)))
+        if equipment_id:
+            domain.append(('equipment_id', '=', int(equipment_id)))
+        groupby = ['from_state']
+        group_field = self._GROUP_FIELDS[group_by] if group_by else None
+        if group_field:
+            groupby.append(group_field)
+
+        groups = self.read_group(domain, ['hours:sum'], groupby, lazy=False)
+        result = []
+        for group in groups:
+            row = {
+                'from_state': group['from_state'],
+                'stay_count': group['__count'],
+                'total_hours': group['hours'],
+                'avg_hours': group['hours'] / group['__count'] if group['__count'] else None,
+            }
+            if group_field:
+                key = group[group_field]
+                row[group_by] = {'id': key[0], 'name': str(key[1])} if key else None
+            result.append(row)
+        return result
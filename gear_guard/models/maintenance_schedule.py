@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+
+class GearMaintenanceSchedule(models.Model):
+    _name = 'gear.maintenance.schedule'
+    _description = 'Preventive Maintenance Schedule'
+    _order = 'next_date, id'
+
+    name = fields.Char(
+        string='Schedule Name',
+        required=True,
+    )
+    active = fields.Boolean(
+        string='Active',
+        default=True,
+    )
+    equipment_id = fields.Many2one(
+        comodel_name='gear.equipment',
+        string='Equipment',
+        index=True,
+        ondelete='cascade',
+        domain="[('is_scrapped', '=', False)]",
+    )
+    category_id = fields.Many2one(
+        comodel_name='gear.equipment.category',
+        string='Equipment Category',
+        index=True,
+        ondelete='cascade',
+        help="Applies to every equipment of this category and its subcategories.",
+    )
+    recurrence_type = fields.Selection(
+        selection=[
+            ('day', 'Days'),
+            ('week', 'Weeks'),
+            ('month', 'Months'),
+            ('usage', 'Usage'),
+        ],
+        string='Repeat Every',
+        default='month',
+        required=True,
+    )
+    interval_number = fields.Integer(
+        string='Interval',
+        default=1,
+        help="Number of days, weeks or months between occurrences.",
+    )
+    usage_interval = fields.Float(
+        string='Usage Interval',
+        help="Create a request each time the equipment usage meter advances by this amount.",
+    )
+    start_date = fields.Datetime(
+        string='First Occurrence',
+        required=True,
+        default=fields.Datetime.now,
+    )
+    occurrence_count = fields.Integer(
+        string='Generated Occurrences',
+        default=0,
+        readonly=True,
+        copy=False,
+    )
+    next_date = fields.Datetime(
+        string='Next Occurrence',
+        index=True,
+        readonly=True,
+        copy=False,
+    )
+    name_template = fields.Char(
+        string='Request Title Template',
+        default='Scheduled Maintenance - {equipment}',
+        required=True,
+        help="Use {equipment} as placeholder for equipment name",
+    )
+    description = fields.Text(
+        string='Description',
+    )
+    duration_hours = fields.Float(
+        string='Duration (Hours)',
+        default=1.0,
+    )
+    priority = fields.Selection(
+        selection=[
+            ('0', 'Low'),
+            ('1', 'Normal'),
+            ('2', 'High'),
+            ('3', 'Urgent'),
+        ],
+        string='Priority',
+        default='1',
+    )
+    request_ids = fields.One2many(
+        comodel_name='gear.maintenance.request',
+        inverse_name='schedule_id',
+        string='Generated Requests',
+    )
+    request_count = fields.Integer(
+        string='Generated Requests',
+        compute='_compute_request_count',
+    )
+
+    _HORIZON_PARAM = 'gear_guard.recurrence_horizon_days'
+    _BATCH_SIZE = 1000
+
+    def init(self):
+        # Safety net for idempotency: an occurrence can only exist once
+        tools.create_unique_index(
+            self.env.cr,
+            'gear_maintenance_request_schedule_occurrence_uniq',
+            'gear_maintenance_request',
+            ['schedule_id', 'equipment_id', 'scheduled_date'],
+        )
+
+    @api.constrains('equipment_id', 'category_id')
+    def _check_target(self):
+        for record in self:
+            if bool(record.equipment_id) == bool(record.category_id):
+                raise ValidationError(_('A schedule applies to either one equipment or one category.'))
+
+    @api.constrains('recurrence_type', 'interval_number', 'usage_interval')
+    def _check_interval(self):
+        for record in self:
+            if record.recurrence_type == 'usage' and record.usage_interval <= 0:
+                raise ValidationError(_('Usage interval must be positive.'))
+            if record.recurrence_type != 'usage' and record.interval_number <= 0:
+                raise ValidationError(_('Interval must be positive.'))
+
+    def _compute_request_count(self):
+        groups = self.env['gear.maintenance.request'].read_group(
+            [('schedule_id', 'in', self.ids)], ['schedule_id'], ['schedule_id'],
+        )
+        counts = {group['schedule_id'][0]: group['schedule_id_count'] for group in groups}
+        for record in self:
+            record.request_count = counts.get(record.id, 0)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._reset_next_date()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'start_date', 'recurrence_type', 'interval_number'} & set(vals):
+            # Occurrences generated on the old dates would sit next to the new ones
+            self._remove_future_occurrences()
+            self._reset_next_date()
+        return res
+
+    def _remove_future_occurrences(self):
+        """Delete the upcoming occurrences of these schedules that were not started yet."""
+        requests = self.env['gear.maintenance.request'].search([
+            ('schedule_id', 'in', self.ids),
+            ('state', '=', 'new'),
+            ('scheduled_date', '>=', fields.Datetime.now()),
+        ])
+        requests.unlink()
+
+    def _reset_next_date(self):
+        """Restart the occurrence cursor; existing occurrences are skipped on generation."""
+        # The first occurrence is start_date itself; usage schedules have no cursor
+        self.flush_model(['start_date', 'recurrence_type'])
+        self.env.cr.execute("""
+            UPDATE gear_maintenance_schedule
+            SET occurrence_count = 0,
+                next_date = CASE WHEN recurrence_type = 'usage' THEN NULL ELSE start_date END
+            WHERE id IN %s
+        """, [tuple(self.ids)])
+        self.invalidate_model(['occurrence_count', 'next_date'])
+
+    def _get_occurrence_date(self, index):
+        """Date of the index-th occurrence, always computed from start_date to avoid month-end drift."""
+        self.ensure_one()
+        step = self.interval_number * index
+        if self.recurrence_type == 'day':
+            return self.start_date + timedelta(days=step)
+        if self.recurrence_type == 'week':
+            return self.start_date + timedelta(weeks=step)
+        return self.start_date + relativedelta(months=step)
+
+    def _get_target_equipment(self):
+        """Return {schedule_id: equipment recordset}, with one search per distinct category."""
+        Equipment = self.env['gear.equipment']
+        domain = [('is_scrapped', '=', False)]
+        by_category = {}
+        for category in self.category_id:
+            by_category[category.id] = Equipment.search(domain + [('category_id', 'child_of', category.id)])
+        targets = {}
+        for record in self:
+            if record.equipment_id:
+                equipment = record.equipment_id
+                targets[record.id] = equipment if equipment.active and not equipment.is_scrapped else Equipment
+            else:
+                targets[record.id] = by_category[record.category_id.id]
+        return targets
+
+    def _prepare_request_vals(self, equipment, scheduled_date, usage_reading=0.0):
+        self.ensure_one()
+        return {
+            'name': self.name_template.replace('{equipment}', equipment.name),
+            'equipment_id': equipment.id,
+            'request_type': 'preventive',
+            'description': self.description,
+            'scheduled_date': scheduled_date,
+            'duration_hours': self.duration_hours,
+            'priority': self.priority,
+            'schedule_id': self.id,
+            'schedule_usage_reading': usage_reading,
+        }
+
+    def _generate_time_based(self, horizon):
+        """Materialize occurrences up to the horizon, skipping those already created."""
+        targets = self._get_target_equipment()
+        now = fields.Datetime.now()
+        occurrences = {}
+        cursors = {}
+        for record in self:
+            index = record.occurrence_count
+            dates = []
+            date = record._get_occurrence_date(index)
+            # Occurrences already in the past (e.g. a back-dated start) are not backfilled
+            while date < now:
+                index += 1
+                date = record._get_occurrence_date(index)
+            while date <= horizon:
+                dates.append(date)
+                index += 1
+                date = record._get_occurrence_date(index)
+            occurrences[record.id] = dates
+            cursors[record.id] = (index, date)
+
+        existing = set()
+        min_date = min((dates[0] for dates in occurrences.values() if dates), default=None)
+        if min_date:
+            self.env['gear.maintenance.request'].flush_model(['schedule_id', 'equipment_id', 'scheduled_date'])
+            self.env.cr.execute("""
+                SELECT schedule_id, equipment_id, scheduled_date
+                FROM gear_maintenance_request
+                WHERE schedule_id IN %s AND scheduled_date >= %s
+            """, [tuple(self.ids), min_date])
+            existing = set(self.env.cr.fetchall())
+
+        vals_list = []
+        for record in self:
+            for equipment in targets[record.id]:
+                for date in occurrences[record.id]:
+                    if (record.id, equipment.id, date) not in existing:
+                        vals_list.append(record._prepare_request_vals(equipment, date))
+        self._create_requests(vals_list)
+
+        # Advance every cursor with a single UPDATE
+        self.flush_model()
+        self.env.cr.execute("""
+            UPDATE gear_maintenance_schedule s
+            SET occurrence_count = c.occurrence_count, next_date = c.next_date
+            FROM unnest(%s::int[], %s::int[], %s::timestamp[]) AS c(id, occurrence_count, next_date)
+            WHERE s.id = c.id
+        """, [
+            list(cursors),
+            [cursor[0] for cursor in cursors.values()],
+            [cursor[1] for cursor in cursors.values()],
+        ])
+        self.invalidate_model(['occurrence_count', 'next_date'])
+        return len(vals_list)
+
+    def _generate_usage_based(self):
+        """Create a request when the usage meter has advanced by the interval since the last one."""
+        targets = self._get_target_equipment()
+        Request = self.env['gear.maintenance.request']
+        Request.flush_model(['schedule_id', 'equipment_id', 'schedule_usage_reading', 'state'])
+        # Archived requests still carry the last reading a request was generated at
+        all_requests = self.env['gear.maintenance.request.archive']._request_history_query()
+        self.env.cr.execute(f"""
+            SELECT schedule_id, equipment_id,
+                   MAX(schedule_usage_reading),
+                   BOOL_OR(state IN ('new', 'in_progress'))
+            FROM {all_requests} r
+            WHERE schedule_id IN %s
+            GROUP BY schedule_id, equipment_id
+        """, [tuple(self.ids)])
+        history = {(row[0], row[1]): (row[2] or 0.0, row[3]) for row in self.env.cr.fetchall()}
+
+        now = fields.Datetime.now()
+        vals_list = []
+        for record in self:
+            for equipment in targets[record.id]:
+                last_reading, has_open = history.get((record.id, equipment.id), (0.0, False))
+                if not has_open and equipment.usage_reading - last_reading >= record.usage_interval:
+                    vals_list.append(record._prepare_request_vals(equipment, now, equipment.usage_reading))
+        self._create_requests(vals_list)
+        return len(vals_list)
+
+    @api.model
+    def _create_requests(self, vals_list):
+        Request = self.env['gear.maintenance.request'].with_context(
+            tracking_disable=True,
+            mail_create_nolog=True,
+            mail_create_nosubscribe=True,
+        )
+        for start in range(0, len(vals_list), self._BATCH_SIZE):
+            Request.create(vals_list[start:start + self._BATCH_SIZE])
+
+    def action_generate_occurrences(self):
+        """Generate the occurrences of these schedules up to the horizon."""
+        horizon_days = int(self.env['ir.config_parameter'].sudo().get_param(self._HORIZON_PARAM, 30))
+        horizon = fields.Datetime.now() + timedelta(days=horizon_days)
+        created = 0
+        time_based = self.filtered(lambda s: s.active and s.recurrence_type != 'usage')
+        if time_based:
+            created += time_based._generate_time_based(horizon)
+        usage_based = self.filtered(lambda s: s.active and s.recurrence_type == 'usage')
+        if usage_based:
+            created += usage_based._generate_usage_based()
+        return created
+
+    @api.model
+    def cron_generate_occurrences(self):
+        """
+        Cron job to expand all schedules up to the rolling horizon.
+        Schedules are processed in batches, committing after each one; the
+        generation is idempotent so an interrupted run can simply be resumed.
+        """
+        horizon_days = int(self.env['ir.config_parameter'].sudo().get_param(self._HORIZON_PARAM, 30))
+        horizon = fields.Datetime.now() + timedelta(days=horizon_days)
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+
+        schedules = self.search([
+            '|',
+            ('recurrence_type', '=', 'usage'),
+            ('next_date', '<=', horizon),
+        ], order='id')
+        created = 0
+        for start in range(0, len(schedules), self._BATCH_SIZE):
+            created += schedules[start:start + self._BATCH_SIZE].action_generate_occurrences()
+            if auto_commit:
+                self.env.cr.commit()
+        _logger.info("Generated %d preventive maintenance requests from %d schedules", created, len(schedules))
+        return True
+
+    def action_view_requests(self):
+        """Smart button action to view generated requests."""
+        self.ensure_one()
+        return {
+            'name': _('Generated Requests'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'gear.maintenance.request',
+            'view_mode': 'tree,kanban,form,calendar',
+            'domain': [('schedule_id', '=', self.id)],
+            'context': {},
+        }
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import models, fields, api, tools
+
+
+class GearMaintenanceSnapshot(models.Model):
+    _name = 'gear.maintenance.snapshot'
+    _description = 'Daily Maintenance Snapshot'
+    _order = 'date desc, id desc'
+
+    date = fields.Date(
+        string='Date',
+        required=True,
+        index=True,
+        readonly=True,
+        help="Day the requests are scheduled on (creation day when unscheduled).",
+    )
+    team_id = fields.Many2one(
+        comodel_name='gear.maintenance.team',
+        string='Maintenance Team',
+        index=True,
+        readonly=True,
+        ondelete='set null',
+    )
+    category_id = fields.Many2one(
+        comodel_name='gear.equipment.category',
+        string='Equipment Category',
+        index=True,
+        readonly=True,
+        ondelete='set null',
+    )
+    request_count = fields.Integer(string='Requests', readonly=True, group_operator='sum')
+    new_count = fields.Integer(string='New', readonly=True, group_operator='sum')
+    in_progress_count = fields.Integer(string='In Progress', readonly=True, group_operator='sum')
+    repaired_count = fields.Integer(string='Repaired', readonly=True, group_operator='sum')
+    scrap_count = fields.Integer(string='Scrap', readonly=True, group_operator='sum')
+    corrective_count = fields.Integer(string='Corrective', readonly=True, group_operator='sum')
+    preventive_count = fields.Integer(string='Preventive', readonly=True, group_operator='sum')
+    overdue_count = fields.Integer(string='Overdue', readonly=True, group_operator='sum')
+    duration_hours = fields.Float(string='Duration (Hours)', readonly=True, group_operator='sum')
+
+    _LAST_RUN_PARAM = 'gear_guard.snapshot_last_run'
+    _TREND_INTERVALS = ('day', 'week', 'month', 'quarter', 'year')
+    _TREND_MEASURES = (
+        'request_count', 'new_count', 'in_progress_count', 'repaired_count', 'scrap_count',
+        'corrective_count', 'preventive_count', 'overdue_count', 'duration_hours',
+    )
+
+    def init(self):
+        # Lets the incremental refresh fetch the requests of a few days by index
+        tools.create_index(
+            self.env.cr,
+            'gear_maintenance_request_snapshot_day_index',
+            'gear_maintenance_request',
+            ['(COALESCE(scheduled_date, create_date)::date)'],
+        )
+        # Days a request left (rescheduled or deleted): the write_date scan
+        # of the refresh only sees the day a request is on now
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS gear_maintenance_snapshot_dirty_day (
+                day date PRIMARY KEY
+            )
+        """)
+
+    @api.model
+    def _mark_days_dirty(self, request_ids):
+        """Queue the current days of these requests for the next refresh."""
+        if not request_ids:
+            return
+        self.env['gear.maintenance.request'].flush_model(['scheduled_date'])
+        self.env.cr.execute("""
+            INSERT INTO gear_maintenance_snapshot_dirty_day (day)
+            SELECT DISTINCT COALESCE(scheduled_date, create_date)::date
+            FROM gear_maintenance_request
+            WHERE id = ANY(%s)
+            ON CONFLICT DO NOTHING
+        """, [list(request_ids)])
+
+    @api.model
+    def _pop_dirty_days(self):
+        self.env.cr.execute("DELETE FROM gear_maintenance_snapshot_dirty_day RETURNING day")
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _refresh_days(self, days=None):
+        """
+        Rebuild snapshot rows for the given days with one set-based
+        DELETE + INSERT ... SELECT. Rebuilds every day when days is None.
+        Requests moved to cold storage are included, so rebuilt history
+        stays complete; requests deactivated (active = False) are left out.
+        """
+        self.env['gear.maintenance.request'].flush_model()
+        history = self.env['gear.maintenance.request.archive']._request_history_query()
+        cr = self.env.cr
+        day_expr = "COALESCE(r.scheduled_date, r.create_date)::date"
+        where = "r.active"
+        params = []
+        if days is not None:
+            if not days:
+                return 0
+            where += f" AND {day_expr} IN %s"
+            params.append(tuple(days))
+            cr.execute("DELETE FROM gear_maintenance_snapshot WHERE date IN %s", [tuple(days)])
+        else:
+            cr.execute("DELETE FROM gear_maintenance_snapshot")
+
+        cr.execute(f"""
+            INSERT INTO gear_maintenance_snapshot (
+                date, team_id, category_id, request_count,
+                new_count, in_progress_count, repaired_count, scrap_count,
+                corrective_count, preventive_count, overdue_count, duration_hours,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT {day_expr}, r.team_id, r.equipment_category_id, COUNT(*),
+                   COUNT(*) FILTER (WHERE r.state = 'new'),
+                   COUNT(*) FILTER (WHERE r.state = 'in_progress'),
+                   COUNT(*) FILTER (WHERE r.state = 'repaired'),
+                   COUNT(*) FILTER (WHERE r.state = 'scrap'),
+                   COUNT(*) FILTER (WHERE r.request_type = 'corrective'),
+                   COUNT(*) FILTER (WHERE r.request_type = 'preventive'),
+                   COUNT(*) FILTER (WHERE r.is_overdue),
+                   COALESCE(SUM(r.duration_hours), 0),
+                   %s, now() at time zone 'UTC', %s, now() at time zone 'UTC'
+            FROM {history} r
+            WHERE {where}
+            GROUP BY 1, r.team_id, r.equipment_category_id
+        """, [self.env.uid, self.env.uid] + params)
+        inserted = cr.rowcount
+        self.invalidate_model()
+        return inserted
+
+    @api.model
+    def get_trend(self, date_from=None, date_to=None, interval='month', team_id=None, category_id=None):
+        """
+        Aggregate snapshot rows into periods.
+
+        Returns:
+            List of dicts with 'period' (first day of the period) and one key per measure
+        """
+        if interval not in self._TREND_INTERVALS:
+            raise ValueError("interval must be one of: %s" % ', '.join(self._TREND_INTERVALS))
+
+        self.flush_model()
+        conditions = ['TRUE']
+        params = [interval]
+        if date_from:
+            conditions.append('date >= %s')
+            params.append(date_from)
+        if date_to:
+            conditions.append('date <= %s')
+            params.append(date_to)
+        if team_id:
+            conditions.append('team_id = %s')
+            params.append(int(team_id))
+        if category_id:
+            conditions.append("""category_id IN (
+                SELECT sub.id FROM gear_equipment_category sub, gear_equipment_category root
+                WHERE root.id = %s AND sub.parent_path LIKE root.parent_path || '%%'
+            )""")
+            params.append(int(category_id))
+
+        sums = ', '.join(f'SUM({measure})' for measure in self._TREND_MEASURES)
+        self.env.cr.execute(f"""
+            SELECT date_trunc(%s, date)::date AS period, {sums}
+            FROM gear_maintenance_snapshot
+            WHERE {' AND '.join(conditions)}
+            GROUP BY period
+            ORDER BY period
+        """, params)
+        result = []
+        for row in self.env.cr.fetchall():
+            values = dict(zip(self._TREND_MEASURES, row[1:]))
+            values = {key: (float(val) if key == 'duration_hours' else int(val)) for key, val in values.items()}
+            values['period'] = row[0]
+            result.append(values)
+        return result
+
+    @api.model
+    def cron_update_snapshots(self):
+        """
+        Cron job to refresh the daily snapshot table.
+        Only days touched since the last run are rebuilt: days of requests
+        written since then, days requests were moved away from or deleted
+        on, plus the days elapsed since the last run.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        last_run = ICP.get_param(self._LAST_RUN_PARAM)
+        now = fields.Datetime.now()
+
+        dirty_days = self._pop_dirty_days()
+        if not last_run:
+            self._refresh_days()
+        else:
+            last_run = fields.Datetime.to_datetime(last_run)
+            self.env['gear.maintenance.request'].flush_model()
+            self.env.cr.execute("""
+                SELECT DISTINCT COALESCE(scheduled_date, create_date)::date
+                FROM gear_maintenance_request
+                WHERE write_date >= %s
+            """, [last_run])
+            days = {row[0] for row in self.env.cr.fetchall()} | dirty_days
+            day = last_run.date()
+            while day <= now.date():
+                days.add(day)
+                day += timedelta(days=1)
+            self._refresh_days(days)
+
+        ICP.set_param(self._LAST_RUN_PARAM, fields.Datetime.to_string(now))
+        return True
+
+    @api.model
+    def action_rebuild_snapshots(self):
+        """Rebuild the whole snapshot table from live requests."""
+        self._pop_dirty_days()
+        self._refresh_days()
+        self.env['ir.config_parameter'].sudo().set_param(
+            self._LAST_RUN_PARAM, fields.Datetime.to_string(fields.Datetime.now())
+        )
+        return True
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+
+
+class GearMaintenanceTag(models.Model):
+    _name = 'gear.maintenance.tag'
+    _description = 'Maintenance Request Tag'
+    _order = 'name'
+
+    name = fields.Char(
+        string='Tag Name',
+        required=True,
+    )
+    color = fields.Integer(
+        string='Color',
+    )
+    active = fields.Boolean(
+        string='Active',
+        default=True,
+    )
+
+    _sql_constraints = [
+        ('name_uniq', 'unique (name)', 'Tag name must be unique.'),
+    ]
+
+    @api.model
+    def _get_or_create(self, names):
+        """Return a {name: tag_id} map, creating missing tags in one batch."""
+        names = {name for name in names if name}
+        if not names:
+            return {}
+        existing = self.with_context(active_test=False).search([('name', 'in', list(names))])
+        tag_map = {tag.name: tag.id for tag in existing}
+        missing = names - set(tag_map)
+        if missing:
+            created = self.create([{'name': name} for name in sorted(missing)])
+            tag_map.update({tag.name: tag.id for tag in created})
+        return tag_map
@@ -43,6 +43,14 @@ class GearMaintenanceTeam(models.Model):
         string='Open Requests',
         compute='_compute_maintenance_request_count',
     )
+    mttr_hours = fields.Float(
+        string='MTTR (Hours)',
+        compute='_compute_reliability',
+    )
+    mtbf_hours = fields.Float(
+        string='MTBF (Hours)',
+        compute='_compute_reliability',
+    )
 
     def _compute_equipment_count(self):
         for record in self:
@@ -60,6 +68,22 @@ class GearMaintenanceTeam(models.Model):
                 lambda r: r.state in ['new', 'in_progress']
             ))
 
+    def _compute_reliability(self):
+        groups = self.env['gear.equipment.reliability'].sudo().read_group(
+            [('team_id', 'in', self.ids)],
+            ['repair_count:sum', 'total_repair_hours:sum', 'gap_count:sum', 'total_uptime_hours:sum'],
+            ['team_id'],
+        )
+        totals = {group['team_id'][0]: group for group in groups}
+        for record in self:
+            group = totals.get(record.id)
+            record.mttr_hours = group['total_repair_hours'] / group['repair_count'] if group and group['repair_count'] else 0.0
+            record.mtbf_hours = group['total_uptime_hours'] / group['gap_count'] if group and group['gap_count'] else 0.0
+
+    def unlink(self):
+        self.env['gear.change.tombstone']._record_deletion(self)
+        return super().unlink()
+
     def action_view_equipment(self):
         """Smart button action to view related equipment."""
         self.ensure_one()
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import hashlib
+import logging
+from datetime import date, datetime
+
+from odoo import models, api
+
+from ..utils import serialization
+
+_logger = logging.getLogger(__name__)
+
+
+class GearOfflineBundle(models.AbstractModel):
+    """
+    Offline bootstrap bundles for field tablets: everything a maintenance
+    team works with (team, technicians, categories, equipment and open
+    requests) in one compressed columnar snapshot. A bundle is built once
+    per data version of the team and kept as an attachment, so every
+    tablet of the team downloads the same prebuilt file.
+
+    Layout: MAGIC, then gzip of a JSON object of tables. Each table is a
+    dict of equal-length columns; 'id' columns are delta-encoded (first id,
+    then gaps), references are row indexes into the referenced table (-1
+    when empty), repeated strings are {'dict': [...], 'codes': [...]},
+    dates are days and datetimes seconds since 1970-01-01 (UTC).
+    """
+    _name = 'gear.offline.bundle'
+    _description = 'Offline Bootstrap Bundle'
+
+    MAGIC = b'GGOB\x01'
+    _FORMAT_VERSION = 1
+    _ATTACHMENT_PREFIX = 'gear_offline_bundle'
+    _LOCK_NAMESPACE = 0x6762  # advisory lock namespace of bundle builds
+    _GZIP_LEVEL = 9
+    _EPOCH_DATE = date(1970, 1, 1)
+    _EPOCH = datetime(1970, 1, 1)
+
+    # ---------------------------------------------------------------- encoding
+
+    @api.model
+    def _delta(self, ids):
+        return [ids[0]] + [b - a for a, b in zip(ids, ids[1:])] if ids else []
+
+    @api.model
+    def _dictionary(self, values):
+        index = {}
+        codes = [index.setdefault(value, len(index)) for value in values]
+        return {'dict': list(index), 'codes': codes}
+
+    @api.model
+    def _days(self, value):
+        return (value - self._EPOCH_DATE).days if value else None
+
+    @api.model
+    def _seconds(self, value):
+        return int((value - self._EPOCH).total_seconds()) if value else None
+
+    # ---------------------------------------------------------------- dataset
+
+    @api.model
+    def _get_version(self, team):
+        """
+        Data version of a team's bundle: changes whenever a record in it is
+        created, written, deleted, archived or leaves the open states.
+        """
+        for model_name in ('gear.maintenance.team', 'gear.equipment', 'gear.maintenance.request',
+                           'gear.equipment.category', 'res.users', 'res.partner'):
+            self.env[model_name].flush_model()
+        self.env.cr.execute("""
+            WITH req AS (
+                SELECT id, equipment_id, assigned_user_id, write_date
+                FROM gear_maintenance_request
+                WHERE team_id = %(team)s AND state IN ('new', 'in_progress') AND active
+            ), eq AS (
+                SELECT id, category_id, default_technician_id, write_date
+                FROM gear_equipment
+                WHERE (maintenance_team_id = %(team)s AND active AND NOT COALESCE(is_scrapped, FALSE))
+                   OR id IN (SELECT equipment_id FROM req)
+            ), usr AS (
+                SELECT user_id AS id FROM gear_maintenance_team_users_rel WHERE team_id = %(team)s
+                UNION SELECT assigned_user_id FROM req
+                UNION SELECT default_technician_id FROM eq
+            )
+            SELECT (SELECT write_date FROM gear_maintenance_team WHERE id = %(team)s),
+                   (SELECT COUNT(*) FROM req), (SELECT MAX(write_date) FROM req),
+                   (SELECT COUNT(*) FROM eq), (SELECT MAX(write_date) FROM eq),
+                   (SELECT MAX(write_date) FROM gear_equipment_category
+                    WHERE id IN (SELECT category_id FROM eq)),
+                   (SELECT COUNT(*) FROM usr),
+                   (SELECT MAX(GREATEST(u.write_date, p.write_date))
+                    FROM res_users u JOIN res_partner p ON p.id = u.partner_id
+                    WHERE u.id IN (SELECT id FROM usr))
+        """, {'team': team.id})
+        state = repr((self._FORMAT_VERSION, team.id, self.env.cr.fetchone()))
+        return hashlib.sha1(state.encode()).hexdigest()[:20]
+
+    @api.model
+    def _build_payload(self, team):
+        """Columnar tables of everything the team needs offline."""
+        Request = self.env['gear.maintenance.request']
+        Equipment = self.env['gear.equipment']
+        requests = Request.search_fetch([
+            ('team_id', '=', team.id), ('state', 'in', ('new', 'in_progress')),
+        ], [
+            'name', 'description', 'equipment_id', 'assigned_user_id', 'state', 'request_type',
+            'priority', 'scheduled_date', 'duration_hours', 'is_overdue', 'queue_rank',
+        ], order='id')
+        equipment = Equipment.search([
+            ('maintenance_team_id', '=', team.id), ('is_scrapped', '=', False),
+        ], order='id') | requests.equipment_id
+        equipment = equipment.sorted('id')
+        equipment.fetch([
+            'name', 'serial_number', 'location', 'category_id', 'default_technician_id',
+            'purchase_date', 'warranty_expiry_date', 'end_of_life_date', 'usage_reading',
+        ])
+        users = (team.member_ids | requests.assigned_user_id | equipment.default_technician_id).sorted('id')
+        categories = equipment.category_id.sorted('id')
+
+        user_index = {uid: index for index, uid in enumerate(users.ids)}
+        category_index = {cid: index for index, cid in enumerate(categories.ids)}
+        equipment_index = {eid: index for index, eid in enumerate(equipment.ids)}
+
+        return {
+            'format': self._FORMAT_VERSION,
+            'team': {'id': team.id, 'name': team.name, 'members': [user_index[u] for u in team.member_ids.ids]},
+            'users': {
+                'id': self._delta(users.ids),
+                'name': users.mapped('name'),
+            },
+            'categories': {
+                'id': self._delta(categories.ids),
+                'name': categories.mapped('complete_name'),
+            },
+            'equipment': {
+                'id': self._delta(equipment.ids),
+                'name': equipment.mapped('name'),
+                'serial_number': [e.serial_number or None for e in equipment],
+                'location': self._dictionary([e.location or None for e in equipment]),
+                'category': [category_index.get(e.category_id.id, -1) for e in equipment],
+                'default_technician': [user_index.get(e.default_technician_id.id, -1) for e in equipment],
+                'purchase_date': [self._days(e.purchase_date) for e in equipment],
+                'warranty_expiry_date': [self._days(e.warranty_expiry_date) for e in equipment],
+                'end_of_life_date': [self._days(e.end_of_life_date) for e in equipment],
+                'usage_reading': equipment.mapped('usage_reading'),
+            },
+            'requests': {
+                'id': self._delta(requests.ids),
+                'name': requests.mapped('name'),
+                'description': [r.description or None for r in requests],
+                'equipment': [equipment_index.get(r.equipment_id.id, -1) for r in requests],
+                'assigned_user': [user_index.get(r.assigned_user_id.id, -1) for r in requests],
+                'state': self._dictionary(requests.mapped('state')),
+                'request_type': self._dictionary(requests.mapped('request_type')),
+                'priority': self._dictionary(requests.mapped('priority')),
+                'scheduled_date': [self._seconds(r.scheduled_date) for r in requests],
+                'duration_hours': requests.mapped('duration_hours'),
+                'is_overdue': requests.mapped('is_overdue'),
+                'queue_rank': requests.mapped('queue_rank'),
+            },
+        }
+
+    @api.model
+    def _encode(self, payload):
+        return self.MAGIC + gzip.compress(serialization.dumps(payload), compresslevel=self._GZIP_LEVEL, mtime=0)
+
+    # ---------------------------------------------------------------- cache
+
+    @api.model
+    def get_bundle(self, team):
+        """
+        Current bundle of a team, built and cached on first request for a
+        data version. Concurrent requests for the same team wait for the
+        one building it instead of building it again.
+
+        The advisory lock is taken in this transaction, whose snapshot
+        predates it, so the lookup and build after it run in a fresh
+        cursor: its snapshot starts once the lock is held and sees a bundle
+        committed by the previous holder.
+
+        Returns:
+            Tuple (version, raw bundle bytes)
+        """
+        version = self._get_version(team.sudo())
+        attachment = self._find_attachment(team, version)
+        if attachment:
+            return version, attachment.raw
+
+        self.env.cr.execute("SELECT pg_advisory_xact_lock(%s, %s)", [self._LOCK_NAMESPACE, team.id])
+        with self.env.registry.cursor() as cr:
+            bundle = self.with_env(self.env(cr=cr))
+            team = team.with_env(bundle.env).sudo()
+            version = bundle._get_version(team)
+            attachment = bundle._find_attachment(team, version)
+            if not attachment:
+                attachment = bundle._store(team, version)
+            # Committed on exit, before this transaction releases the lock
+            return version, attachment.raw
+
+    @api.model
+    def _attachment_domain(self, team):
+        return [
+            ('res_model', '=', team._name),
+            ('res_id', '=', team.id),
+            ('name', '=like', '%s_%%' % self._ATTACHMENT_PREFIX),
+        ]
+
+    @api.model
+    def _attachment_name(self, team, version):
+        return '%s_%s_%s.bin' % (self._ATTACHMENT_PREFIX, team.id, version)
+
+    @api.model
+    def _find_attachment(self, team, version):
+        domain = self._attachment_domain(team) + [('name', '=', self._attachment_name(team, version))]
+        return self.env['ir.attachment'].sudo().search(domain, limit=1)
+
+    @api.model
+    def _store(self, team, version):
+        """Build the bundle of a data version and replace the older ones."""
+        Attachment = self.env['ir.attachment'].sudo()
+        payload = self._build_payload(team)
+        raw = self._encode(payload)
+        # Older versions of this team's bundle are obsolete
+        Attachment.search(self._attachment_domain(team)).unlink()
+        attachment = Attachment.create({
+            'name': self._attachment_name(team, version),
+            'raw': raw,
+            'mimetype': 'application/octet-stream',
+            'res_model': team._name,
+            'res_id': team.id,
+        })
+        _logger.info(
+            "Offline bundle for team %s built: %d equipment, %d requests, %d bytes",
+            team.id, len(payload['equipment']['name']), len(payload['requests']['name']), len(raw),
+        )
+        return attachment
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields
+
+
+class GearSlaBreach(models.Model):
+    """
+    One missed SLA deadline. Breaches outlive their request (it may be
+    archived to cold storage or deleted), so the title is kept alongside.
+    """
+    _name = 'gear.sla.breach'
+    _description = 'SLA Breach'
+    _order = 'breach_date desc, id desc'
+
+    request_id = fields.Many2one(
+        comodel_name='gear.maintenance.request',
+        string='Maintenance Request',
+        index=True,
+        readonly=True,
+        ondelete='set null',
+    )
+    request_name = fields.Char(
+        string='Request Title',
+        readonly=True,
+    )
+    policy_id = fields.Many2one(
+        comodel_name='gear.sla.policy',
+        string='SLA Policy',
+        readonly=True,
+        ondelete='set null',
+    )
+    breach_type = fields.Selection(
+        selection=[
+            ('response', 'Response'),
+            ('resolution', 'Resolution'),
+        ],
+        string='Breach Type',
+        required=True,
+        readonly=True,
+    )
+    deadline = fields.Datetime(
+        string='Deadline',
+        required=True,
+        readonly=True,
+    )
+    breach_date = fields.Datetime(
+        string='Detected On',
+        required=True,
+        index=True,
+        readonly=True,
+    )
+    team_id = fields.Many2one(
+        comodel_name='gear.maintenance.team',
+        string='Maintenance Team',
+        index=True,
+        readonly=True,
+        ondelete='set null',
+    )
+    equipment_id = fields.Many2one(
+        comodel_name='gear.equipment',
+        string='Equipment',
+        readonly=True,
+        ondelete='set null',
+    )
+    priority = fields.Selection(
+        selection=[
+            ('0', 'Low'),
+            ('1', 'Normal'),
+            ('2', 'High'),
+            ('3', 'Urgent'),
+        ],
+        string='Priority',
+        readonly=True,
+    )
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from odoo.osv import expression
+
+
+class GearSlaPolicy(models.Model):
+    """
+    Response and resolution targets for corrective requests. A policy
+    applies to the requests matching all of its criteria; empty criteria
+    match everything. When several policies match, the most specific one
+    wins: a team match beats a category match (deeper categories beating
+    their parents), which beats a priority match; ties go by sequence.
+    Creating, changing, archiving or deleting a policy recomputes the
+    deadlines of the open corrective requests it applies or applied to.
+    """
+    _name = 'gear.sla.policy'
+    _description = 'SLA Policy'
+    _order = 'sequence, id'
+
+    # Fields that decide which policy a request gets and its deadlines
+    _REQUEST_FIELDS = {'active', 'sequence', 'priority', 'team_id', 'category_id', 'response_hours', 'resolution_hours'}
+
+    name = fields.Char(
+        string='Name',
+        required=True,
+    )
+    active = fields.Boolean(
+        string='Active',
+        default=True,
+    )
+    sequence = fields.Integer(
+        string='Sequence',
+        default=10,
+    )
+    priority = fields.Selection(
+        selection=[
+            ('0', 'Low'),
+            ('1', 'Normal'),
+            ('2', 'High'),
+            ('3', 'Urgent'),
+        ],
+        string='Priority',
+        help="Leave empty to apply to every priority.",
+    )
+    team_id = fields.Many2one(
+        comodel_name='gear.maintenance.team',
+        string='Maintenance Team',
+        ondelete='cascade',
+        help="Leave empty to apply to every team.",
+    )
+    category_id = fields.Many2one(
+        comodel_name='gear.equipment.category',
+        string='Equipment Category',
+        ondelete='cascade',
+        help="Also applies to the subcategories. Leave empty to apply to every category.",
+    )
+    response_hours = fields.Float(
+        string='Response Time (Hours)',
+        help="Time allowed from creation until work starts. 0 for no response target.",
+    )
+    resolution_hours = fields.Float(
+        string='Resolution Time (Hours)',
+        help="Time allowed from creation until the request is closed. 0 for no resolution target.",
+    )
+
+    @api.constrains('response_hours', 'resolution_hours')
+    def _check_hours(self):
+        for record in self:
+            if record.response_hours < 0 or record.resolution_hours < 0:
+                raise ValidationError(_('SLA times cannot be negative.'))
+            if not record.response_hours and not record.resolution_hours:
+                raise ValidationError(_('An SLA policy needs a response or a resolution time.'))
+
+    def _specificity(self, category):
+        self.ensure_one()
+        depth = len(self.category_id.parent_path.split('/')) if self.category_id and category else 0
+        return (bool(self.team_id), depth, bool(self.priority), -self.sequence, -self.id)
+
+    def _matches(self, team, category, priority):
+        self.ensure_one()
+        if self.team_id and self.team_id != team:
+            return False
+        if self.priority and self.priority != priority:
+            return False
+        if self.category_id:
+            # parent_path is 'root_id/.../id/', so a prefix match covers the subtree
+            return bool(category.parent_path) and category.parent_path.startswith(self.category_id.parent_path)
+        return True
+
+    @api.model
+    def _get_policies(self):
+        """Active policies, read once per batch of requests."""
+        policies = self.sudo().search([])
+        policies.fetch(['priority', 'team_id', 'category_id', 'response_hours', 'resolution_hours', 'sequence'])
+        policies.category_id.fetch(['parent_path'])
+        return policies
+
+    @api.model
+    def _find_policy(self, policies, team, category, priority):
+        """Most specific of policies matching the criteria, or an empty recordset."""
+        best = self.browse()
+        best_key = None
+        for policy in policies:
+            if not policy._matches(team, category, priority):
+                continue
+            key = policy._specificity(category)
+            if best_key is None or key > best_key:
+                best, best_key = policy, key
+        return best
+
+    def _get_affected_requests(self):
+        """Open corrective requests these policies apply to, or may apply to."""
+        domains = [[('sla_policy_id', 'in', self.ids)]]
+        for policy in self:
+            domain = []
+            if policy.team_id:
+                domain.append(('team_id', '=', policy.team_id.id))
+            if policy.category_id:
+                domain.append(('equipment_category_id', 'child_of', policy.category_id.id))
+            if policy.priority:
+                domain.append(('priority', '=', policy.priority))
+            domains.append(domain)
+        return self.env['gear.maintenance.request'].sudo().search(expression.AND([
+            [('request_type', '=', 'corrective'), ('state', 'in', ('new', 'in_progress'))],
+            expression.OR(domains),
+        ]))
+
+    @api.model
+    def _recompute_deadlines(self, requests):
+        """Queue the SLA deadlines of requests for recomputation at the next flush."""
+        Request = self.env['gear.maintenance.request']
+        for field_name in ('sla_policy_id', 'sla_response_deadline', 'sla_resolution_deadline'):
+            self.env.add_to_compute(Request._fields[field_name], requests)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        policies = super().create(vals_list)
+        self._recompute_deadlines(policies._get_affected_requests())
+        return policies
+
+    def write(self, vals):
+        if not self._REQUEST_FIELDS & set(vals):
+            return super().write(vals)
+        # Requests the policies applied to before the change, and after it
+        requests = self._get_affected_requests()
+        res = super().write(vals)
+        self._recompute_deadlines(requests | self._get_affected_requests())
+        return res
+
+    def unlink(self):
+        # Recomputed once the policies are gone, so they no longer match
+        requests = self._get_affected_requests()
+        res = super().unlink()
+        self._recompute_deadlines(requests)
+        return res
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from markupsafe import Markup, escape
+
+from odoo import models, fields, api, _
+
+_logger = logging.getLogger(__name__)
+
+
+class GearTrackingCompaction(models.AbstractModel):
+    """
+    Retention of field tracking history. Old tracking-only messages of a
+    record are collapsed into one summary note listing, per field, the
+    value before and after the compacted period.
+    """
+    _name = 'gear.tracking.compaction'
+    _description = 'Tracking History Compaction'
+
+    _RETENTION_PARAM = 'gear_guard.tracking_retention_days'
+    _MODELS = ('gear.maintenance.request', 'gear.maintenance.request.archive', 'gear.equipment')
+    _BATCH_SIZE = 500
+    _MAX_BATCHES_PER_RUN = 100
+
+    @api.model
+    def _format_value(self, char_value, datetime_value, float_value, integer_value):
+        for value in (char_value, datetime_value, float_value, integer_value):
+            if value is not None and value is not False:
+                return str(value)
+        return _('(empty)')
+
+    @api.model
+    def _compact_batch(self, model_name, cutoff):
+        """
+        Compact one batch of records of a model.
+        Only messages without a body and with tracking values are touched;
+        comments and notes are never removed. Records with a single old
+        tracking message are left as they are.
+
+        Returns:
+            Dict with the number of 'records', deleted 'messages' and 'tracking_values'
+        """
+        cr = self.env.cr
+        self.env['mail.message'].flush_model()
+        self.env['mail.tracking.value'].flush_model()
+        cr.execute("""
+            SELECT m.res_id, array_agg(m.id ORDER BY m.date, m.id), MAX(m.date)
+            FROM mail_message m
+            WHERE m.model = %s
+              AND m.date < %s
+              AND COALESCE(m.body, '') = ''
+              AND EXISTS (SELECT 1 FROM mail_tracking_value v WHERE v.mail_message_id = m.id)
+            GROUP BY m.res_id
+            HAVING COUNT(*) > 1
+            ORDER BY m.res_id
+            LIMIT %s
+        """, [model_name, cutoff, self._BATCH_SIZE])
+        batch = cr.fetchall()
+        if not batch:
+            return {'records': 0, 'messages': 0, 'tracking_values': 0}
+        message_ids = [mid for _res_id, ids, _last in batch for mid in ids]
+
+        # Net change per record and field, in message order
+        cr.execute("""
+            SELECT m.res_id, f.field_description, v.field_id,
+                   v.old_value_char, v.old_value_datetime, v.old_value_float, v.old_value_integer,
+                   v.new_value_char, v.new_value_datetime, v.new_value_float, v.new_value_integer
+            FROM mail_tracking_value v
+            JOIN mail_message m ON m.id = v.mail_message_id
+            JOIN ir_model_fields f ON f.id = v.field_id
+            WHERE v.mail_message_id IN %s
+            ORDER BY m.date, m.id, v.id
+        """, [tuple(message_ids)])
+        changes = defaultdict(dict)
+        tracking_count = 0
+        for row in cr.fetchall():
+            tracking_count += 1
+            res_id, label, field_id = row[0], row[1], row[2]
+            # field_description is translated (jsonb)
+            field_label = (label.get(self.env.lang) or label.get('en_US')) if isinstance(label, dict) else label
+            entry = changes[res_id].setdefault(field_id, {
+                'label': field_label,
+                'old': self._format_value(*row[3:7]),
+                'count': 0,
+            })
+            entry['new'] = self._format_value(*row[7:11])
+            entry['count'] += 1
+
+        bodies = {}
+        for res_id, ids, _last in batch:
+            lines = [
+                Markup('<li>%s: %s &#8594; %s (%s)</li>') % (
+                    entry['label'], entry['old'], entry['new'],
+                    _('%s changes', entry['count']) if entry['count'] > 1 else _('1 change'),
+                )
+                for entry in changes[res_id].values()
+            ]
+            bodies[res_id] = Markup('<p>%s</p><ul>%s</ul>') % (
+                escape(_('%s tracked updates compacted:', len(ids))),
+                Markup('').join(lines),
+            )
+
+        records = self.env[model_name].browse(list(bodies)).with_context(mail_notrack=True)
+        summaries = records._message_log_batch(bodies=bodies)
+
+        # Keep each summary at the position of the history it replaces
+        last_dates = {res_id: last for res_id, _ids, last in batch}
+        cr.execute("""
+            UPDATE mail_message m SET date = d.date
+            FROM unnest(%s::int[], %s::timestamp[]) AS d(id, date)
+            WHERE m.id = d.id
+        """, [summaries.ids, [last_dates[message.res_id] for message in summaries]])
+
+        cr.execute("DELETE FROM mail_message WHERE id IN %s", [tuple(message_ids)])
+        deleted = cr.rowcount
+        self.env['mail.message'].invalidate_model()
+        self.env['mail.tracking.value'].invalidate_model()
+        return {'records': len(batch), 'messages': deleted - len(summaries), 'tracking_values': tracking_count}
+
+    @api.model
+    def compact_tracking(self, retention_days=None, auto_commit=False):
+        """
+        Compact the tracking history older than retention_days on GearGuard records.
+
+        Returns:
+            Dict with reclaimed 'messages' (net of the summaries added) and
+            'tracking_values', and the number of compacted 'records'
+        """
+        if retention_days is None:
+            retention_days = int(self.env['ir.config_parameter'].sudo().get_param(self._RETENTION_PARAM, 180))
+        totals = {'records': 0, 'messages': 0, 'tracking_values': 0}
+        if retention_days <= 0:
+            return totals
+        cutoff = fields.Datetime.now() - timedelta(days=retention_days)
+
+        for model_name in self._MODELS:
+            for _batch in range(self._MAX_BATCHES_PER_RUN):
+                result = self._compact_batch(model_name, cutoff)
+                if auto_commit:
+                    self.env.cr.commit()
+                for key, value in result.items():
+                    totals[key] += value
+                if result['records'] < self._BATCH_SIZE:
+                    break
+        return totals
+
+    @api.model
+    def cron_compact_tracking(self):
+        """Cron job compacting old tracking history, committing after each batch."""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        totals = self.compact_tracking(auto_commit=auto_commit)
+        _logger.info(
+            "Tracking compaction: %d records summarized, %d messages and %d tracking values reclaimed",
+            totals['records'], totals['messages'], totals['tracking_values'],
+        )
+        return True
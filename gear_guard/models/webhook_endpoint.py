@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+
+class GearWebhookEndpoint(models.Model):
+    _name = 'gear.webhook.endpoint'
+    _description = 'Webhook Endpoint'
+    _order = 'name'
+
+    name = fields.Char(
+        string='Name',
+        required=True,
+    )
+    url = fields.Char(
+        string='URL',
+        required=True,
+    )
+    active = fields.Boolean(
+        string='Active',
+        default=True,
+    )
+    secret = fields.Char(
+        string='Signing Secret',
+        groups='base.group_system',
+        help="When set, each delivery carries an X-GearGuard-Signature header "
+             "with the HMAC-SHA256 of the body.",
+    )
+    event_types = fields.Char(
+        string='Event Types',
+        help="Comma-separated event types to deliver (e.g. request.repaired,equipment.scrapped). "
+             "Leave empty to receive every event.",
+    )
+    batch_size = fields.Integer(
+        string='Batch Size',
+        default=100,
+    )
+    timeout = fields.Integer(
+        string='Timeout (Seconds)',
+        default=10,
+    )
+    max_attempts = fields.Integer(
+        string='Max Attempts',
+        default=8,
+        help="Events still failing after this many attempts are marked as dead.",
+    )
+    pending_count = fields.Integer(
+        string='Pending Events',
+        compute='_compute_pending_count',
+    )
+
+    @api.constrains('url')
+    def _check_url(self):
+        for record in self:
+            if not record.url.startswith(('http://', 'https://')):
+                raise ValidationError(_('Webhook URL must start with http:// or https://'))
+
+    def _compute_pending_count(self):
+        groups = self.env['gear.webhook.event'].read_group(
+            [('endpoint_id', 'in', self.ids), ('state', '=', 'pending')], ['endpoint_id'], ['endpoint_id'],
+        )
+        counts = {group['endpoint_id'][0]: group['endpoint_id_count'] for group in groups}
+        for record in self:
+            record.pending_count = counts.get(record.id, 0)
+
+    def _accepts(self, event_type):
+        self.ensure_one()
+        if not self.event_types:
+            return True
+        return event_type in {item.strip() for item in self.event_types.split(',')}
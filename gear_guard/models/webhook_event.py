@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import hmac
+import json
+import logging
+import threading
+from datetime import timedelta
+
+import requests
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+
+class GearWebhookEvent(models.Model):
+    """
+    Transactional outbox for request and equipment events.
+    Events are written in the same transaction as the change that caused
+    them and delivered later, in batches, by the dispatcher cron.
+    """
+    _name = 'gear.webhook.event'
+    _description = 'Webhook Outbox Event'
+    _order = 'id desc'
+
+    endpoint_id = fields.Many2one(
+        comodel_name='gear.webhook.endpoint',
+        string='Endpoint',
+        required=True,
+        readonly=True,
+        ondelete='cascade',
+    )
+    event_type = fields.Char(
+        string='Event Type',
+        required=True,
+        readonly=True,
+    )
+    res_model = fields.Char(
+        string='Model',
+        readonly=True,
+    )
+    res_id = fields.Integer(
+        string='Record ID',
+        readonly=True,
+    )
+    equipment_id = fields.Integer(
+        string='Equipment ID',
+        readonly=True,
+        help="Events of the same equipment are delivered in order.",
+    )
+    payload = fields.Text(
+        string='Payload',
+        readonly=True,
+    )
+    state = fields.Selection(
+        selection=[
+            ('pending', 'Pending'),
+            ('sent', 'Sent'),
+            ('dead', 'Dead'),
+        ],
+        string='Status',
+        default='pending',
+        required=True,
+        readonly=True,
+    )
+    attempts = fields.Integer(
+        string='Attempts',
+        readonly=True,
+    )
+    next_attempt_date = fields.Datetime(
+        string='Next Attempt',
+        default=fields.Datetime.now,
+        readonly=True,
+    )
+    sent_date = fields.Datetime(
+        string='Sent On',
+        readonly=True,
+    )
+    last_error = fields.Text(
+        string='Last Error',
+        readonly=True,
+    )
+
+    _BACKOFF_BASE_SECONDS = 30
+    _BACKOFF_MAX_SECONDS = 6 * 3600
+    _RETENTION_DAYS = 7
+    _LOCK_NAMESPACE = 0x6757  # advisory lock namespace of the dispatcher
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS gear_webhook_event_pending_index
+            ON gear_webhook_event (endpoint_id, id)
+            WHERE state = 'pending'
+        """)
+        # Retry check of _select_batch: older waiting events of the same equipment
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS gear_webhook_event_pending_equipment_index
+            ON gear_webhook_event (endpoint_id, equipment_id, id)
+            WHERE state = 'pending'
+        """)
+
+    @api.model
+    def _enqueue(self, event_type, records, equipment_field=None):
+        """
+        Write one outbox event per record and subscribed endpoint.
+
+        Args:
+            event_type: Event name, e.g. 'request.repaired'
+            records: Records the event is about
+            equipment_field: Field holding the equipment, used for per-equipment
+                ordering; None when the records are equipment themselves
+        """
+        if not records:
+            return self.browse()
+        endpoints = self.env['gear.webhook.endpoint'].sudo().search([])
+        endpoints = endpoints.filtered(lambda e: e._accepts(event_type))
+        if not endpoints:
+            return self.browse()
+
+        now = fields.Datetime.now()
+        vals_list = []
+        for record in records:
+            equipment_id = record[equipment_field].id if equipment_field else record.id
+            payload = json.dumps({
+                'event': event_type,
+                'model': record._name,
+                'id': record.id,
+                'equipment_id': equipment_id,
+                'state': record['state'] if 'state' in record._fields else None,
+                'timestamp': now,
+            }, default=str)
+            for endpoint in endpoints:
+                vals_list.append({
+                    'endpoint_id': endpoint.id,
+                    'event_type': event_type,
+                    'res_model': record._name,
+                    'res_id': record.id,
+                    'equipment_id': equipment_id,
+                    'payload': payload,
+                    'next_attempt_date': now,
+                })
+        return self.sudo().create(vals_list)
+
+    def _next_backoff(self, attempts):
+        seconds = self._BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+        return timedelta(seconds=min(seconds, self._BACKOFF_MAX_SECONDS))
+
+    @api.model
+    def _post_batch(self, endpoint, body):
+        """Deliver one batch; override or point the endpoint at a local server to test."""
+        headers = {'Content-Type': 'application/json'}
+        if endpoint.sudo().secret:
+            signature = hmac.new(endpoint.sudo().secret.encode(), body, hashlib.sha256).hexdigest()
+            headers['X-GearGuard-Signature'] = 'sha256=%s' % signature
+        response = requests.post(endpoint.url, data=body, headers=headers, timeout=endpoint.timeout or 10)
+        response.raise_for_status()
+
+    def _select_batch(self, endpoint, now):
+        """
+        Pick the next deliverable events of an endpoint, oldest first.
+        An equipment with an older pending event waiting for a retry is
+        held back entirely, so its events never overtake each other; the
+        events of every other equipment stay deliverable.
+        """
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT e.id
+            FROM gear_webhook_event e
+            WHERE e.endpoint_id = %(endpoint)s AND e.state = 'pending'
+              AND COALESCE(e.next_attempt_date, %(now)s) <= %(now)s
+              AND (COALESCE(e.equipment_id, 0) = 0 OR NOT EXISTS (
+                  SELECT 1 FROM gear_webhook_event w
+                  WHERE w.endpoint_id = e.endpoint_id AND w.state = 'pending'
+                    AND w.equipment_id = e.equipment_id AND w.id < e.id
+                    AND w.next_attempt_date > %(now)s
+              ))
+            ORDER BY e.id
+            LIMIT %(limit)s
+        """, {'endpoint': endpoint.id, 'now': now, 'limit': max(endpoint.batch_size, 1)})
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _dispatch_endpoint(self, endpoint, auto_commit=False):
+        """Deliver the pending events of one endpoint, batch after batch."""
+        sent = 0
+        while True:
+            now = fields.Datetime.now()
+            batch = self._select_batch(endpoint, now)
+            if not batch:
+                return sent
+            body = ('{"events": [%s]}' % ', '.join(batch.mapped('payload'))).encode()
+            try:
+                self._post_batch(endpoint, body)
+            except Exception as e:
+                _logger.warning("Webhook delivery to %s failed: %s", endpoint.url, e)
+                attempts = max(batch.mapped('attempts')) + 1
+                batch.write({
+                    'attempts': attempts,
+                    'next_attempt_date': now + self._next_backoff(attempts),
+                    'last_error': str(e),
+                })
+                batch.filtered(lambda ev: ev.attempts >= endpoint.max_attempts).write({'state': 'dead'})
+                if auto_commit:
+                    self.env.cr.commit()
+                return sent
+            batch.write({
+                'state': 'sent',
+                'sent_date': now,
+                'attempts': max(batch.mapped('attempts')) + 1,
+                'last_error': False,
+            })
+            sent += len(batch)
+            if auto_commit:
+                self.env.cr.commit()
+
+    @api.model
+    def cron_dispatch_events(self):
+        """
+        Cron job delivering outbox events to webhook endpoints.
+        Each endpoint is handled by a single dispatcher at a time (advisory
+        lock), which keeps per-equipment ordering across concurrent runs.
+        """
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        for endpoint in self.env['gear.webhook.endpoint'].search([]):
+            # Session-level lock: it must survive the commits between batches
+            lock_key = [self._LOCK_NAMESPACE, endpoint.id]
+            self.env.cr.execute("SELECT pg_try_advisory_lock(%s, %s)", lock_key)
+            if not self.env.cr.fetchone()[0]:
+                continue
+            try:
+                self._dispatch_endpoint(endpoint, auto_commit=auto_commit)
+            finally:
+                self.env.cr.execute("SELECT pg_advisory_unlock(%s, %s)", lock_key)
+
+        # Prune delivered events past the retention window
+        self.env.cr.execute("""
+            DELETE FROM gear_webhook_event
+            WHERE state = 'sent' AND sent_date < %s
+        """, [fields.Datetime.now() - timedelta(days=self._RETENTION_DAYS)])
+        return True
+
+    def action_retry(self):
+        """Put dead or waiting events back in the queue for immediate delivery."""
+        self.filtered(lambda ev: ev.state != 'sent').write({
+            'state': 'pending',
+            'attempts': 0,
+            'next_attempt_date': fields.Datetime.now(),
+        })
+        return True
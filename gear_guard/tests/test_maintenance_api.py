@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from odoo.tests import HttpCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestMaintenanceApi(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.equipment = cls.env['gear.equipment'].create({
+            'name': 'Test Press',
+            'serial_number': 'API-TEST-001',
+        })
+        Request = cls.env['gear.maintenance.request'].with_context(skip_duplicate_check=True)
+        cls.new_request = Request.create({'name': 'Oil leak', 'equipment_id': cls.equipment.id})
+        cls.done_request = Request.create({'name': 'Worn belt', 'equipment_id': cls.equipment.id})
+        cls.done_request.state = 'repaired'
+
+    def _call(self, url, params):
+        response = self.url_open(
+            url,
+            data=json.dumps({'jsonrpc': '2.0', 'method': 'call', 'params': params}),
+            headers={'Content-Type': 'application/json'},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['result']
+
+    def test_transition(self):
+        self.authenticate('admin', 'admin')
+        missing_id = self.done_request.id + 1000
+        result = self._call('/api/maintenance-requests/transition', {
+            'ids': [self.new_request.id, self.done_request.id, missing_id],
+            'state': 'in_progress',
+        })
+        self.assertEqual(result['status'], 'success', result)
+        self.assertEqual(result['data']['moved'], [self.new_request.id])
+        self.assertEqual(result['data']['ineligible'], [{'id': self.done_request.id, 'state': 'repaired'}])
+        self.assertEqual(result['data']['not_found'], [missing_id])
+        self.new_request.invalidate_recordset(['state'])
+        self.assertEqual(self.new_request.state, 'in_progress')
+
+    def test_transition_validates_body(self):
+        self.authenticate('admin', 'admin')
+        result = self._call('/api/maintenance-requests/transition', {'ids': [self.new_request.id], 'state': 'done'})
+        self.assertEqual(result['status'], 'error')
+        result = self._call('/api/maintenance-requests/transition', {'state': 'repaired'})
+        self.assertEqual(result['status'], 'error')
+
+    def test_create(self):
+        self.authenticate('admin', 'admin')
+        result = self._call('/api/maintenance-request', {
+            'name': 'Noisy bearing',
+            'equipment_id': self.equipment.id,
+            'skip_duplicate_check': True,
+        })
+        self.assertEqual(result['status'], 'success', result)
+        created = self.env['gear.maintenance.request'].browse(result['data']['id'])
+        self.assertEqual(created.name, 'Noisy bearing')
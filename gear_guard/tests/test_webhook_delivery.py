@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Records every delivery and answers with the next queued status (200 when none)."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        server.deliveries.append([event['id'] for event in json.loads(body)['events']])
+        status = server.statuses.pop(0) if server.statuses else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@tagged('post_install', '-at_install')
+class TestWebhookDelivery(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), _StandInHandler)
+        cls.server.deliveries = []
+        cls.server.statuses = []
+        thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        thread.start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+        cls.endpoint = cls.env['gear.webhook.endpoint'].create({
+            'name': 'Local stand-in',
+            'url': 'http://127.0.0.1:%s/' % cls.server.server_address[1],
+            'batch_size': 2,
+            'max_attempts': 3,
+        })
+        cls.Event = cls.env['gear.webhook.event']
+
+    def setUp(self):
+        super().setUp()
+        self.server.deliveries.clear()
+        self.server.statuses.clear()
+
+    def _event(self, equipment_id, **vals):
+        event = self.Event.create(dict({
+            'endpoint_id': self.endpoint.id,
+            'event_type': 'request.started',
+            'equipment_id': equipment_id,
+            'payload': '{}',
+            'next_attempt_date': fields.Datetime.now() - timedelta(seconds=1),
+        }, **vals))
+        event.payload = json.dumps({'id': event.id})
+        return event
+
+    def test_batches_in_order(self):
+        events = [self._event(1) for _i in range(5)]
+        sent = self.Event._dispatch_endpoint(self.endpoint)
+        self.assertEqual(sent, 5)
+        ids = [event.id for event in events]
+        self.assertEqual(self.server.deliveries, [ids[0:2], ids[2:4], ids[4:5]])
+        self.assertEqual(set(self.Event.browse(ids).mapped('state')), {'sent'})
+
+    def test_failure_is_retried_with_backoff(self):
+        first, second = self._event(1), self._event(1)
+        self.server.statuses.append(500)
+        self.assertEqual(self.Event._dispatch_endpoint(self.endpoint), 0)
+        self.assertEqual((first.state, first.attempts), ('pending', 1))
+        self.assertGreater(first.next_attempt_date, fields.Datetime.now())
+
+        # Still backing off: nothing is sent
+        self.assertEqual(self.Event._dispatch_endpoint(self.endpoint), 0)
+        self.assertEqual(len(self.server.deliveries), 1)
+
+        (first | second).next_attempt_date = fields.Datetime.now() - timedelta(seconds=1)
+        self.assertEqual(self.Event._dispatch_endpoint(self.endpoint), 2)
+        self.assertEqual(self.server.deliveries[-1], [first.id, second.id])
+        self.assertEqual((first.state, first.attempts), ('sent', 2))
+
+    def test_backoff_only_blocks_its_equipment(self):
+        waiting = self._event(1, next_attempt_date=fields.Datetime.now() + timedelta(hours=1))
+        # Fill more than a batch window with events behind the waiting one
+        held = [self._event(1) for _i in range(25)]
+        other = [self._event(2) for _i in range(2)]
+        sent = self.Event._dispatch_endpoint(self.endpoint)
+        self.assertEqual(sent, 2)
+        self.assertEqual(self.server.deliveries, [[event.id for event in other]])
+        self.assertEqual(waiting.state, 'pending')
+        self.assertEqual(set(self.Event.browse([event.id for event in held]).mapped('state')), {'pending'})
+
+    def test_dead_after_max_attempts(self):
+        event = self._event(1)
+        for _attempt in range(3):
+            self.server.statuses.append(500)
+            event.next_attempt_date = fields.Datetime.now() - timedelta(seconds=1)
+            self.Event._dispatch_endpoint(self.endpoint)
+        self.assertEqual((event.state, event.attempts), ('dead', 3))
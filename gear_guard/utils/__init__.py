@@ -1,3 +1,4 @@
 # -*- coding: utf-8 -*-
 
 from . import ml_utils
+from . import serialization
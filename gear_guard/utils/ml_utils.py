@@ -5,6 +5,15 @@ Lightweight machine learning utilities for smart search functionality.
 Uses TF-IDF and cosine similarity for finding similar maintenance issues.
 """
 
+import math
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
 try:
     from sklearn.feature_extraction.text import TfidfVectorizer
     from sklearn.metrics.pairwise import cosine_similarity
@@ -13,6 +22,12 @@ try:
 except ImportError:
     ML_AVAILABLE = False
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 
 class SimilaritySearch:
     """
@@ -129,6 +144,9 @@ def preprocess_text(text):
 def extract_keywords(text, max_keywords=10):
     """
     Extract keywords from text using TF-IDF.
+
+    IDF over a single document is constant, so this only ranks by term
+    frequency. Use KeywordExtractor to score documents against a corpus.
     
     Args:
         text: Input text string
@@ -160,3 +178,459 @@ def extract_keywords(text, max_keywords=10):
         return [kw for kw, score in keyword_scores if score > 0]
     except Exception:
         return []
+
+
+class KeywordExtractor:
+    """
+    Corpus-level TF-IDF keyword extractor.
+    Fits IDF once over the whole corpus, then scores any number of
+    documents in a single sparse matrix pass.
+    """
+
+    def __init__(self, max_features=5000):
+        self.max_features = max_features
+        self.vectorizer = None
+        self.feature_names = None
+
+    def is_available(self):
+        """Check if ML libraries are available."""
+        return ML_AVAILABLE
+
+    def fit(self, corpus):
+        """
+        Compute IDF weights over the corpus.
+
+        Args:
+            corpus: Iterable of text documents
+
+        Returns:
+            True if the vocabulary could be built
+        """
+        if not ML_AVAILABLE:
+            return False
+
+        corpus = [doc for doc in corpus if doc and doc.strip()]
+        if not corpus:
+            return False
+
+        try:
+            self.vectorizer = TfidfVectorizer(
+                stop_words='english',
+                max_features=self.max_features,
+                ngram_range=(1, 2),
+                # Terms present in nearly every request carry no signal
+                max_df=0.95 if len(corpus) >= 20 else 1.0,
+            )
+            self.vectorizer.fit(corpus)
+            self.feature_names = self.vectorizer.get_feature_names_out()
+            return True
+        except ValueError:
+            # Empty vocabulary, e.g. a corpus made only of stop words
+            self.vectorizer = None
+            self.feature_names = None
+            return False
+
+    def extract(self, documents, max_keywords=5):
+        """
+        Extract the top keywords of each document.
+
+        Args:
+            documents: List of text documents
+            max_keywords: Maximum number of keywords per document
+
+        Returns:
+            List of keyword lists, aligned with documents
+        """
+        if not ML_AVAILABLE or self.vectorizer is None:
+            return [[] for _ in documents]
+
+        matrix = self.vectorizer.transform([doc or '' for doc in documents]).tocsr()
+        matrix.sort_indices()
+
+        results = []
+        indptr, indices, data = matrix.indptr, matrix.indices, matrix.data
+        for row in range(matrix.shape[0]):
+            start, end = indptr[row], indptr[row + 1]
+            if start == end:
+                results.append([])
+                continue
+            scores = data[start:end]
+            if end - start > max_keywords:
+                top = np.argpartition(-scores, max_keywords - 1)[:max_keywords]
+            else:
+                top = np.arange(end - start)
+            top = top[np.argsort(-scores[top], kind='stable')]
+            results.append([str(self.feature_names[indices[start + i]]) for i in top])
+        return results
+
+
+def extract_keywords_batch(documents, max_keywords=5):
+    """
+    Extract keywords for many documents using one corpus-level TF-IDF.
+
+    Args:
+        documents: List of text documents
+        max_keywords: Maximum number of keywords per document
+
+    Returns:
+        List of keyword lists, aligned with documents
+    """
+    extractor = KeywordExtractor()
+    if not extractor.fit(documents):
+        return [[] for _ in documents]
+    return extractor.extract(documents, max_keywords=max_keywords)
+
+
+def rank_similar(documents, query, top_k=5, threshold=0.1):
+    """
+    Rank documents by TF-IDF cosine similarity to the query.
+    Pure computation (no ORM access), so it can run on a worker thread.
+
+    Args:
+        documents: List of text documents
+        query: Search query string
+        top_k: Maximum number of results to return
+        threshold: Minimum similarity score (0-1)
+
+    Returns:
+        List of tuples (document_index, similarity_score), best first
+    """
+    if not ML_AVAILABLE or len(documents) < 2 or not query:
+        return []
+    vectorizer = TfidfVectorizer(
+        stop_words='english',
+        max_features=1000,
+        ngram_range=(1, 2),
+    )
+    tfidf_matrix = vectorizer.fit_transform(list(documents) + [query])
+    similarities = cosine_similarity(tfidf_matrix[-1], tfidf_matrix[:-1]).flatten()
+    top_indices = similarities.argsort()[-top_k:][::-1]
+    return [(int(idx), float(similarities[idx])) for idx in top_indices if similarities[idx] > threshold]
+
+
+class PoolSaturated(Exception):
+    """Raised when the similarity pool has no free slot for a new job."""
+
+
+class SimilarityPool:
+    """
+    Bounded thread pool for similarity jobs, so TF-IDF work never runs
+    unbounded on HTTP workers. At most max_workers jobs run and at most
+    queue_depth more wait; beyond that, submissions are refused at once.
+    Callers wait with a deadline and degrade to a cheaper path on timeout.
+    """
+
+    def __init__(self, max_workers=2, queue_depth=8):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gear_guard_similarity')
+        self._slots = threading.BoundedSemaphore(max_workers + queue_depth)
+        self._lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'timeouts': 0,
+            'rejected': 0,
+            'errors': 0,
+            'in_flight': 0,
+            'total_seconds': 0.0,
+            'max_seconds': 0.0,
+        }
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self._stats[key] += value
+
+    def _run(self, func, args):
+        started = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._stats['in_flight'] -= 1
+                self._stats['completed'] += 1
+                self._stats['total_seconds'] += elapsed
+                self._stats['max_seconds'] = max(self._stats['max_seconds'], elapsed)
+            self._slots.release()
+
+    def _release_cancelled(self, future):
+        # A cancelled job never reaches _run, which normally frees its slot
+        if future.cancelled():
+            with self._lock:
+                self._stats['in_flight'] -= 1
+            self._slots.release()
+
+    def run(self, func, *args, timeout=None):
+        """
+        Run func(*args) on the pool and wait at most timeout seconds.
+
+        Raises:
+            PoolSaturated: when every worker and queue slot is taken
+            concurrent.futures.TimeoutError: when the deadline is exceeded
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise PoolSaturated()
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._stats['in_flight'] += 1
+        try:
+            future = self._executor.submit(self._run, func, args)
+        except Exception:
+            with self._lock:
+                self._stats['in_flight'] -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release_cancelled)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._count('timeouts')
+            # Drop the job if it has not started; a running one finishes in the background
+            future.cancel()
+            raise
+        except Exception:
+            self._count('errors')
+            raise
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['max_workers'] = self.max_workers
+        stats['queue_depth'] = self.queue_depth
+        stats['avg_seconds'] = stats['total_seconds'] / stats['completed'] if stats['completed'] else 0.0
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_similarity_pool(max_workers=2, queue_depth=8):
+    """
+    Process-wide similarity pool, rebuilt when its size settings change.
+    Each Odoo worker process has its own pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or (_pool.max_workers, _pool.queue_depth) != (max_workers, queue_depth):
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = SimilarityPool(max_workers=max_workers, queue_depth=queue_depth)
+        return _pool
+
+
+def _estimate_size(value):
+    """Rough deep size in bytes of JSON-like values (dicts, lists, scalars)."""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded both by entry count and
+    by the estimated memory of the cached values.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._data[key][0]
+            self._stats['misses'] += 1
+            return default
+
+    def put(self, key, value):
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _key, (_value, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._data)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_similarity_cache(max_entries=256, max_bytes=4 * 1024 * 1024):
+    """Process-wide similar-issue result cache, rebuilt when its bounds change."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or (_cache.max_entries, _cache.max_bytes) != (max_entries, max_bytes):
+            _cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        return _cache
+
+
+# Weights of the risk components; they sum to 1 so scores stay within 0-100
+RISK_WEIGHTS = {
+    'failures': 0.40,
+    'overdue': 0.25,
+    'age': 0.20,
+    'warranty': 0.15,
+}
+RISK_AGE_HORIZON_DAYS = 3650
+RISK_WARRANTY_NOTICE_DAYS = 90
+
+
+def score_fleet_risk(failures, overdue, age_days, warranty_days):
+    """
+    Score every asset in one vectorized pass.
+
+    Args:
+        failures: Corrective requests per asset over the scoring window
+        overdue: Overdue or late preventive requests per asset
+        age_days: Days since purchase, NaN when unknown
+        warranty_days: Days until warranty expiry (negative once expired), NaN when unknown
+
+    Returns:
+        Scores between 0 and 100, aligned with the inputs (NumPy array, or a
+        list when NumPy is missing)
+    """
+    if not NUMPY_AVAILABLE:
+        return [
+            _score_asset(f, o, a, w) for f, o, a, w in zip(failures, overdue, age_days, warranty_days)
+        ]
+    failures = np.asarray(failures, dtype=float)
+    overdue = np.asarray(overdue, dtype=float)
+    age_days = np.asarray(age_days, dtype=float)
+    warranty_days = np.asarray(warranty_days, dtype=float)
+
+    # Saturating curves: the first failures weigh most
+    failure_risk = 1.0 - np.exp(-failures / 3.0)
+    overdue_risk = 1.0 - np.exp(-overdue / 2.0)
+    age_risk = np.where(np.isnan(age_days), 0.5, np.clip(age_days / RISK_AGE_HORIZON_DAYS, 0.0, 1.0))
+    warranty_risk = np.select(
+        [np.isnan(warranty_days), warranty_days < 0, warranty_days <= RISK_WARRANTY_NOTICE_DAYS],
+        [0.5, 1.0, 0.5],
+        default=0.0,
+    )
+    score = (
+        RISK_WEIGHTS['failures'] * failure_risk
+        + RISK_WEIGHTS['overdue'] * overdue_risk
+        + RISK_WEIGHTS['age'] * age_risk
+        + RISK_WEIGHTS['warranty'] * warranty_risk
+    )
+    return np.round(score * 100.0, 2)
+
+
+def _score_asset(failures, overdue, age_days, warranty_days):
+    """Scalar twin of score_fleet_risk, used when NumPy is not installed."""
+    age_risk = 0.5 if math.isnan(age_days) else min(max(age_days / RISK_AGE_HORIZON_DAYS, 0.0), 1.0)
+    if math.isnan(warranty_days):
+        warranty_risk = 0.5
+    elif warranty_days < 0:
+        warranty_risk = 1.0
+    elif warranty_days <= RISK_WARRANTY_NOTICE_DAYS:
+        warranty_risk = 0.5
+    else:
+        warranty_risk = 0.0
+    score = (
+        RISK_WEIGHTS['failures'] * (1.0 - math.exp(-failures / 3.0))
+        + RISK_WEIGHTS['overdue'] * (1.0 - math.exp(-overdue / 2.0))
+        + RISK_WEIGHTS['age'] * age_risk
+        + RISK_WEIGHTS['warranty'] * warranty_risk
+    )
+    return round(score * 100.0, 2)
+
+
+# MinHash fingerprints for near-duplicate detection. The permutations are
+# seeded so every worker process computes identical signatures; with a
+# 31-bit prime and 32-bit shingle hashes, a * h + b fits in a uint64.
+MINHASH_PERMUTATIONS = 32
+SHINGLE_SIZE = 4
+_MINHASH_PRIME = (1 << 31) - 1
+_MINHASH_PARAMS = [
+    (rng.randrange(1, _MINHASH_PRIME), rng.randrange(0, _MINHASH_PRIME))
+    for rng in [random.Random(0x6767)]
+    for _i in range(MINHASH_PERMUTATIONS)
+]
+if NUMPY_AVAILABLE:
+    _MINHASH_A = np.array([a for a, _b in _MINHASH_PARAMS], dtype=np.uint64)[:, None]
+    _MINHASH_B = np.array([b for _a, b in _MINHASH_PARAMS], dtype=np.uint64)[:, None]
+
+
+def text_shingles(text, size=SHINGLE_SIZE):
+    """Set of overlapping character shingles of the normalized text."""
+    text = preprocess_text(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash_signature(text):
+    """
+    MinHash signature of a text: for each permutation, the smallest hash
+    of its shingles. Two signatures agree on a position with probability
+    equal to the Jaccard similarity of the shingle sets.
+
+    Returns:
+        Tuple of MINHASH_PERMUTATIONS integers, or None for empty text
+    """
+    hashes = [zlib.crc32(shingle.encode()) for shingle in text_shingles(text)]
+    if not hashes:
+        return None
+    if NUMPY_AVAILABLE:
+        values = (_MINHASH_A * np.array(hashes, dtype=np.uint64) + _MINHASH_B) % _MINHASH_PRIME
+        return tuple(values.min(axis=1).tolist())
+    prime = _MINHASH_PRIME
+    return tuple(min((a * h + b) % prime for h in hashes) for a, b in _MINHASH_PARAMS)
+
+
+def minhash_similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two signatures (0.0 when one is missing)."""
+    if not signature_a or not signature_b:
+        return 0.0
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+
+_fingerprints = None
+_fingerprints_lock = threading.Lock()
+
+
+def get_fingerprint_cache(max_entries=50000):
+    """Process-wide cache of request fingerprints, keyed by (dbname, request id)."""
+    global _fingerprints
+    with _fingerprints_lock:
+        if _fingerprints is None or _fingerprints.max_entries != max_entries:
+            # Signatures are small and uniform; entry count is the real bound
+            _fingerprints = LRUCache(max_entries=max_entries, max_bytes=max_entries * 2048)
+        return _fingerprints
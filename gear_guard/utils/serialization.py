@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+GearGuard Serialization Utilities
+JSON encoding and response compression for the REST API.
+Uses orjson and brotli when installed, the standard library otherwise.
+"""
+
+import gzip
+import json
+from datetime import date, datetime
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Bodies smaller than this are sent as they are: compressing them costs
+# more than the bytes it saves
+COMPRESSION_MIN_BYTES = 1024
+# Fast levels: repetitive API JSON already shrinks ~10x, higher levels
+# mostly add latency (see benchmarks/bench_serialization.py)
+GZIP_LEVEL = 3
+BROTLI_QUALITY = 4
+
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if ORJSON_AVAILABLE else 0
+
+
+def _default(value):
+    """
+    Fallback for values JSON has no type for. Dates keep the format the API
+    always used (str(), i.e. Odoo's '%Y-%m-%d %H:%M:%S' server format),
+    anything else is sent as its string form.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(data):
+    """
+    Encode data as compact JSON.
+
+    Returns:
+        UTF-8 encoded bytes
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # Integers beyond 64 bits and other values orjson refuses
+            pass
+    return json.dumps(data, default=_default, separators=(',', ':')).encode()
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick the content coding for a response from an Accept-Encoding header.
+    Brotli is preferred over gzip when both are accepted; codings with
+    q=0 are refused.
+
+    Returns:
+        'br', 'gzip' or None for identity
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _sep, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    wildcard = accepted.get('*', 0.0)
+    if BROTLI_AVAILABLE and accepted.get('br', wildcard) > 0:
+        return 'br'
+    if accepted.get('gzip', wildcard) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    """Compress a body with the given content coding ('br' or 'gzip')."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def compress_response(body, accept_encoding=None, min_size=COMPRESSION_MIN_BYTES):
+    """
+    Compress an encoded body when the client accepts it and it is large enough.
+
+    Returns:
+        Tuple (body bytes, list of extra response headers)
+    """
+    headers = [('Vary', 'Accept-Encoding')]
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= min_size else None
+    if encoding:
+        body = compress(body, encoding)
+        headers.append(('Content-Encoding', encoding))
+    return body, headers
+
+
+def encode_response(data, accept_encoding=None, min_size=COMPRESSION_MIN_BYTES):
+    """
+    Serialize an API payload, compressed as compress_response() decides.
+
+    Returns:
+        Tuple (body bytes, list of extra response headers)
+    """
+    return compress_response(dumps(data), accept_encoding, min_size)
@@ -1,3 +1,4 @@
 # -*- coding: utf-8 -*-
 
 from . import maintenance_request_wizard
+from . import equipment_import_wizard
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import io
+import threading
+
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+
+
+class EquipmentImportWizard(models.TransientModel):
+    _name = 'gear.equipment.import.wizard'
+    _description = 'Import Equipment from CSV'
+
+    file = fields.Binary(
+        string='CSV File',
+        required=True,
+    )
+    filename = fields.Char(
+        string='File Name',
+    )
+    chunk_size = fields.Integer(
+        string='Chunk Size',
+        default=2000,
+        help="Rows upserted and committed together.",
+    )
+    state = fields.Selection(
+        selection=[
+            ('draft', 'Draft'),
+            ('done', 'Done'),
+        ],
+        default='draft',
+    )
+    row_count = fields.Integer(string='Rows', readonly=True)
+    created_count = fields.Integer(string='Created', readonly=True)
+    updated_count = fields.Integer(string='Updated', readonly=True)
+    unchanged_count = fields.Integer(string='Unchanged', readonly=True)
+    rejected_count = fields.Integer(string='Rejected', readonly=True)
+    duration_seconds = fields.Float(string='Duration (Seconds)', readonly=True)
+    rejected_report = fields.Binary(
+        string='Rejected Rows',
+        readonly=True,
+        attachment=False,
+    )
+    rejected_report_name = fields.Char(
+        default='rejected_rows.csv',
+    )
+
+    def _open_file(self):
+        """
+        The uploaded file as a binary stream. A file kept in the filestore is
+        read from disk, so the import never holds a decoded copy in memory.
+        """
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BytesIO(attachment.raw or base64.b64decode(self.file))
+
+    def action_import(self):
+        """Run the streaming import and show its summary."""
+        self.ensure_one()
+        if not self.file:
+            raise UserError(_('Please select a CSV file.'))
+
+        Importer = self.env['gear.equipment.import']
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        try:
+            with self._open_file() as stream:
+                result = Importer.import_csv(
+                    stream,
+                    chunk_size=self.chunk_size,
+                    auto_commit=auto_commit,
+                )
+        except ValueError as e:
+            raise UserError(str(e))
+
+        report = Importer._rejected_report(result)
+        self.write({
+            'state': 'done',
+            'file': False,
+            'row_count': result['rows'],
+            'created_count': result['created'],
+            'updated_count': result['updated'],
+            'unchanged_count': result['unchanged'],
+            'rejected_count': result['rejected_count'],
+            'duration_seconds': result['seconds'],
+            'rejected_report': base64.b64encode(report) if report else False,
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
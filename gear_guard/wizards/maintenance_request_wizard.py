@@ -108,6 +108,16 @@ class MaintenanceAssignWizard(models.TransientModel):
         comodel_name='gear.maintenance.team',
         string='Assign to Team',
     )
+    assignment_mode = fields.Selection(
+        selection=[
+            ('manual', 'Specific Technician'),
+            ('auto', 'Balance Across Team'),
+        ],
+        string='Assignment Mode',
+        default='manual',
+        required=True,
+        help="Balance Across Team spreads the requests over the team members according to their open workload.",
+    )
     assigned_user_id = fields.Many2one(
         comodel_name='res.users',
         string='Assign to Technician',
@@ -139,7 +149,7 @@ class MaintenanceAssignWizard(models.TransientModel):
         vals = {}
         if self.team_id:
             vals['team_id'] = self.team_id.id
-        if self.assigned_user_id:
+        if self.assigned_user_id and self.assignment_mode == 'manual':
             vals['assigned_user_id'] = self.assigned_user_id.id
         if self.scheduled_date:
             vals['scheduled_date'] = self.scheduled_date
@@ -147,4 +157,7 @@ class MaintenanceAssignWizard(models.TransientModel):
         if vals:
             self.request_ids.write(vals)
         
+        if self.assignment_mode == 'auto':
+            self.request_ids._auto_assign_technicians(team=self.team_id or None)
+        
         return {'type': 'ir.actions.act_window_close'}